@@ -0,0 +1,102 @@
+"""Data access for the matrix scanner's ``cartridge`` table.
+
+Every statement is parameterized.  Duplicate checks against the most recent
+``recent`` cartridges are answered from an in-memory mirror (a bounded deque
+plus a counter, loaded once at start), so they cost no SQL.  Retention is a
+fixed-capacity ring over ``SERIAL``: rows more than ``capacity`` serials
+behind the newest one are deleted in one range delete once ``prune_slack``
+of them have built up, instead of a min/max query and a single-row delete
+after every insert.  Rows still waiting for upload (``STATUS=1``) are never
+pruned.  ``CARTRIDGE`` is indexed for lookups by code.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import Counter, deque
+from typing import Deque
+
+DB_PATH = "/SCANNER/scanner.db"
+RETENTION_ROWS = 500_000
+RECENT_CODES = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS "cartridge" (
+    "SERIAL" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "DATE_TIME" CHAR(50),
+    "LINE" TEXT,
+    "CUBE" TEXT,
+    "MATRIX" TEXT,
+    "CARTRIDGE" TEXT,
+    "STATUS" INT
+);
+CREATE INDEX IF NOT EXISTS cartridge_code ON cartridge (CARTRIDGE);
+"""
+_INSERT_SQL = (
+    "INSERT INTO cartridge (DATE_TIME, LINE, CUBE, MATRIX, CARTRIDGE, STATUS) VALUES (?, ?, ?, ?, ?, ?)"
+)
+_PRUNE_SQL = "DELETE FROM cartridge WHERE SERIAL <= ? AND STATUS = 0"
+
+
+class CartridgeStore:
+    """Inserts, duplicate checks and ring-buffer retention for scanned cartridges."""
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        capacity: int = RETENTION_ROWS,
+        recent: int = RECENT_CODES,
+        prune_slack: int = 1000,
+    ) -> None:
+        self.capacity = capacity
+        self.prune_slack = max(1, prune_slack)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._recent: Deque[str] = deque(maxlen=recent)
+        self._recent_counts: Counter = Counter()
+        rows = self._conn.execute(
+            "SELECT CARTRIDGE FROM cartridge ORDER BY SERIAL DESC LIMIT ?", (recent,)
+        ).fetchall()
+        for (code,) in reversed(rows):
+            self._remember(code)
+        oldest = self._conn.execute("SELECT MIN(SERIAL) FROM cartridge").fetchone()[0]
+        self._pruned_through = (oldest or 1) - 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _remember(self, code: str) -> None:
+        if len(self._recent) == self._recent.maxlen:
+            evicted = self._recent[0]
+            self._recent_counts[evicted] -= 1
+            if not self._recent_counts[evicted]:
+                del self._recent_counts[evicted]
+        self._recent.append(code)
+        self._recent_counts[code] += 1
+
+    def is_recent_duplicate(self, code: str) -> bool:
+        """Whether ``code`` is among the last ``recent`` cartridges stored."""
+        with self._lock:
+            return code in self._recent_counts
+
+    def sequence(self) -> int:
+        """Last ``SERIAL`` handed out (the scan counter base), 0 for an empty table."""
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cartridge'").fetchone()
+        return int(row[0]) if row else 0
+
+    def add(self, date_time: str, line: str, cube: str, matrix: str, code: str, status: int = 1) -> int:
+        """Store one scanned cartridge and commit; returns its ``SERIAL``."""
+        with self._lock:
+            serial = self._conn.execute(_INSERT_SQL, (date_time, line, cube, matrix, code, status)).lastrowid
+            cutoff = serial - self.capacity
+            if cutoff - self._pruned_through >= self.prune_slack:
+                self._conn.execute(_PRUNE_SQL, (cutoff,))
+                self._pruned_through = cutoff
+            self._conn.commit()
+            self._remember(code)
+        return serial
@@ -28,6 +28,7 @@ import threading
 import select
 import binascii
 import mmap
+from cartridge_store import CartridgeStore
 mutex_wrkrbusy = threading.Lock()
 
 cube="NA"
@@ -841,12 +842,10 @@ class Worker(QRunnable):
         #self.setupUi(self)
         #self.pushButton_2.clicked.connect(self.reset_clicked)
         
-        self.matrix_db = sqlite3.connect('/SCANNER/scanner.db')
+        self.store = CartridgeStore('/SCANNER/scanner.db')
         with open("/SCANNER/cat", "r") as f2:
             f2.seek(0)
-            cursor0 = self.matrix_db.cursor()
-            cursor0.execute('''SELECT SEQ from sqlite_sequence WHERE name='cartridge';''')
-            count=int(cursor0.fetchone()[0])-int(f2.read())
+            count=self.store.sequence()-int(f2.read())
             self.signals.change_value_count.emit(str(count))
         with open("/SCANNER/matrix.txt", "r") as f:
             f.seek(0)
@@ -882,10 +881,7 @@ class Worker(QRunnable):
                     #current_datetime=datetime.now().strftime("%Y/%m/%d-%H:%M:%S")
                     count=0
                     with open("/SCANNER/cat", "w") as fc:
-                        cursor4 = self.matrix_db.cursor()#
-                        cursor4.execute('''SELECT SEQ from sqlite_sequence WHERE name='cartridge';''')
-                        fc.write(str(cursor4.fetchone()[0])) 
-                        cursor4.close()
+                        fc.write(str(self.store.sequence()))
                     prev_matrix=qr
                     if matrixux.qr_id =='M':
                         matrix=qr
@@ -903,12 +899,7 @@ class Worker(QRunnable):
                         self.signals.change_value_cartridge.emit('QR LENGTH ERROR') 
                         print ("Len error:"+qr)
                         continue
-                    cursor5=self.matrix_db.cursor()
-                    cursor5.execute('''SELECT EXISTS(SELECT * FROM (SELECT * FROM cartridge ORDER BY SERIAL DESC LIMIT 50) WHERE CARTRIDGE="'''+qr+'''" LIMIT 1);''')
-                    repetQr=cursor5.fetchone()[0]
-                    #print(repetQr)
-                    cursor5.close()
-                    if repetQr==1:
+                    if self.store.is_recent_duplicate(qr):
                         #print ("Dup:"+qr)
                         continue
                         
@@ -935,27 +926,14 @@ class Worker(QRunnable):
                         #self.ui.CARTRIDGE_COUNT_2.setText(text)
                      
                         
-                        cursor2=self.matrix_db.cursor()
                         count+=1
                         current_datetime=datetime.now().strftime("%Y/%m/%d-%H:%M:%S")
-                        sqlite_insert_with_param=str('''INSERT INTO cartridge VALUES ( ?, ?, ?, ?, ?, ?, ?);''')
-                        data_tuple = (None,current_datetime,line,cube,matrix,qr,1)
-                        cursor2.execute(sqlite_insert_with_param, data_tuple)
-                        cursor2.close()
+                        # one parameterized insert; retention is pruned in slabs
+                        self.store.add(current_datetime,line,cube,matrix,qr,1)
                         
                         self.signals.change_value_cartridge.emit(qr)
                         self.signals.change_value_count.emit(str(count))
                         #self.signals.change_value_count.emit("22")
-                        cursor3=self.matrix_db.cursor()
-                        cursor3.execute("SELECT  max(rowid) FROM cartridge")
-                        MaxRowNo = int(cursor3.fetchone()[0])
-                        cursor3.execute("SELECT  min(rowid) FROM cartridge")
-                        MinRowNo = int(cursor3.fetchone()[0])
-                            
-                        if((MaxRowNo-MinRowNo)>500000) :
-                            cursor3.execute("Delete from cartridge where rowid="+str(MinRowNo))  
-                        cursor3.close()
-                        self.matrix_db.commit()
                         
                         tgr_cmd= [65] #A
                         "".join(map(chr, tgr_cmd))
@@ -974,8 +952,7 @@ class Worker(QRunnable):
                 self.signals.error_signal.emit("Worker exception:"+str(e),'Data logging error!')
                 time.sleep(255)
                 sys.exit()
-        self.matrix_db.commit()
-        self.matrix_db.close()
+        self.store.close()
         
 
   
@@ -3,13 +3,12 @@ import requests
 import json
 import simplejson
 import time
-import sqlite3
 import socket
-from threading import Thread
-import subprocess
-import sys
+from threading import Event, Thread
 import logging
 
+from uploader import Backoff, CartridgeUploader, equipment_ids
+
 logging.basicConfig(filename='/SCANNER/LOGS/mxsr_request.log', level=logging.INFO, format='%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s',
                     datefmt='%Y-%m-%d %H:%M:%S')
 
@@ -24,26 +23,6 @@ uploadurl = 'https://www.micropcr.in:3000/v1/matrixscanner/'
 pingurl = 'https://www.micropcr.in:3000/v1/heartbeatdetails/'
 
 
-
-try:
-
-    import pandas as pd
-except ImportError:
-    while True:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", 'pandas'])
-        except subprocess.CalledProcessError:
-            continue
-        break
-finally:
-    import pandas as pd
-
-
-def dbcon():
-    con = sqlite3.connect("/SCANNER/scanner.db")
-    return con
-
-
 # function to login and create a json file to store the response
 def login():
     post_fields = {"username": "userdemo", "password": "demo12"}
@@ -67,86 +46,17 @@ def tkn():
         pass
 
 
-# function to takeout data from db and convert it to the json format and upload
+# uploader that sends pending rows over one keep-alive session in batches
+_HN = socket.gethostname()
+_UPLOADER = CartridgeUploader(uploadurl, *equipment_ids(_HN), login_url=loginurl)
+
+
+# function to upload every pending cartridge row; raises UploadError when
+# the server cannot be reached
 def upload():
-    global boom
-    token = tkn()
-    # uploading data to server
-    con = dbcon()
-    boom = 1200
-    hn = socket.gethostname()
-    # open databse
-    df = pd.read_sql_query("SELECT * from cartridge where STATUS=1", con)
-    print(df)
-    if df.empty is False:
-        print(df)
-
-        for i in range(0, len(df)):
-
-            payload = {"line": '{}'.format(df.iloc[i, 2]),
-                       "cube": '{}'.format(df.iloc[i, 3]),
-                       "matrix_qrcode": '{}'.format(df.iloc[i, 4]),
-                       "cartridge_qrcode": '{}'.format(df.iloc[i, 5]),
-                       "date_time": '{}'.format(df.iloc[i, 1]),
-                       'Equipment_id': '{}'.format(hn[:11]),
-                       'Site_code': '{}'.format(hn[11:13])
-                       }
-
-            try:
-                logging.info(payload)
-                response = requests.put(uploadurl,
-                                         json=payload,
-                                         headers={"Content-Type": "application/json",
-                                                  "Authorization": "{}".format(token)})
-                logging.info(response)
-                print(response.json()['success'])
-                print(response)
-                print(response.text)
-
-                if (response.json()['success']) is True:
-                    con.execute("UPDATE cartridge SET STATUS=0 WHERE SERIAL='{}'".format(df.iloc[i, 0]))
-                    con.commit()
-                else:
-                    pass
-
-            except requests.exceptions.ConnectionError:
-                boom = 600
-                pass
-            except UnboundLocalError:
-                pass
-
-            try:
-                if response.text == "Unauthorized":
-                    login()
-                    # login.main()
-                    tokn2 = tkn()
-                    logging.info(payload)
-                    response = requests.put(uploadurl,
-                                             json=payload,
-                                             headers={"Content-Type": "application/json",
-                                                      "Authorization": "{}".format(tokn2)})
-                    logging.info(response)
-                    print(response.json()['success'])
-                    print(response)
-                    print(response.text)
-                    if (response.json()['success']) is True:
-                        con.execute("UPDATE cartridge SET STATUS=0 WHERE SERIAL='{}'".format(df.iloc[i, 0]))
-                        con.commit()
-                    else:
-                        pass
-
-                else:
-                    pass
-
-                print("upload successful>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
-            except UnboundLocalError:
-                pass
-            except requests.exceptions.ConnectionError:
-                boom = 600
-                pass
-    else:
-        pass
-    con.close()
+    uploaded = _UPLOADER.upload_pending()
+    logging.info("uploaded %s rows", uploaded)
+    print("upload successful>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
 
 
 # function to ping the server with equipment and site id for verification
@@ -213,27 +123,14 @@ def ping1():
 def upload1():
     print("<<<<<<<<<<<<<<<<<<<<<<<<<<uploading data>>>>>>>>>>>>>>>>>>>>>>>>>>")
     print("__________________________________________________________________")
-    try:
-        upload()
-        # if the json file which contains response from where token has to be
-        # extracted is not available or not created FNFE exception occurs
-    except FileNotFoundError:
-        login()
-        upload()
-
-        # if the json file is empty below exception has to be executed
-    except json.decoder.JSONDecodeError:
-        login()
-        upload()
-    except simplejson.errors.JSONDecodeError:
-        login()
-        upload()
+    # token file handling and re-login live in CartridgeUploader
+    upload()
 
 
+# uploads every 1200 s; after a failure waits with exponential backoff and
+# jitter instead of a fixed sleep
 def up():
-    while True:
-        upload1()
-        time.sleep(boom)
+    _UPLOADER.run(Event(), interval=1200.0, backoff=Backoff(base=30.0, cap=1200.0))
 
 
 def pi():
@@ -22,10 +22,8 @@ try:
     import json
     import simplejson
     import time
-    import sqlite3
-    from threading import Thread
-    import subprocess
-    import sys
+    from threading import Event, Thread
+    from uploader import Backoff, CartridgeUploader, equipment_ids
     loginurl = 'https://www.micropcr.in:3000/v1/proddevices/login'
     pingurl = 'https://www.micropcr.in:3000/v1/heartbeatdetails/'
     MXSR = "https://www.micropcr.in:3000/v1/matrixscanner"
@@ -36,20 +34,6 @@ try:
     DMSR = "https://www.micropcr.in:3000/v1/dumpassemblyscanner"
     RWSR = "https://www.micropcr.in:3000/v1/reworkcartridgescanner"
     uploadurl = globals()[a]
-    try:
-        import pandas as pd
-    except ImportError:
-        while True:
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", 'pandas'])
-            except subprocess.CalledProcessError:
-                continue
-            break
-    finally:
-        import pandas as pd
-    def dbcon():
-        con = sqlite3.connect("/SCANNER/scanner.db")
-        return con
     def login():
         post_fields = {"username": "userdemo", "password": "demo12"}
         response = requests.post(loginurl, data=post_fields)
@@ -64,60 +48,10 @@ try:
         if rs['success'] is True:
             token = rs["token"]
             return token
+    uploader = CartridgeUploader(uploadurl, *equipment_ids(hn), login_url=loginurl)
     def upload():
-        global boom
-        token = tkn()
-        con = dbcon()
-        boom = 1200
-        df = pd.read_sql_query("SELECT * from cartridge where STATUS=1", con)
-        if df.empty is False:
-            for i in range(0, len(df)):
-
-                payload = {"line": '{}'.format(df.iloc[i, 2]),
-                           "cube": '{}'.format(df.iloc[i, 3]),
-                           "matrix_qrcode": '{}'.format(df.iloc[i, 4]),
-                           "cartridge_qrcode": '{}'.format(df.iloc[i, 5]),
-                           "date_time": '{}'.format(df.iloc[i, 1]),
-                           'Equipment_id': '{}'.format(hn[:11]),
-                           'Site_code': '{}'.format(hn[11:13])
-                           }
-                try:
-                    logging.info(payload)
-                    response = requests.put(uploadurl,
-                                            json=payload,
-                                            headers={"Content-Type": "application/json",
-                                                     "Authorization": "{}".format(token)})
-                    logging.info(response)
-                    a = str(response)
-                    if a[11:14] == "201":
-                        print(response)
-                        print(response.text)
-                        con.execute("UPDATE cartridge SET STATUS=0 WHERE SERIAL={}".format(df.iloc[i, 0]))
-                        con.commit()
-                    if response.text == "Unauthorized":
-                        login()
-                        token = tkn()
-                        logging.info(payload)
-                        response = requests.put(uploadurl,
-                                                json=payload,
-                                                headers={"Content-Type": "application/json",
-                                                          "Authorization": "{}".format(token)})
-                        logging.info(response)
-                        a = str(response)
-                        if a[11:14] == "201":
-                            print(response.json()['success'])
-                            print(response)
-                            print(response.text)
-
-                            con.execute("UPDATE cartridge SET STATUS=0 WHERE SERIAL={}".format(df.iloc[i, 0]))
-                            con.commit()
-                except UnboundLocalError:
-                    pass
-                except requests.exceptions.ConnectionError:
-                    boom = 600
-            else:
-                print("no data founf in database")
-        con.close()
+        uploaded = uploader.upload_pending()
+        logging.info("uploaded %s rows", uploaded)
     def ping():
         global boom1
         token = tkn()
@@ -160,23 +94,9 @@ try:
         except simplejson.errors.JSONDecodeError:
             login()
             ping()
-    def upload1():
-        print("====================uploading====================")
-        try:
-            upload()
-        except FileNotFoundError:
-            login()
-            upload()
-        except json.decoder.JSONDecodeError:
-            login()
-            upload()
-        except simplejson.errors.JSONDecodeError:
-            login()
-            ping()
     def up():
-        while True:
-            upload1()
-            time.sleep(boom)
+        print("====================uploading====================")
+        uploader.run(Event(), interval=1200.0, backoff=Backoff(base=30.0, cap=1200.0))
     def pi():
         while True:
             ping1()
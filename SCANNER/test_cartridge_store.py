@@ -0,0 +1,66 @@
+"""Tests for the matrix scanner's cartridge table access layer."""
+
+import sqlite3
+
+import pytest
+
+from cartridge_store import CartridgeStore
+
+
+def _rows(path):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("SELECT SERIAL, CARTRIDGE, STATUS FROM cartridge ORDER BY SERIAL").fetchall()
+    finally:
+        con.close()
+
+
+def test_recent_duplicates_come_from_the_mirror(tmp_path):
+    db = tmp_path / "scanner.db"
+    store = CartridgeStore(str(db), recent=3)
+    assert store.sequence() == 0
+    for code in ("QR1", "QR2", "QR1", "QR3"):
+        store.add("2025/01/02-08:00:00", "L1", "C1", "M1", code)
+    assert store.sequence() == 4
+    assert store.is_recent_duplicate("QR1")  # still once in the last three
+    for code in ("QR4", "QR5"):
+        store.add("2025/01/02-08:00:01", "L1", "C1", "M1", code)
+    assert not store.is_recent_duplicate("QR1")
+    assert [store.is_recent_duplicate(code) for code in ("QR3", "QR4", "QR5")] == [True, True, True]
+    store.close()
+
+    reopened = CartridgeStore(str(db), recent=3)
+    assert reopened.is_recent_duplicate("QR3") and not reopened.is_recent_duplicate("QR2")
+    reopened.close()
+
+
+def test_codes_are_bound_not_interpolated(tmp_path):
+    db = tmp_path / "scanner.db"
+    store = CartridgeStore(str(db))
+    store.add("2025/01/02-08:00:00", "L1", "C1", "M1", 'QR") OR 1=1; DROP TABLE cartridge; --')
+    assert not store.is_recent_duplicate("QR")
+    store.close()
+    assert _rows(db)[0][1].startswith('QR")')
+    con = sqlite3.connect(db)
+    assert con.execute("EXPLAIN QUERY PLAN SELECT 1 FROM cartridge WHERE CARTRIDGE = ?", ("QR",)).fetchall()[0][3] \
+        .startswith("SEARCH cartridge USING COVERING INDEX cartridge_code")
+    con.close()
+
+
+def test_ring_retention_prunes_uploaded_rows_in_slabs(tmp_path):
+    db = tmp_path / "scanner.db"
+    store = CartridgeStore(str(db), capacity=10, prune_slack=5)
+    for serial in range(1, 15):
+        store.add("2025/01/02-08:00:00", "L1", "C1", "M1", f"QR{serial}", status=0 if serial != 2 else 1)
+    assert len(_rows(db)) == 14  # 4 rows behind the ring: below the slack
+    store.add("2025/01/02-08:00:00", "L1", "C1", "M1", "QR15", status=0)
+    kept = _rows(db)
+    assert [serial for serial, _, _ in kept] == [2] + list(range(6, 16))  # pending row 2 survives
+    for serial in range(16, 21):
+        store.add("2025/01/02-08:00:00", "L1", "C1", "M1", f"QR{serial}", status=0)
+    assert [serial for serial, _, _ in _rows(db)] == [2] + list(range(11, 21))
+    store.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,212 @@
+"""Tests for the batched cartridge uploader against a local stand-in MES."""
+
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+from uploader import Backoff, CartridgeUploader, UploadError, UploadRecord, iter_pending
+
+
+class _StandInMes(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        state = self.server.state
+        state["login_requests"].append((self.headers.get("Content-Type"), self._body().decode()))
+        state["logins"] += 1
+        self._reply(200, {"success": True, "token": f"token-{state['logins']}"})
+
+    def do_PUT(self):
+        state = self.server.state
+        state["put_types"].add(self.headers.get("Content-Type"))
+        payload = json.loads(self._body())
+        state["ports"].add(self.client_address[1])
+        if self.headers.get("Authorization") != state["valid_token"]:
+            self._reply(401, "Unauthorized")
+            return
+        if payload["cartridge_qrcode"] in state["reject"]:
+            self._reply(200, {"success": False})
+            return
+        state["received"].append(payload)
+        self._reply(201, {"success": True})
+
+
+@pytest.fixture
+def mes():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInMes)
+    server.state = {
+        "logins": 0, "valid_token": "token-1", "received": [], "reject": set(), "ports": set(),
+        "login_requests": [], "put_types": set(),
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _database(path, rows):
+    con = sqlite3.connect(path)
+    con.execute(
+        'CREATE TABLE cartridge ("SERIAL" INTEGER PRIMARY KEY AUTOINCREMENT, "DATE_TIME" CHAR(50),'
+        ' "LINE" TEXT, "CUBE" TEXT, "MATRIX" TEXT, "CARTRIDGE" TEXT, "STATUS" INT)'
+    )
+    con.executemany("INSERT INTO cartridge VALUES (NULL, '2025/01/02-08:00:00', 'L1', 'C1', 'M1', ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+def _uploader(mes, tmp_path, **kwargs):
+    base = f"http://127.0.0.1:{mes.server_address[1]}"
+    return CartridgeUploader(
+        f"{base}/v1/matrixscanner/",
+        "EQUIPMENT01",
+        "S1",
+        db_path=str(tmp_path / "scanner.db"),
+        login_url=f"{base}/v1/proddevices/login",
+        token_path=str(tmp_path / "crlf.json"),
+        **kwargs,
+    )
+
+
+def _statuses(tmp_path):
+    con = sqlite3.connect(tmp_path / "scanner.db")
+    try:
+        return dict(con.execute("SELECT CARTRIDGE, STATUS FROM cartridge"))
+    finally:
+        con.close()
+
+
+def test_batches_share_one_connection_and_commit_accepted_rows(mes, tmp_path):
+    _database(tmp_path / "scanner.db", [(f"QR{i:03d}", 1) for i in range(12)] + [("OLD", 0)])
+    mes.state["reject"] = {"QR005"}
+    (tmp_path / "crlf.json").write_text(json.dumps({"success": True, "token": "stale"}))
+    uploader = _uploader(mes, tmp_path, batch_size=5)
+
+    assert uploader.upload_pending() == 11
+    assert mes.state["logins"] == 1  # stale token replaced once
+    assert [p["cartridge_qrcode"] for p in mes.state["received"]] == [f"QR{i:03d}" for i in range(12) if i != 5]
+    assert mes.state["received"][0]["Equipment_id"] == "EQUIPMENT01"
+    assert len(mes.state["ports"]) == 1  # keep-alive: every PUT on one connection
+    statuses = _statuses(tmp_path)
+    assert statuses["QR005"] == 1 and statuses["QR000"] == 0 and statuses["OLD"] == 0
+    assert json.loads((tmp_path / "crlf.json").read_text())["token"] == "token-1"
+
+    mes.state["reject"] = set()
+    assert uploader.upload_pending() == 1
+    assert uploader.upload_pending() == 0
+
+
+def test_login_is_form_encoded_and_puts_are_json(mes, tmp_path):
+    _database(tmp_path / "scanner.db", [("QR0", 1)])
+    uploader = _uploader(mes, tmp_path)
+    assert uploader.upload_pending() == 1
+    [(content_type, body)] = mes.state["login_requests"]
+    assert content_type == "application/x-www-form-urlencoded"
+    assert parse_qs(body) == {"username": ["userdemo"], "password": ["demo12"]}
+    assert mes.state["put_types"] == {"application/json"}
+
+
+def test_unwritable_token_file_keeps_the_token_in_memory(mes, tmp_path):
+    _database(tmp_path / "scanner.db", [("QR0", 1), ("QR1", 1)])
+    uploader = _uploader(mes, tmp_path)
+    uploader.token_path = tmp_path / "missing" / "crlf.json"
+    mes.state["reject"] = {"QR1"}
+    assert uploader.upload_pending() == 1
+    mes.state["reject"] = set()
+    assert uploader.upload_pending() == 1
+    assert mes.state["logins"] == 1  # second pass reused the in-memory token
+
+def test_network_failure_keeps_accepted_rows(mes, tmp_path):
+    _database(tmp_path / "scanner.db", [(f"QR{i}", 1) for i in range(4)])
+    uploader = _uploader(mes, tmp_path, batch_size=10, timeout=2.0)
+    original_put = uploader.session.put
+
+    def flaky_put(url, json, **kwargs):
+        if json["cartridge_qrcode"] == "QR2":
+            raise requests.ConnectionError("link dropped")
+        return original_put(url, json=json, **kwargs)
+
+    uploader.session.put = flaky_put
+    with pytest.raises(UploadError):
+        uploader.upload_pending()
+    assert _statuses(tmp_path) == {"QR0": 0, "QR1": 0, "QR2": 1, "QR3": 1}
+
+
+def test_iter_pending_streams_typed_chunks(tmp_path):
+    _database(tmp_path / "scanner.db", [(f"QR{i}", i % 3 and 1) for i in range(10)])
+    con = sqlite3.connect(tmp_path / "scanner.db")
+    chunks = iter_pending(con, chunk_size=3)
+    first = next(chunks)
+    assert first[0] == UploadRecord(2, "2025/01/02-08:00:00", "L1", "C1", "M1", "QR1")
+    assert isinstance(first[0].serial, int)
+    con.execute("UPDATE cartridge SET STATUS = 0 WHERE SERIAL = 9")  # uploaded meanwhile
+    assert [[record.cartridge for record in chunk] for chunk in chunks] == [["QR5", "QR7"]]
+    assert [record.cartridge for record in first] == ["QR1", "QR2", "QR4"]
+    assert first[0].payload("EQUIPMENT01", "S1")["matrix_qrcode"] == "M1"
+    con.close()
+
+
+def test_uploader_does_not_load_pandas():
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = "import sys, uploader; print('pandas' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_backoff_grows_with_full_jitter_and_resets():
+    backoff = Backoff(base=5.0, cap=60.0, rng=lambda: 1.0)
+    assert [backoff.next_delay() for _ in range(6)] == [5.0, 10.0, 20.0, 40.0, 60.0, 60.0]
+    backoff.reset()
+    assert backoff.next_delay() == 5.0
+    assert Backoff(base=5.0, cap=60.0, rng=lambda: 0.5).next_delay() == 2.5
+
+
+def test_run_backs_off_while_the_server_is_down(tmp_path):
+    _database(tmp_path / "scanner.db", [("QR0", 1)])
+    uploader = CartridgeUploader(
+        "http://127.0.0.1:9/upload", "EQUIPMENT01", "S1",
+        db_path=str(tmp_path / "scanner.db"), login_url="http://127.0.0.1:9/login",
+        token_path=str(tmp_path / "crlf.json"), timeout=0.5,
+    )
+    stop = threading.Event()
+    delays = []
+
+    class _Recording(Backoff):
+        def next_delay(self):
+            delays.append(super().next_delay())
+            if len(delays) == 3:
+                stop.set()
+            return 0.0
+
+    uploader.run(stop, interval=60.0, backoff=_Recording(base=1.0, cap=60.0, rng=lambda: 1.0))
+    assert delays == [1.0, 2.0, 4.0]
+    assert _statuses(tmp_path) == {"QR0": 1}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,251 @@
+"""Batched upload of scanned cartridges to the MES over one keep-alive session.
+
+Rows of the ``cartridge`` table with ``STATUS=1`` form the outbox.
+``iter_pending`` reads them oldest first as typed ``UploadRecord`` chunks of
+``batch_size`` (keyset paging on ``SERIAL`` with a partial index, so memory
+stays constant whatever the backlog) and they are PUT one by one over a pooled
+``requests.Session``, so the TLS connection is reused.  The accepted serials
+of each batch are then marked ``STATUS=0`` in a single transaction.  A
+rejected token triggers one login and a retry of that row.  Network
+failures end the pass and ``run`` waits with exponential backoff and full
+jitter before trying again, instead of a fixed sleep.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LOGIN_URL = "https://www.micropcr.in:3000/v1/proddevices/login"
+CREDENTIALS = {"username": "userdemo", "password": "demo12"}
+DB_PATH = "/SCANNER/scanner.db"
+TOKEN_PATH = "/SCANNER/crlf.json"
+
+
+class UploadError(Exception):
+    """The MES could not be reached or refused to log the device in."""
+
+
+class UploadRecord(NamedTuple):
+    """One pending row of the ``cartridge`` table."""
+
+    serial: int
+    date_time: str
+    line: str
+    cube: str
+    matrix: str
+    cartridge: str
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "UploadRecord":
+        serial, *fields = row
+        return cls(int(serial), *(f"{field}" for field in fields))
+
+    def payload(self, equipment_id: str, site_code: str) -> Dict[str, str]:
+        return {
+            "line": self.line,
+            "cube": self.cube,
+            "matrix_qrcode": self.matrix,
+            "cartridge_qrcode": self.cartridge,
+            "date_time": self.date_time,
+            "Equipment_id": equipment_id,
+            "Site_code": site_code,
+        }
+
+
+_PENDING_SQL = (
+    "SELECT SERIAL, DATE_TIME, LINE, CUBE, MATRIX, CARTRIDGE FROM cartridge"
+    " WHERE STATUS = 1 AND SERIAL > ? ORDER BY SERIAL LIMIT ?"
+)
+
+
+def iter_pending(con: sqlite3.Connection, chunk_size: int = 50) -> Iterator[List[UploadRecord]]:
+    """Yield pending rows oldest first, ``chunk_size`` records at a time.
+
+    Each chunk is a fresh keyset query after the last serial seen, so rows
+    may be marked uploaded between chunks without disturbing the read.
+    """
+    after_serial = 0
+    while True:
+        cursor = con.execute(_PENDING_SQL, (after_serial, chunk_size))
+        try:
+            chunk = [UploadRecord.from_row(row) for row in cursor.fetchmany(chunk_size)]
+        finally:
+            cursor.close()
+        if not chunk:
+            return
+        yield chunk
+        after_serial = chunk[-1].serial
+
+
+def equipment_ids(hostname: str) -> Tuple[str, str]:
+    """(Equipment_id, Site_code) encoded in the scanner's hostname."""
+    return hostname[:11], hostname[11:13]
+
+
+class Backoff:
+    """Exponential backoff with full jitter: ``uniform(0, min(cap, base * 2**n))``."""
+
+    def __init__(self, base: float = 5.0, cap: float = 1200.0, rng: Callable[[], float] = random.random) -> None:
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+        self._rng = rng
+
+    def next_delay(self) -> float:
+        ceiling = min(self.cap, self.base * (2 ** self.attempts))
+        self.attempts += 1
+        return self._rng() * ceiling
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+
+class CartridgeUploader:
+    """Upload pending cartridge rows in batches and mark them uploaded."""
+
+    def __init__(
+        self,
+        upload_url: str,
+        equipment_id: str,
+        site_code: str,
+        db_path: str = DB_PATH,
+        login_url: str = LOGIN_URL,
+        token_path: str = TOKEN_PATH,
+        credentials: Optional[Dict[str, str]] = None,
+        batch_size: int = 50,
+        timeout: float = 15.0,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        self.upload_url = upload_url
+        self.equipment_id = equipment_id
+        self.site_code = site_code
+        self.db_path = db_path
+        self.login_url = login_url
+        self.token_path = Path(token_path)
+        self.credentials = credentials or CREDENTIALS
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.session = session or self._new_session()
+        self._token: Optional[str] = None
+        self._logger = logging.getLogger("uploader")
+
+    @staticmethod
+    def _new_session() -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    # ---------------- Token ----------------
+    def login(self) -> str:
+        """Log the device in and keep the response in ``token_path`` like before."""
+        try:
+            response = self.session.post(self.login_url, data=self.credentials, timeout=self.timeout)
+            body = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise UploadError(f"login failed: {exc}") from exc
+        try:
+            self.token_path.write_text(json.dumps(body))
+        except OSError as exc:
+            # Keep going with the token in memory; the next login saves it again
+            self._logger.warning("Unable to save login token to %s: %s", self.token_path, exc)
+        if body.get("success") is not True or not body.get("token"):
+            raise UploadError(f"login refused: {body}")
+        self._token = body["token"]
+        return self._token
+
+    def token(self) -> str:
+        if self._token is None:
+            try:
+                saved = json.loads(self.token_path.read_text())
+            except (OSError, ValueError):
+                saved = {}
+            if saved.get("success") is True and saved.get("token"):
+                self._token = saved["token"]
+            else:
+                return self.login()
+        return self._token
+
+    # ---------------- Outbox ----------------
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.db_path, timeout=10.0)
+        con.execute("CREATE INDEX IF NOT EXISTS cartridge_pending ON cartridge (SERIAL) WHERE STATUS = 1")
+        return con
+
+    # ---------------- Upload ----------------
+    @staticmethod
+    def _unauthorized(response: requests.Response) -> bool:
+        return response.status_code == 401 or response.text == "Unauthorized"
+
+    @staticmethod
+    def _accepted(response: requests.Response) -> bool:
+        if response.status_code == 201:
+            return True
+        if not response.ok:
+            return False
+        try:
+            return response.json().get("success") is True
+        except ValueError:
+            return False
+
+    def _put(self, payload: Dict[str, str]) -> bool:
+        response = self.session.put(
+            self.upload_url, json=payload, headers={"Authorization": self.token()}, timeout=self.timeout
+        )
+        if self._unauthorized(response):
+            self._token = None
+            self.login()
+            response = self.session.put(
+                self.upload_url, json=payload, headers={"Authorization": self.token()}, timeout=self.timeout
+            )
+        self._logger.info("%s %s", payload["cartridge_qrcode"], response.status_code)
+        return self._accepted(response)
+
+    def upload_pending(self) -> int:
+        """Upload every pending row; returns how many the MES accepted.
+
+        Raises ``UploadError`` on a network or login failure, after committing
+        the rows already accepted.
+        """
+        uploaded = 0
+        con = self._connect()
+        try:
+            for records in iter_pending(con, self.batch_size):
+                accepted: List[Tuple[int]] = []
+                try:
+                    for record in records:
+                        if self._put(record.payload(self.equipment_id, self.site_code)):
+                            accepted.append((record.serial,))
+                except requests.RequestException as exc:
+                    raise UploadError(f"upload failed: {exc}") from exc
+                finally:
+                    with con:
+                        con.executemany("UPDATE cartridge SET STATUS = 0 WHERE SERIAL = ?", accepted)
+                    uploaded += len(accepted)
+        finally:
+            con.close()
+        return uploaded
+
+    def run(self, stop: threading.Event, interval: float = 1200.0, backoff: Optional[Backoff] = None) -> None:
+        """Upload every ``interval`` seconds, backing off after failures, until ``stop`` is set."""
+        backoff = backoff or Backoff(cap=interval)
+        while not stop.is_set():
+            try:
+                self.upload_pending()
+            except (UploadError, sqlite3.Error, OSError) as exc:
+                delay = backoff.next_delay()
+                self._logger.warning("%s; retrying in %.0f s", exc, delay)
+            else:
+                backoff.reset()
+                delay = interval
+            stop.wait(delay)
@@ -20,6 +20,7 @@ from pathlib import Path
 from typing import Optional
 
 from hardware import get_hardware_controller
+from mould_index import MouldRangeIndex
 from actj_uart_protocol import get_uart_protocol, start_actj_communication, stop_actj_communication
 
 
@@ -174,7 +175,13 @@ class ACTJLegacyIntegration:
             return "FAIL", None
     
     def set_batch_context(self, batch_line, mould_ranges, duplicate_checker):
-        """Set batch context for QR validation."""
+        """Set batch context for QR validation.
+
+        mould_ranges may be the app's MouldRangeIndex (shared, not rebuilt)
+        or a plain {mould: (start, end)} dict, which is compiled here once.
+        """
+        if not isinstance(mould_ranges, MouldRangeIndex):
+            mould_ranges = MouldRangeIndex(mould_ranges)
         self._batch_context = {
             'batch_line': batch_line,
             'mould_ranges': mould_ranges,
@@ -26,6 +26,7 @@ The ACTJv20 firmware expects BOTH GPIO handshaking AND UART communication:
 import logging
 import time
 import threading
+from enum import Enum
 from typing import Optional, Tuple
 
 try:  # Optional dependency in development environments
@@ -35,13 +36,40 @@ except Exception:  # pragma: no cover - pyserial not installed
     serial = None  # type: ignore
     SerialException = Exception  # type: ignore
 
-from hardware import get_hardware_controller
+from hardware import ACCEPT_PULSE_PHASES, REJECT_PULSE_PHASES, get_hardware_controller
+from timer_wheel import TimerHandle, TimerWheel
+
+
+class ScanState(Enum):
+    """States of the ACTJv20 scan handshake."""
+
+    IDLE = "idle"
+    AWAITING_QR = "awaiting_qr"
+    RESPONDING = "responding"
+    PULSING = "pulsing"
+
+
+# Handshake timings (seconds) previously implemented with time.sleep()
+SCAN_TIMEOUT_S = 30.0
+BUSY_BEFORE_RESPONSE_S = 0.1   # firmware must register busy before the response byte
+RESPONSE_SETTLE_S = 0.15       # firmware processes the UART response
+FINAL_READY_S = 0.1            # allow mechanism to move before final READY
+
+# Mechanism plate pulse per response, shared with the hardware pulse helpers
+PULSE_PHASES = {'A': ACCEPT_PULSE_PHASES, 'R': REJECT_PULSE_PHASES}
 
 
 class ACTJv20UARTProtocol:
-    """UART communication protocol for ACTJv20(RJSR) firmware."""
+    """UART communication protocol for ACTJv20(RJSR) firmware.
     
-    def __init__(self, port="/dev/serial0", baudrate=115200):
+    Scan handling is an event-driven state machine
+    (IDLE -> AWAITING_QR -> RESPONDING -> PULSING -> IDLE).  Timed steps are
+    scheduled on a TimerWheel, so neither the listener thread nor the Tk
+    thread that delivers the QR ever sleeps, and stop bytes are seen while a
+    scan is outstanding.
+    """
+
+    def __init__(self, port="/dev/serial0", baudrate=115200, timer_wheel=None):
         self.logger = logging.getLogger("actj_uart")
         self.hardware = get_hardware_controller()
         self.serial_port: Optional[serial.Serial] = None  # type: ignore[name-defined]
@@ -54,8 +82,12 @@ class ACTJv20UARTProtocol:
         self.qr_validator = None
         self._scan_request_callback = None
         
-        # QR input handling
-        self._waiting_for_qr = False
+        # Scan state machine
+        self._timers = timer_wheel or TimerWheel(name="actj-uart-timers")
+        self._state_lock = threading.RLock()
+        self._state = ScanState.IDLE
+        self._cycle = 0
+        self._timeout_handle: Optional[TimerHandle] = None
         self._scan_start_time = 0
         
     def connect(self):
@@ -98,29 +130,37 @@ class ACTJv20UARTProtocol:
     def stop_listening(self):
         """Stop listening for ACTJv20 commands."""
         self.running = False
+        with self._state_lock:
+            self._cancel_timeout()
+            self._cycle += 1
+            self._state = ScanState.IDLE
         if self.listen_thread:
             self.listen_thread.join(timeout=2.0)
         if self.serial_port:
             self.serial_port.close()
             self.serial_port = None
+        self._timers.stop()
         self.logger.info("Stopped ACTJv20 communication")
     
     def _listen_loop(self):
         """Main listening loop for ACTJv20 commands."""
         while self.running:
             try:
-                if self.serial_port and getattr(self.serial_port, "in_waiting", 0):
-                    data = self.serial_port.read(1)
-                    if not data:
-                        continue
-
-                    command = data[0]
-                    self.logger.debug(
-                        "Received ACTJv20 command byte: 0x%02X", command
-                    )
-                    self._handle_command(command)
-
-                time.sleep(0.01)  # Small delay to prevent busy loop
+                port = self.serial_port
+                if not port:
+                    time.sleep(0.1)
+                    continue
+
+                # Blocks until a byte arrives or the port timeout expires
+                data = port.read(1)
+                if not data:
+                    continue
+
+                command = data[0]
+                self.logger.debug(
+                    "Received ACTJv20 command byte: 0x%02X", command
+                )
+                self._handle_command(command)
 
             except Exception as e:
                 self.logger.error(f"Error in ACTJv20 listen loop: {e}")
@@ -145,58 +185,95 @@ class ACTJv20UARTProtocol:
         else:
             self.logger.debug("Unknown ACTJv20 command byte: %s", command)
 
-    def _handle_scan_command(self, final_attempt: bool = False):
-        """Handle QR scan command from ACTJv20."""
-        try:
-            # Signal busy to firmware (RASP_IN_PIC LOW)
-            self.hardware.signal_busy_to_firmware()
-            self.logger.info("ACTJv20 scan command - signaling BUSY, waiting for QR input")
+    # ---------------- State machine ----------------
+    @property
+    def state(self) -> ScanState:
+        return self._state
+
+    def _transition(self, new_state: ScanState) -> None:
+        if new_state is not self._state:
+            self.logger.debug("ACTJv20 scan state %s -> %s", self._state.name, new_state.name)
+            self._state = new_state
+
+    def _cancel_timeout(self) -> None:
+        if self._timeout_handle is not None:
+            self._timeout_handle.cancel()
+            self._timeout_handle = None
+
+    def _schedule(self, delay: float, step, *args) -> None:
+        """Schedule a timed transition belonging to the current scan cycle."""
+        self._timers.schedule(delay, self._run_step, self._cycle, step, args)
+
+    def _run_step(self, cycle: int, step, args) -> None:
+        with self._state_lock:
+            if cycle != self._cycle:
+                return  # superseded by a newer scan command or a stop byte
+            try:
+                step(*args)
+            except Exception as e:
+                self.logger.error(f"Error in ACTJv20 scan handshake: {e}")
+                self._fail_cycle()
 
-            # Set a flag that we're waiting for QR input
-            self._waiting_for_qr = True
-            self._scan_start_time = time.time()
+    def _fail_cycle(self) -> None:
+        try:
+            if self.serial_port:
+                self.serial_port.write(b'S')  # Scanner error
+            self.hardware.signal_ready_to_firmware()
+        except Exception:
+            pass
+        self._cancel_timeout()
+        self._cycle += 1
+        self._transition(ScanState.IDLE)
 
-            # Notify the application so it can prepare the UI for scanning
-            if self._scan_request_callback:
-                try:
-                    self._scan_request_callback(final_attempt)
-                except Exception as callback_exc:
-                    self.logger.error(f"Scan request callback error: {callback_exc}")
-
-            # The USB QR scanner will trigger _process_qr_input when QR is scanned
-            # For now, we'll wait up to 30 seconds for QR input
-            timeout = 30.0
-            while self._waiting_for_qr and (time.time() - self._scan_start_time) < timeout:
-                time.sleep(0.1)
+    def _handle_scan_command(self, final_attempt: bool = False):
+        """Handle QR scan command from ACTJv20 without blocking the listener."""
+        with self._state_lock:
+            if self._state is not ScanState.IDLE:
+                self.logger.warning(
+                    "ACTJv20 scan command while %s - restarting scan", self._state.name
+                )
+            self._cancel_timeout()
+            self._cycle += 1
+            try:
+                # Signal busy to firmware (RASP_IN_PIC LOW)
+                self.hardware.signal_busy_to_firmware()
+                self.logger.info("ACTJv20 scan command - signaling BUSY, waiting for QR input")
+            except Exception as e:
+                self.logger.error(f"Error handling scan command: {e}")
+                self._fail_cycle()
+                return
 
-            if self._waiting_for_qr:
-                # Timeout - send scanner error
-                self.logger.warning("QR scan timeout - sending scanner error")
-                self.serial_port.write(b'S')  # Scanner error
-                self._waiting_for_qr = False
+            self._scan_start_time = time.time()
+            self._transition(ScanState.AWAITING_QR)
+            self._timeout_handle = self._timers.schedule(
+                SCAN_TIMEOUT_S, self._run_step, self._cycle, self._on_scan_timeout, ()
+            )
 
-            # Always signal ready at the end
-            time.sleep(0.1)
-            self.hardware.signal_ready_to_firmware()
-            self.logger.info("ACTJv20 scan complete - signaling READY")
-            
-        except Exception as e:
-            self.logger.error(f"Error handling scan command: {e}")
-            # Send error response
+        # Notify the application so it can prepare the UI for scanning
+        if self._scan_request_callback:
             try:
-                self.serial_port.write(b'S')  # Scanner error
-                self.hardware.signal_ready_to_firmware()
-                self._waiting_for_qr = False
-            except:
-                pass
+                self._scan_request_callback(final_attempt)
+            except Exception as callback_exc:
+                self.logger.error(f"Scan request callback error: {callback_exc}")
+
+    def _on_scan_timeout(self) -> None:
+        self._timeout_handle = None
+        if self._state is not ScanState.AWAITING_QR:
+            return
+        self.logger.warning("QR scan timeout - sending scanner error")
+        if not self.serial_port:
+            raise RuntimeError("UART port is not connected")
+        self.serial_port.write(b'S')  # Scanner error
+        self._transition(ScanState.RESPONDING)
+        self._schedule(BUSY_BEFORE_RESPONSE_S, self._finish_cycle)
     
     def process_qr_input(
         self,
         qr_code: str,
         validation_result: Optional[Tuple[str, Optional[str]]] = None,
     ) -> Tuple[Optional[str], Optional[str]]:
-        """Process QR code input from USB scanner and respond to firmware."""
-        if not self._waiting_for_qr:
+        """Validate a QR and start the firmware response; returns immediately."""
+        if self._state is not ScanState.AWAITING_QR:
             self.logger.debug(f"Received QR {qr_code} but not waiting for input")
             return None, None
 
@@ -224,63 +301,81 @@ class ACTJv20UARTProtocol:
             else:
                 self.logger.info("QR validation produced error (%s) - sending error", status)
 
-            # Signal busy before sending response (critical for ACTJv20 timing)
-            self.hardware.signal_busy_to_firmware()
-            time.sleep(0.1)  # Brief delay for firmware to register busy state
+            with self._state_lock:
+                if self._state is not ScanState.AWAITING_QR:
+                    self.logger.debug(f"Scan for {qr_code} already closed")
+                    return None, None
+                self._cancel_timeout()
+                self._transition(ScanState.RESPONDING)
 
-            # Send response to ACTJv20
-            if not self.serial_port:
-                raise RuntimeError("UART port is not connected")
+                # Signal busy before sending response (critical for ACTJv20 timing)
+                self.hardware.signal_busy_to_firmware()
+                self._schedule(BUSY_BEFORE_RESPONSE_S, self._send_response, response)
 
-            self.serial_port.write(response.encode('ascii'))
-            if hasattr(self.serial_port, "flush"):
-                try:
-                    self.serial_port.flush()
-                except Exception:  # pragma: no cover - serial flush not critical
-                    pass
-            self.logger.info(f"Sent response to ACTJv20: {response}")
+            return status, mould
 
-            # ALL responses need proper GPIO pulse sequence for mechanism plate movement
-            time.sleep(0.15)  # Wait for firmware to process the UART response
+        except Exception as e:
+            self.logger.error(f"Error processing QR input: {e}")
+            with self._state_lock:
+                self._fail_cycle()
+            return None, None
 
-            if response == 'A':
-                # Accept: Standard pulse sequence for mechanism plate
-                self.hardware.signal_accept_pulse()
-                self.logger.info("Sent ACCEPT GPIO pulse sequence for mechanism plate")
+    def _send_response(self, response: str) -> None:
+        if not self.serial_port:
+            raise RuntimeError("UART port is not connected")
 
-            elif response == 'R':
-                # Reject: Extended pulse sequence for rejection path
-                self.hardware.signal_rejection_pulse()  # Special rejection pulse sequence
-                self.logger.info("Sent REJECT GPIO pulse sequence for mechanism plate")
+        self.serial_port.write(response.encode('ascii'))
+        if hasattr(self.serial_port, "flush"):
+            try:
+                self.serial_port.flush()
+            except Exception:  # pragma: no cover - serial flush not critical
+                pass
+        self.logger.info(f"Sent response to ACTJv20: {response}")
 
-            else:
-                # Scanner error: Basic ready signal
-                self.hardware.signal_ready_to_firmware()
-                self.logger.info("Sent ERROR GPIO signal")
+        # ALL responses need proper GPIO pulse sequence for mechanism plate movement
+        self._transition(ScanState.PULSING)
+        self._schedule(RESPONSE_SETTLE_S, self._pulse_ready, response)
 
-            # Final ready state after pulse sequence
-            time.sleep(0.1)  # Allow mechanism to move
+    def _pulse_ready(self, response: str) -> None:
+        if response in PULSE_PHASES:
+            # The signal_accept_pulse/signal_rejection_pulse phases, with the
+            # sleeps replaced by scheduled steps
+            self._pulse_phase(response, 0)
+        else:
+            # Scanner error: Basic ready signal
             self.hardware.signal_ready_to_firmware()
+            self.logger.info("Sent ERROR GPIO signal")
+            self._schedule(FINAL_READY_S, self._finish_cycle)
+
+    def _pulse_phase(self, response: str, index: int) -> None:
+        phases = PULSE_PHASES[response]
+        state, hold = phases[index]
+        self.hardware.signal_pulse_phase(state)
+        if index + 1 < len(phases):
+            self._schedule(hold, self._pulse_phase, response, index + 1)
+            return
+        if response == 'A':
+            self.logger.info("Sent ACCEPT GPIO pulse sequence for mechanism plate")
+        else:
+            self.logger.info("Sent REJECT GPIO pulse sequence for mechanism plate")
+        self._schedule(FINAL_READY_S, self._finish_cycle)
 
-            # Clear the waiting flag
-            self._waiting_for_qr = False
-
-            return status, mould
-
-        except Exception as e:
-            self.logger.error(f"Error processing QR input: {e}")
-            try:
-                if self.serial_port:
-                    self.serial_port.write(b'S')  # Scanner error
-                self._waiting_for_qr = False
-            except:
-                pass
-            return None, None
+    def _finish_cycle(self) -> None:
+        # Final ready state after pulse sequence
+        self.hardware.signal_ready_to_firmware()
+        self._transition(ScanState.IDLE)
+        self.logger.info("ACTJv20 scan complete - signaling READY")
 
     def _handle_stop_command(self):
         """Handle stop command from ACTJv20."""
         self.logger.info("ACTJv20 stop command - setting ready state")
-        self.hardware.signal_ready_to_firmware()
+        with self._state_lock:
+            if self._state is ScanState.AWAITING_QR:
+                self.logger.info("ACTJv20 stop received while awaiting QR - abandoning scan")
+                self._cancel_timeout()
+                self._cycle += 1
+                self._transition(ScanState.IDLE)
+            self.hardware.signal_ready_to_firmware()
 
     def set_scan_request_callback(self, callback):
         """Register callback invoked when firmware requests a scan."""
@@ -289,7 +384,7 @@ class ACTJv20UARTProtocol:
     @property
     def is_waiting_for_qr(self) -> bool:
         """Expose whether the protocol is currently waiting for QR input."""
-        return self._waiting_for_qr
+        return self._state is ScanState.AWAITING_QR
 
     @staticmethod
     def _map_status_to_response(status: Optional[str]) -> str:
@@ -0,0 +1,135 @@
+"""Asynchronous LED and buzzer actuation for the scanning jig.
+
+Light and buzzer patterns are executed by a single worker thread so that
+callers on the Tk main thread (scan validation) never sleep while a lamp is
+lit or the buzzer sounds.  Commands are coalesced per channel: a pattern that
+has not started yet is replaced by a newer one on the same channel, and a
+blink that is currently lit is cut short when a newer blink arrives.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional
+
+from hardware import BaseHardwareController
+
+LIGHT_CHANNEL = "light"
+BUZZER_CHANNEL = "buzzer"
+
+
+@dataclass
+class ActuatorCommand:
+    channel: str
+    duration: float
+    color: Optional[str] = None
+
+
+class ActuatorQueue:
+    """Command queue plus worker thread driving a hardware controller.
+
+    ``on_error`` is called on the worker thread with the exception of a
+    failed command.
+    """
+
+    def __init__(
+        self,
+        hardware: BaseHardwareController,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        self._hardware = hardware
+        self._on_error = on_error
+        self._logger = logging.getLogger("hardware.actuators")
+        self._pending: Deque[ActuatorCommand] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        self._closing = False
+
+    # ---------------- Public API ----------------
+    def blink(self, color: str, duration: float = 0.3) -> None:
+        """Queue a light blink; returns immediately."""
+        self._submit(ActuatorCommand(LIGHT_CHANNEL, duration, color))
+
+    def buzz(self, duration: float = 0.5) -> None:
+        """Queue a buzzer pulse; returns immediately."""
+        self._submit(ActuatorCommand(BUZZER_CHANNEL, duration))
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued pattern has finished (tests/shutdown)."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._busy, timeout=timeout
+            )
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the worker after the queued patterns have been played."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    # ---------------- Internals ----------------
+    def _submit(self, command: ActuatorCommand) -> None:
+        with self._cond:
+            if self._closing:
+                return
+            for index, queued in enumerate(self._pending):
+                if queued.channel == command.channel:
+                    # Coalesce: the newest verdict wins over a stale pattern
+                    self._pending[index] = command
+                    break
+            else:
+                self._pending.append(command)
+            self._ensure_worker()
+            self._cond.notify_all()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="actuators", daemon=True
+            )
+            self._thread.start()
+
+    def _has_pending(self, channel: str) -> bool:
+        return any(command.channel == channel for command in self._pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending:
+                    return
+                command = self._pending.popleft()
+                self._busy = True
+            try:
+                if command.channel == LIGHT_CHANNEL:
+                    self._run_blink(command)
+                else:
+                    self._hardware.buzz(command.duration)
+            except Exception as exc:
+                if self._on_error:
+                    self._on_error(exc)
+                else:
+                    self._logger.exception("Actuator command failed")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _run_blink(self, command: ActuatorCommand) -> None:
+        self._hardware.light_on(command.color)
+        try:
+            with self._cond:
+                # A newer blink pre-empts the lamp currently lit
+                self._cond.wait_for(
+                    lambda: self._closing or self._has_pending(LIGHT_CHANNEL),
+                    timeout=command.duration,
+                )
+        finally:
+            self._hardware.light_off(command.color)
@@ -0,0 +1,421 @@
+"""Columnar archive format for closed batch CSV logs.
+
+A finished batch CSV is rewritten as one ``.bca`` file holding each field as
+its own zlib-compressed column:
+
+* ``time``: seconds since 1970-01-01 (naive local time), zigzag-delta
+  varints, so a steady scan cadence costs about one byte per row;
+* ``batch``, ``mould``, ``status``: dictionary-encoded (value table plus
+  varint codes);
+* ``qr_key`` / ``qr_serial``: cartridge QRs split by ``qr_codec.encode_qr``
+  into a dictionary of (line, mould, lot) keys and delta-encoded serials;
+  anything that is not a cartridge QR is kept verbatim in the key table;
+* ``raw``: the original fields of the few rows that the columns above would
+  not reproduce exactly (stray whitespace, lower-case status, extra fields,
+  unparseable timestamps).
+
+Columns are decoded independently, so ``BatchArchive`` can count scans per
+status or per hour from the ``time`` and ``status`` columns without touching
+the QRs, and ``rows()`` gives back the original CSV rows.  ``archive_batch``
+verifies the archive against the CSV before the source may be removed.  The
+command line skips the batch named in the recovery journal, which is paused
+rather than closed, and exits non-zero if any CSV could not be archived.
+
+Usage::
+
+    python3 batch_archive.py batch_logs --older-than-days 2 --delete-source
+    python3 batch_archive.py --extract batch_logs/B1.csv.bca > B1.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from batch_log import LOG_HEADER
+from config import LOG_FOLDER, RECOVERY_FILE
+from log_timestamps import DMY_LAYOUT, ISO_LAYOUT, TimestampDecoder, datetime_key, strptime_key
+from qr_codec import CartridgeCode, decode_qr, encode_qr
+from recovery_journal import active_batch
+
+ARCHIVE_SUFFIX = ".bca"
+# Journal of the batch in progress, where logic.py keeps it ([folders] in settings.ini)
+DEFAULT_RECOVERY_PATH = Path(__file__).resolve().parent / LOG_FOLDER / RECOVERY_FILE
+
+_MAGIC = b"QRBA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBBI")
+_COLUMN = struct.Struct("<BI")
+_LAYOUTS = (ISO_LAYOUT, DMY_LAYOUT)
+_EPOCH = datetime(1970, 1, 1)
+
+
+class ArchiveError(ValueError):
+    """The file is not a readable batch archive."""
+
+
+# ---------------- Varints ----------------
+def _encode_varints(values: Sequence[int]) -> bytes:
+    out = bytearray()
+    for value in values:
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _decode_varints(data: bytes, count: int) -> array:
+    values = array("q")
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    if len(values) != count:
+        raise ArchiveError(f"expected {count} values, decoded {len(values)}")
+    return values
+
+
+def _encode_deltas(values: Sequence[int]) -> bytes:
+    previous, zigzag = 0, []
+    for value in values:
+        delta = value - previous
+        zigzag.append(delta * 2 if delta >= 0 else -delta * 2 - 1)
+        previous = value
+    return _encode_varints(zigzag)
+
+
+def _decode_deltas(data: bytes, count: int) -> array:
+    values = _decode_varints(data, count)
+    total = 0
+    for index, value in enumerate(values):
+        total += (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        values[index] = total
+    return values
+
+
+def _encode_dictionary(values: Sequence) -> bytes:
+    table: Dict = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    names = [list(value) if isinstance(value, tuple) else value for value in table]
+    encoded = json.dumps(names, separators=(",", ":")).encode("utf-8")
+    return struct.pack("<I", len(encoded)) + encoded + _encode_varints(codes)
+
+
+def _decode_dictionary(data: bytes, count: int) -> Tuple[list, array]:
+    (length,) = struct.unpack_from("<I", data, 0)
+    values = json.loads(data[4:4 + length].decode("utf-8"))
+    return values, _decode_varints(data[4 + length:], count)
+
+
+# ---------------- Timestamps ----------------
+def _key_seconds(key: int) -> int:
+    stamp = datetime(
+        key // 10_000_000_000,
+        key // 100_000_000 % 100,
+        key // 1_000_000 % 100,
+        key // 10_000 % 100,
+        key // 100 % 100,
+        key % 100,
+    )
+    return (stamp - _EPOCH) // timedelta(seconds=1)
+
+
+def _format_timestamp(key: int, layout: str) -> str:
+    text = f"{key:014d}"
+    clock = f"{text[8:10]}:{text[10:12]}:{text[12:14]}"
+    if layout == DMY_LAYOUT:
+        return f"{text[6:8]}/{text[4:6]}/{text[0:4]} {clock}"
+    return f"{text[0:4]}-{text[4:6]}-{text[6:8]} {clock}"
+
+
+def _normalise(row: List[str]) -> List[str]:
+    fields = [cell.strip() for cell in row[:5]] + [""] * (5 - len(row))
+    fields[3] = fields[3].upper()
+    fields[4] = fields[4].upper()
+    return fields
+
+
+# ---------------- Writing ----------------
+def encode_rows(rows: Sequence[List[str]], has_header: bool = True) -> bytes:
+    """Archive bytes for the data rows of one batch CSV."""
+    decoder = TimestampDecoder()
+    seconds: List[int] = []
+    batches, moulds, statuses, qr_keys, serials = [], [], [], [], []
+    raw: Dict[str, List[str]] = {}
+    last_second = 0
+    for index, row in enumerate(rows):
+        fields = _normalise(row)
+        key = decoder.key(fields[0])
+        if key is not None:
+            last_second = _key_seconds(key)
+        seconds.append(last_second)
+        code = encode_qr(fields[3])
+        if code is None:
+            qr_keys.append(fields[3])
+            serials.append(0)
+        else:
+            qr_keys.append(code.key)
+            serials.append(code.serial)
+        batches.append(fields[1])
+        moulds.append(fields[2])
+        statuses.append(fields[4])
+        if key is None or row != fields or _format_timestamp(key, decoder.layout or ISO_LAYOUT) != fields[0]:
+            raw[str(index)] = list(row)
+    columns = {
+        "time": _encode_deltas(seconds),
+        "batch": _encode_dictionary(batches),
+        "mould": _encode_dictionary(moulds),
+        "status": _encode_dictionary(statuses),
+        "qr_key": _encode_dictionary(qr_keys),
+        "qr_serial": _encode_deltas(serials),
+        "raw": json.dumps(raw, separators=(",", ":")).encode("utf-8"),
+    }
+    layout = _LAYOUTS.index(decoder.layout) if decoder.layout in _LAYOUTS else 0
+    parts = [_HEADER.pack(_MAGIC, _VERSION, layout, int(has_header), len(rows))]
+    for name, payload in columns.items():
+        packed = zlib.compress(payload, 9)
+        label = name.encode("ascii")
+        parts.append(_COLUMN.pack(len(label), len(packed)) + label + packed)
+    return b"".join(parts)
+
+
+def _read_csv(path: Path) -> Tuple[List[List[str]], bool]:
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        rows = [row for row in csv.reader(handle) if row]
+    has_header = bool(rows) and [cell.strip() for cell in rows[0]] == LOG_HEADER
+    return (rows[1:] if has_header else rows), has_header
+
+
+def archive_path(csv_path: Path | str) -> Path:
+    path = Path(csv_path)
+    return path.with_name(path.name + ARCHIVE_SUFFIX)
+
+
+def archive_batch(csv_path: Path | str, remove_source: bool = False) -> Path:
+    """Write ``<name>.csv.bca`` next to ``csv_path`` and return its path.
+
+    The archive is read back and compared with the CSV rows before it
+    replaces any previous archive; only then is the CSV removed (if asked).
+    A CSV that is not valid UTF-8 raises ``UnicodeDecodeError`` and is left
+    alone, since its rows could not be reproduced byte for byte.
+    The archive keeps the CSV's modification time.
+    """
+    source = Path(csv_path)
+    rows, has_header = _read_csv(source)
+    target = archive_path(source)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", dir=target.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(encode_rows(rows, has_header))
+            handle.flush()
+            os.fsync(handle.fileno())
+        if list(BatchArchive(tmp_name).rows()) != rows:
+            raise ArchiveError(f"archive of {source} does not reproduce its rows")
+        stats = source.stat()
+        os.utime(tmp_name, (stats.st_atime, stats.st_mtime))
+        os.replace(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    if remove_source:
+        source.unlink()
+    return target
+
+
+# ---------------- Reading ----------------
+class BatchArchive:
+    """Column-wise reader of a ``.bca`` batch archive."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        try:
+            data = self.path.read_bytes()
+            magic, version, layout, has_header, count = _HEADER.unpack_from(data, 0)
+        except struct.error as exc:
+            raise ArchiveError(f"{self.path}: truncated archive") from exc
+        if magic != _MAGIC or version != _VERSION or layout >= len(_LAYOUTS):
+            raise ArchiveError(f"{self.path}: not a batch archive")
+        self.layout = _LAYOUTS[layout]
+        self.has_header = bool(has_header)
+        self.row_count = count
+        self._columns: Dict[str, bytes] = {}
+        offset = _HEADER.size
+        try:
+            while offset < len(data):
+                name_len, length = _COLUMN.unpack_from(data, offset)
+                offset += _COLUMN.size
+                name = data[offset:offset + name_len].decode("ascii")
+                offset += name_len
+                self._columns[name] = data[offset:offset + length]
+                offset += length
+        except (struct.error, UnicodeDecodeError) as exc:
+            raise ArchiveError(f"{self.path}: corrupt column table") from exc
+        self._raw: Optional[Dict[int, List[str]]] = None
+
+    def _column(self, name: str) -> bytes:
+        try:
+            return zlib.decompress(self._columns[name])
+        except (KeyError, zlib.error) as exc:
+            raise ArchiveError(f"{self.path}: bad column {name!r}") from exc
+
+    @property
+    def raw_rows(self) -> Dict[int, List[str]]:
+        """Original fields of the rows stored verbatim, by row number."""
+        if self._raw is None:
+            self._raw = {int(row): fields for row, fields in json.loads(self._column("raw")).items()}
+        return self._raw
+
+    def seconds(self) -> array:
+        """Scan time of every row as seconds since 1970-01-01 (local time)."""
+        return _decode_deltas(self._column("time"), self.row_count)
+
+    def untimed_rows(self) -> List[int]:
+        """Rows whose timestamp could not be parsed (their ``seconds`` repeat the previous row)."""
+        return [row for row, fields in self.raw_rows.items() if strptime_key(fields[0].strip()) is None]
+
+    def keys(self) -> List[Optional[int]]:
+        """Integer ``YYYYMMDDHHMMSS`` timestamp keys (see ``log_timestamps``), None if unparseable."""
+        hour_bases: Dict[int, int] = {}
+        keys: List[Optional[int]] = []
+        for value in self.seconds():
+            hour, rest = divmod(value, 3600)
+            base = hour_bases.get(hour)
+            if base is None:
+                base = hour_bases[hour] = datetime_key(_EPOCH + timedelta(hours=hour))
+            keys.append(base + rest // 60 * 100 + rest % 60)
+        for row in self.untimed_rows():
+            keys[row] = None
+        return keys
+
+    def dictionary(self, name: str) -> Tuple[list, array]:
+        """``(values, codes)`` of a dictionary column (batch, mould, status, qr_key)."""
+        return _decode_dictionary(self._column(name), self.row_count)
+
+    def column(self, name: str) -> List[str]:
+        values, codes = self.dictionary(name)
+        return [values[code] for code in codes]
+
+    def qr_codes(self) -> List[str]:
+        keys, codes = self.dictionary("qr_key")
+        serials = _decode_deltas(self._column("qr_serial"), self.row_count)
+        out = []
+        for code, serial in zip(codes, serials):
+            key = keys[code]
+            out.append(key if isinstance(key, str) else decode_qr(CartridgeCode(*key, serial)))
+        return out
+
+    def status_counts(self) -> Dict[str, int]:
+        values, codes = self.dictionary("status")
+        counts = [0] * len(values)
+        for code in codes:
+            counts[code] += 1
+        return dict(zip(values, counts))
+
+    def bucket_counts(self, bucket_seconds: int = 3600) -> Dict[int, Dict[str, int]]:
+        """Scans per status in each ``bucket_seconds`` window, keyed by window start.
+
+        Uses only the ``time`` and ``status`` columns; untimed rows are skipped.
+        """
+        values, codes = self.dictionary("status")
+        untimed = set(self.untimed_rows())
+        buckets: Dict[int, List[int]] = defaultdict(lambda: [0] * len(values))
+        for row, (second, code) in enumerate(zip(self.seconds(), codes)):
+            if row not in untimed:
+                buckets[second - second % bucket_seconds][code] += 1
+        return {start: dict(zip(values, counts)) for start, counts in sorted(buckets.items())}
+
+    def rows(self) -> Iterator[List[str]]:
+        """The original CSV data rows, in order."""
+        keys = self.keys()
+        batches, moulds, statuses = self.column("batch"), self.column("mould"), self.column("status")
+        qr_codes = self.qr_codes()
+        raw = self.raw_rows
+        for index in range(self.row_count):
+            if index in raw:
+                yield raw[index]
+                continue
+            yield [
+                _format_timestamp(keys[index], self.layout),
+                batches[index],
+                moulds[index],
+                qr_codes[index],
+                statuses[index],
+            ]
+
+    def write_csv(self, handle) -> None:
+        writer = csv.writer(handle)
+        if self.has_header:
+            writer.writerow(LOG_HEADER)
+        writer.writerows(self.rows())
+
+
+def _archive_folder(
+    folder: Path, older_than_days: float, remove_source: bool, recovery_file: Optional[Path] = None
+) -> Tuple[int, int]:
+    """Archive idle CSVs in ``folder``; returns ``(archived, failed)``.
+
+    The batch named in the recovery journal is skipped however long it has
+    been idle: it is paused, not closed, and resuming appends to its CSV.
+    """
+    cutoff = time.time() - older_than_days * 86400
+    active = active_batch(str(recovery_file or DEFAULT_RECOVERY_PATH))
+    archived = failed = 0
+    for path in sorted(folder.glob("*.csv")):
+        if active is not None and path.name == f"{active}.csv":
+            print(f"skipped {path.name}: batch in progress (recovery journal)", file=sys.stderr)
+            continue
+        try:
+            stats = path.stat()
+            if stats.st_mtime > cutoff:
+                continue
+            target = archive_batch(path, remove_source=remove_source)
+        except (OSError, ArchiveError, UnicodeDecodeError) as exc:
+            print(f"skipped {path.name}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"{path.name} -> {target.name} ({stats.st_size} -> {target.stat().st_size} bytes)")
+        archived += 1
+    return archived, failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Archive closed batch CSV logs into columnar .bca files.")
+    parser.add_argument("folder", nargs="?", help="folder of batch CSVs to archive")
+    parser.add_argument("--older-than-days", type=float, default=2.0, help="only archive CSVs idle this long")
+    parser.add_argument("--delete-source", action="store_true", help="remove each CSV once its archive is verified")
+    parser.add_argument("--extract", metavar="ARCHIVE", help="write the CSV of an archive to stdout")
+    parser.add_argument(
+        "--recovery-file",
+        metavar="JOURNAL",
+        help=f"recovery journal naming the batch in progress (default: {DEFAULT_RECOVERY_PATH})",
+    )
+    args = parser.parse_args(argv)
+    if args.extract:
+        BatchArchive(args.extract).write_csv(sys.stdout)
+        return 0
+    if not args.folder:
+        parser.error("folder is required unless --extract is given")
+    recovery_file = Path(args.recovery_file) if args.recovery_file else None
+    _, failed = _archive_folder(Path(args.folder), args.older_than_days, args.delete_source, recovery_file)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Buffered batch CSV logging on a background thread."""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+LOG_HEADER = ["Timestamp", "BatchNumber", "Mould", "QRCode", "Status"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_CLOSE = object()
+
+
+class BatchLogWriter:
+    """Own a batch CSV file and write its rows off the caller's thread.
+
+    Rows are written in submission order.  The durability policy decides when
+    buffered rows reach the OS: after ``flush_every_rows`` rows, after
+    ``flush_interval_ms`` milliseconds, on ``drain()``, and on ``close()``,
+    which also fsyncs the file when ``fsync_on_close`` is set (batch end).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        flush_every_rows: int = 16,
+        flush_interval_ms: int = 250,
+        fsync_on_close: bool = True,
+    ) -> None:
+        self.path = path
+        needs_header = not append or not os.path.exists(path)
+        self._file = open(path, mode="a" if append else "w", newline="")
+        self._writer = csv.writer(self._file)
+        if needs_header:
+            self._writer.writerow(LOG_HEADER)
+            self._file.flush()
+        self._flush_every_rows = max(1, flush_every_rows)
+        self._flush_interval = max(0, flush_interval_ms) / 1000.0
+        self._fsync_on_close = fsync_on_close
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._logger = logging.getLogger("batch_log")
+        self._last_second: Optional[int] = None
+        self._last_stamp = ""
+        self._thread = threading.Thread(target=self._run, name="batch-log", daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, batch_number: str, mould: Optional[str], qr_code: str, status: str) -> None:
+        """Queue one scan row; the timestamp is taken now, formatted later."""
+        if self._closed:
+            raise ValueError(f"Batch log {self.path} is closed")
+        self._queue.put((time.time(), batch_number, mould or "UNKNOWN", qr_code, status))
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row queued so far is written and flushed."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Write remaining rows in order, flush/fsync and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    # ---------------- Worker ----------------
+    def _format_timestamp(self, stamp: float) -> str:
+        second = int(stamp)
+        if second != self._last_second:
+            self._last_second = second
+            self._last_stamp = time.strftime(TIMESTAMP_FORMAT, time.localtime(second))
+        return self._last_stamp
+
+    def _flush(self, sync: bool = False) -> None:
+        try:
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+        except OSError:
+            self._logger.exception("Failed to flush batch log %s", self.path)
+
+    def _run(self) -> None:
+        unflushed = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _CLOSE or isinstance(item, threading.Event):
+                if unflushed:
+                    self._flush()
+                    unflushed, deadline = 0, None
+                if item is _CLOSE:
+                    self._flush(sync=self._fsync_on_close)
+                    self._file.close()
+                    return
+                if item is not None:
+                    item.set()
+                continue
+
+            stamp, batch_number, mould, qr_code, status = item
+            try:
+                self._writer.writerow([self._format_timestamp(stamp), batch_number, mould, qr_code, status])
+            except (OSError, csv.Error):
+                self._logger.exception("Failed to write batch log row for %s", qr_code)
+                continue
+            unflushed += 1
+            if unflushed >= self._flush_every_rows or self._flush_interval == 0:
+                self._flush()
+                unflushed, deadline = 0, None
+            elif deadline is None:
+                deadline = time.monotonic() + self._flush_interval
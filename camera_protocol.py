@@ -0,0 +1,139 @@
+"""Incremental framing of the serial QR camera's trigger responses.
+
+After the trigger command the camera answers with a 7-byte header.
+``02 00 00 01 00 33 31`` means a code was decoded and is followed by the code
+text up to a line terminator (at most ``max_payload`` bytes).  Any other
+``02 00 00 ..`` header is a no-read, after which the camera is ready for the
+next trigger.  ``CameraFrameParser`` consumes whatever bytes the port has
+delivered, so the reader never blocks on a fixed-size ``read`` and can
+re-trigger as soon as a frame completes.
+
+In continuous mode the camera keeps sensing between scan requests and every
+decode is stamped with its monotonic receive time and parked in a
+``DecodeSlot``; a request made shortly afterwards is answered from the slot
+without waiting for another exposure.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import List, NamedTuple, Optional
+
+TRIGGER_COMMAND = bytes([0x7E, 0x00, 0x08, 0x01, 0x00, 0x02, 0x01, 0xAB, 0xCD, 0x00])
+SUCCESS_HEADER = bytes([0x02, 0x00, 0x00, 0x01, 0x00, 0x33, 0x31])
+HEADER_LENGTH = len(SUCCESS_HEADER)
+MAX_PAYLOAD = 50
+MIN_QR_LENGTH = 10
+
+DECODE = "decode"
+NO_READ = "no_read"
+
+
+class CameraFrame(NamedTuple):
+    kind: str
+    data: bytes
+
+    @property
+    def text(self) -> str:
+        return self.data.decode("utf-8", errors="ignore").strip()
+
+
+class CameraFrameParser:
+    """Split a stream of camera bytes into decode / no-read frames."""
+
+    def __init__(self, max_payload: int = MAX_PAYLOAD) -> None:
+        self.max_payload = max_payload
+        self._buffer = bytearray()
+        self.discarded = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        self._buffer.clear()
+
+    def feed(self, data: bytes) -> List[CameraFrame]:
+        """Append ``data`` and return the frames it completes."""
+        self._buffer += data
+        frames: List[CameraFrame] = []
+        buffer = self._buffer
+        while buffer:
+            start = buffer.find(0x02)
+            if start < 0:
+                self.discarded += len(buffer)
+                buffer.clear()
+                break
+            if start:
+                self.discarded += start
+                del buffer[:start]
+            if len(buffer) < 3 or (len(buffer) < HEADER_LENGTH and buffer[1:3] == b"\x00\x00"):
+                break  # header still arriving
+            if buffer[1:3] != b"\x00\x00":
+                self.discarded += 1
+                del buffer[:1]
+                continue
+            if buffer[:HEADER_LENGTH] != SUCCESS_HEADER:
+                frames.append(CameraFrame(NO_READ, bytes(buffer[:HEADER_LENGTH])))
+                del buffer[:HEADER_LENGTH]
+                continue
+            body = buffer[HEADER_LENGTH:HEADER_LENGTH + self.max_payload]
+            end = body.find(b"\n")
+            if end < 0 and len(body) < self.max_payload:
+                break  # payload still arriving
+            length = end + 1 if end >= 0 else self.max_payload
+            frames.append(CameraFrame(DECODE, bytes(body[:length])))
+            del buffer[:HEADER_LENGTH + length]
+        return frames
+
+    def expire(self) -> List[CameraFrame]:
+        """Frames from a response that stopped arriving (no terminator).
+
+        A decode header with a partial payload is returned as a decode, like
+        ``readline`` returning on its timeout; anything else is dropped.
+        """
+        frames: List[CameraFrame] = []
+        if self._buffer[:HEADER_LENGTH] == SUCCESS_HEADER:
+            frames.append(CameraFrame(DECODE, bytes(self._buffer[HEADER_LENGTH:])))
+        else:
+            self.discarded += len(self._buffer)
+        self._buffer.clear()
+        return frames
+
+
+class TimestampedDecode(NamedTuple):
+    text: str
+    received_at: float  # time.monotonic() when the frame completed
+
+
+class DecodeSlot:
+    """Single-entry holder for the newest decode, valid for ``ttl_s`` seconds."""
+
+    def __init__(self, ttl_s: float) -> None:
+        self.ttl_s = ttl_s
+        self._decode: Optional[TimestampedDecode] = None
+        self._lock = threading.Lock()
+
+    def put(self, text: str, received_at: float) -> None:
+        with self._lock:
+            self._decode = TimestampedDecode(text, received_at)
+
+    def peek(self) -> Optional[TimestampedDecode]:
+        with self._lock:
+            return self._decode
+
+    def clear(self) -> None:
+        with self._lock:
+            self._decode = None
+
+    def take(self, now: float, not_before: float = float("-inf")) -> Optional[TimestampedDecode]:
+        """Remove and return the decode if it is fresh at ``now``.
+
+        A decode received before ``not_before`` or more than ``ttl_s`` ago is
+        dropped instead.
+        """
+        with self._lock:
+            decode, self._decode = self._decode, None
+        if decode is None or decode.received_at < not_before or now - decode.received_at > self.ttl_s:
+            return None
+        return decode
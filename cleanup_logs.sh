@@ -1,10 +1,29 @@
 #!/bin/bash
-# Remove old CSV logs to preserve space on the Raspberry Pi.
+# Archive closed batch logs and remove old logs to preserve space on the Raspberry Pi.
 
 set -euo pipefail
 
 RETENTION_DAYS=${RETENTION_DAYS:-14}
+ARCHIVE_AFTER_DAYS=${ARCHIVE_AFTER_DAYS:-2}
+ARCHIVE_RETENTION_DAYS=${ARCHIVE_RETENTION_DAYS:-365}
 PROJECT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
+# Closed batches become columnar .bca archives (the CSV is removed once verified).
+# The batch named in the recovery journal ([folders] in settings.ini) is in
+# progress and is left alone; settings.ini is read from the project folder.
+if [ -d "$PROJECT_DIR/batch_logs" ]; then
+    status=0
+    (cd "$PROJECT_DIR" && python3 batch_archive.py batch_logs \
+        --older-than-days "$ARCHIVE_AFTER_DAYS" --delete-source) || status=$?
+    if [ "$status" -ne 0 ]; then
+        # Keep going with the cleanup, but leave a trace of the failure
+        message="batch_archive.py failed with exit status $status; CSVs it skipped are kept"
+        echo "$message" >&2
+        logger -t cleanup_logs "$message" 2>/dev/null || true
+    fi
+fi
+
 find "$PROJECT_DIR/batch_logs" -type f -name "*.csv" -mtime +"$RETENTION_DAYS" -delete
+find "$PROJECT_DIR/batch_logs" -type f -name "*.csv.bca" -mtime +"$ARCHIVE_RETENTION_DAYS" -delete
 find "$PROJECT_DIR/Batch_Setup_Logs" -type f -name "*.csv" -mtime +"$RETENTION_DAYS" -delete
+find "$PROJECT_DIR/log_viewer_gzip" -type f -name "*.gz" -mtime +"$RETENTION_DAYS" -delete 2>/dev/null || true
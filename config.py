@@ -16,6 +16,13 @@ _DEFAULTS: Dict[str, Dict[str, Any]] = {
         "setup_log_folder": "Batch_Setup_Logs",
         "recovery_file": "recovery.json",
     },
+    "logging": {
+        # Batch CSV durability: rows are flushed after N rows or T ms,
+        # and fsynced when the batch log is closed
+        "flush_every_rows": "16",
+        "flush_interval_ms": "250",
+        "fsync_on_close": "true",
+    },
     "window": {
         "app_title": "AUTOMATIC CARTRIDGE SCANNING JIG",
         "window_width": "800",
@@ -76,6 +83,17 @@ _DEFAULTS: Dict[str, Dict[str, Any]] = {
         "port": "/dev/qrscanner",  # Serial port for camera (same as SCANNER project)
         "baudrate": "115200",
         "timeout": "5",
+        "retrigger_ms": "50",  # Minimum gap between camera triggers
+        "response_timeout_ms": "1000",  # Re-trigger a camera that stays silent this long
+        "continuous": "false",  # Keep sensing between scan requests
+        "result_ttl_ms": "300",  # Age limit for a continuous-mode decode answering a request
+    },
+    "hid_scanner": {
+        "enabled": "false",  # Read the USB barcode scanner's input device directly
+        "device": "auto",  # /dev/input/eventN, or auto: the by-id keyboard device selected by match
+        "match": "",  # auto: USB vendor:product (hex) or name substring; required
+        "grab": "true",  # Exclusive access to an explicit device (never in auto mode)
+        "max_gap_ms": "100",  # Drop a partial code when the next key is slower than this
     },
     "layout": {
         "entry_width": "18",
@@ -120,6 +138,9 @@ class AppConfig:
     log_folder: str
     setup_log_folder: str
     recovery_file: str
+    log_flush_every_rows: int
+    log_flush_interval_ms: int
+    log_fsync_on_close: bool
     app_title: str
     window_size: str
     fullscreen: bool
@@ -158,6 +179,15 @@ class AppConfig:
     camera_port: str
     camera_baudrate: int
     camera_timeout: int
+    camera_retrigger_ms: int
+    camera_response_timeout_ms: int
+    camera_continuous: bool
+    camera_result_ttl_ms: int
+    hid_scanner_enabled: bool
+    hid_scanner_device: str
+    hid_scanner_match: str
+    hid_scanner_grab: bool
+    hid_scanner_max_gap_ms: int
     lcd_enabled: bool
     lcd_type: str
     lcd_address: str
@@ -188,6 +218,9 @@ def load_config(config_path: str | Path = CONFIG_FILE) -> AppConfig:
         log_folder=parser.get("folders", "log_folder"),
         setup_log_folder=parser.get("folders", "setup_log_folder"),
         recovery_file=parser.get("folders", "recovery_file"),
+        log_flush_every_rows=parser.getint("logging", "flush_every_rows"),
+        log_flush_interval_ms=parser.getint("logging", "flush_interval_ms"),
+        log_fsync_on_close=parser.getboolean("logging", "fsync_on_close"),
         app_title=parser.get("window", "app_title"),
         window_size=window_size,
         fullscreen=parser.getboolean("window", "fullscreen"),
@@ -248,6 +281,15 @@ def load_config(config_path: str | Path = CONFIG_FILE) -> AppConfig:
         camera_port=parser.get("camera", "port", fallback="/dev/qrscanner"),
         camera_baudrate=parser.getint("camera", "baudrate", fallback=115200),
         camera_timeout=parser.getint("camera", "timeout", fallback=5),
+        camera_retrigger_ms=parser.getint("camera", "retrigger_ms", fallback=50),
+        camera_response_timeout_ms=parser.getint("camera", "response_timeout_ms", fallback=1000),
+        camera_continuous=parser.getboolean("camera", "continuous", fallback=False),
+        camera_result_ttl_ms=parser.getint("camera", "result_ttl_ms", fallback=300),
+        hid_scanner_enabled=parser.getboolean("hid_scanner", "enabled", fallback=False),
+        hid_scanner_device=parser.get("hid_scanner", "device", fallback="auto"),
+        hid_scanner_match=parser.get("hid_scanner", "match", fallback=""),
+        hid_scanner_grab=parser.getboolean("hid_scanner", "grab", fallback=True),
+        hid_scanner_max_gap_ms=parser.getint("hid_scanner", "max_gap_ms", fallback=100),
         lcd_enabled=parser.getboolean("lcd", "enabled"),
         lcd_type=parser.get("lcd", "type"),
         lcd_address=parser.get("lcd", "address"),
@@ -270,6 +312,9 @@ QR_WIDTH = CONFIG.qr_width
 LOG_FOLDER = CONFIG.log_folder
 SETUP_LOG_FOLDER = CONFIG.setup_log_folder
 RECOVERY_FILE = CONFIG.recovery_file
+LOG_FLUSH_EVERY_ROWS = CONFIG.log_flush_every_rows
+LOG_FLUSH_INTERVAL_MS = CONFIG.log_flush_interval_ms
+LOG_FSYNC_ON_CLOSE = CONFIG.log_fsync_on_close
 APP_TITLE = CONFIG.app_title
 WINDOW_SIZE = CONFIG.window_size
 FULLSCREEN = CONFIG.fullscreen
@@ -308,6 +353,15 @@ CAMERA_ENABLED = CONFIG.camera_enabled
 CAMERA_PORT = CONFIG.camera_port
 CAMERA_BAUDRATE = CONFIG.camera_baudrate
 CAMERA_TIMEOUT = CONFIG.camera_timeout
+CAMERA_RETRIGGER_MS = CONFIG.camera_retrigger_ms
+CAMERA_RESPONSE_TIMEOUT_MS = CONFIG.camera_response_timeout_ms
+CAMERA_CONTINUOUS = CONFIG.camera_continuous
+CAMERA_RESULT_TTL_MS = CONFIG.camera_result_ttl_ms
+HID_SCANNER_ENABLED = CONFIG.hid_scanner_enabled
+HID_SCANNER_DEVICE = CONFIG.hid_scanner_device
+HID_SCANNER_MATCH = CONFIG.hid_scanner_match
+HID_SCANNER_GRAB = CONFIG.hid_scanner_grab
+HID_SCANNER_MAX_GAP_MS = CONFIG.hid_scanner_max_gap_ms
 LCD_ENABLED = CONFIG.lcd_enabled
 LCD_TYPE = CONFIG.lcd_type
 LCD_ADDRESS = CONFIG.lcd_address
@@ -0,0 +1,37 @@
+"""Reduce chart series to a bounded number of points for the log viewer."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+RESOLUTIONS = ("minute", "hour", "day", "week")
+RESOLUTION_TITLES = {"minute": "Per-minute", "hour": "Hourly", "day": "Daily", "week": "Weekly"}
+
+
+def week_label(day_label: str) -> str:
+    """Monday (``YYYY-MM-DD``) of the ISO week containing ``day_label``."""
+    day = date.fromisoformat(day_label)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def aggregate_buckets(
+    labels: Sequence[str],
+    columns: Dict[str, Sequence[int]],
+    target: int,
+) -> Tuple[List[str], Dict[str, List[int]]]:
+    """Sum consecutive points into at most ``target`` fixed-size buckets.
+
+    The series are scan counts, so buckets are summed (totals are preserved)
+    and labelled with their first point.
+    """
+    count = len(labels)
+    if target <= 0 or count <= target:
+        return list(labels), {name: list(values) for name, values in columns.items()}
+    size = -(-count // target)
+    out_labels = [labels[start] for start in range(0, count, size)]
+    out_columns = {
+        name: [sum(values[start:start + size]) for start in range(0, count, size)]
+        for name, values in columns.items()
+    }
+    return out_labels, out_columns
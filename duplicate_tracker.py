@@ -1,11 +1,30 @@
-"""SQLite-backed duplicate tracking for scanned QR codes."""
+"""SQLite-backed duplicate tracking for scanned QR codes.
+
+Duplicate checks are answered from an in-memory set per batch.  Inserts are
+queued and written to SQLite by a background thread in group commits, so the
+scan path never waits on an fsync.  At most ``flush_interval`` seconds of
+scans are exposed to a crash; the set is rehydrated from SQLite on first use
+of a batch (or explicitly via ``preload``).
+
+When a ``qr_codec.BatchBitmap`` is attached to a batch, codes inside its
+mould ranges are checked and recorded as bit operations instead, and the
+bitmap is saved as a blob in the same group commit so a resume restores it
+without re-reading every scanned row.
+
+A group commit that fails (database locked, disk full) puts its rows back on
+the queue; the writer logs the error and retries after ``flush_interval``.
+"""
 
 from __future__ import annotations
 
+import logging
 import sqlite3
 import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+from qr_codec import BatchBitmap
 
 _DB_FILENAME = "scan_state.db"
 
@@ -13,7 +32,12 @@ _DB_FILENAME = "scan_state.db"
 class DuplicateTracker:
     """Persist scanned QR codes per batch using SQLite."""
 
-    def __init__(self, db_path: Optional[Path | str] = None) -> None:
+    def __init__(
+        self,
+        db_path: Optional[Path | str] = None,
+        flush_interval: float = 0.5,
+        group_size: int = 64,
+    ) -> None:
         path = Path(db_path or _DB_FILENAME)
         path.parent.mkdir(parents=True, exist_ok=True)
         self._conn = sqlite3.connect(path, check_same_thread=False)
@@ -28,30 +52,192 @@ class DuplicateTracker:
             )
             """
         )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS batch_bitmap (
+                batch TEXT PRIMARY KEY,
+                bitmap BLOB NOT NULL
+            )
+            """
+        )
         self._conn.commit()
+        # Lock order: _lock (database) before _cond (index + pending queue)
         self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._index: Dict[str, Set[str]] = {}
+        self._pending: List[Tuple[str, str]] = []
+        self._bitmaps: Dict[str, BatchBitmap] = {}
+        self._dirty_bitmaps: Set[str] = set()
+        self._pending_since = 0.0
+        self._flush_interval = flush_interval
+        self._group_size = max(1, group_size)
+        self._closing = False
+        self._logger = logging.getLogger("duplicate_tracker")
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="duplicate-writer", daemon=True
+        )
+        self._writer.start()
 
-    def already_scanned(self, batch: str, qr_code: str) -> bool:
+    def preload(self, batch: str) -> int:
+        """Rehydrate the in-memory index for ``batch``; returns its size."""
+        return len(self._batch_index(batch))
+
+    def attach_bitmap(self, batch: str, bitmap: BatchBitmap) -> bool:
+        """Use ``bitmap`` for ``batch``; returns True if restored from its blob.
+
+        Without a usable blob the bits are rehydrated from the scanned rows.
+        """
         with self._lock:
-            cur = self._conn.execute(
-                "SELECT 1 FROM scanned_qr WHERE batch = ? AND qr = ? LIMIT 1",
-                (batch, qr_code),
-            )
-            return cur.fetchone() is not None
+            row = self._conn.execute(
+                "SELECT bitmap FROM batch_bitmap WHERE batch = ?", (batch,)
+            ).fetchone()
+            restored = bool(row) and bitmap.load_blob(row[0])
+            if not restored:
+                bitmap.clear()
+                bitmap.mark_all(
+                    qr for (qr,) in self._conn.execute(
+                        "SELECT qr FROM scanned_qr WHERE batch = ?", (batch,)
+                    )
+                )
+            with self._cond:
+                bitmap.mark_all(qr for pending_batch, qr in self._pending if pending_batch == batch)
+                self._bitmaps[batch] = bitmap
+                if not restored:
+                    self._dirty_bitmaps.add(batch)
+        return restored
+
+    def already_scanned(self, batch: str, qr_code: str) -> bool:
+        bitmap = self._bitmaps.get(batch)
+        seen = bitmap.seen(qr_code) if bitmap is not None else None
+        if seen is not None:
+            return seen
+        return qr_code in self._batch_index(batch)
 
     def record_scan(self, batch: str, qr_code: str) -> None:
-        with self._lock:
-            self._conn.execute(
-                "INSERT OR IGNORE INTO scanned_qr (batch, qr) VALUES (?, ?)",
-                (batch, qr_code),
-            )
-            self._conn.commit()
+        bitmap = self._bitmaps.get(batch)
+        if bitmap is not None:
+            with self._cond:
+                marked = bitmap.mark(qr_code)
+                if marked:
+                    self._dirty_bitmaps.add(batch)
+                    self._enqueue(batch, qr_code)
+            if marked is not None:
+                return
+        index = self._batch_index(batch)
+        with self._cond:
+            if qr_code in index:
+                return
+            index.add(qr_code)
+            self._enqueue(batch, qr_code)
 
     def reset_batch(self, batch: str) -> None:
         with self._lock:
+            with self._cond:
+                self._pending = [item for item in self._pending if item[0] != batch]
+                self._index.pop(batch, None)
+                bitmap = self._bitmaps.pop(batch, None)
+                if bitmap is not None:
+                    bitmap.clear()
+                self._dirty_bitmaps.discard(batch)
             self._conn.execute("DELETE FROM scanned_qr WHERE batch = ?", (batch,))
+            self._conn.execute("DELETE FROM batch_bitmap WHERE batch = ?", (batch,))
             self._conn.commit()
 
+    def flush(self) -> None:
+        """Write every queued insert now (used on batch end and shutdown)."""
+        with self._lock:
+            self._write_pending()
+
     def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._writer.join(timeout=5.0)
         with self._lock:
+            try:
+                self._write_pending()
+            except sqlite3.Error as exc:
+                self._logger.error("Dropping %d queued scans on close: %s", len(self._pending), exc)
             self._conn.close()
+
+    # ---------------- Internals ----------------
+    def _enqueue(self, batch: str, qr_code: str) -> None:
+        # Caller holds _cond
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append((batch, qr_code))
+        self._cond.notify()
+
+    def _batch_index(self, batch: str) -> Set[str]:
+        with self._cond:
+            index = self._index.get(batch)
+            if index is not None:
+                return index
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT qr FROM scanned_qr WHERE batch = ?", (batch,)
+            ).fetchall()
+            with self._cond:
+                index = self._index.get(batch)
+                if index is None:
+                    index = {row[0] for row in rows}
+                    index.update(qr for pending_batch, qr in self._pending if pending_batch == batch)
+                    self._index[batch] = index
+                return index
+
+    def _write_pending(self) -> None:
+        # Caller holds _lock, so a reset_batch cannot interleave with the write
+        with self._cond:
+            rows, self._pending = self._pending, []
+            snapshots = [(batch, self._bitmaps[batch].snapshot()) for batch in self._dirty_bitmaps]
+            self._dirty_bitmaps.clear()
+        # Compress outside _cond so record_scan/already_scanned never wait on it
+        blobs = [(batch, snapshot.to_blob()) for batch, snapshot in snapshots]
+        if not rows and not blobs:
+            return
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scanned_qr (batch, qr) VALUES (?, ?)", rows
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO batch_bitmap (batch, bitmap) VALUES (?, ?)", blobs
+            )
+            self._conn.commit()
+        except sqlite3.Error:
+            try:
+                self._conn.rollback()
+            except sqlite3.Error:
+                pass
+            with self._cond:
+                if rows and not self._pending:
+                    self._pending_since = time.monotonic()
+                self._pending[:0] = rows
+                self._dirty_bitmaps.update(batch for batch, _ in blobs)
+            raise
+
+    def _group_ready(self) -> bool:
+        if self._closing or len(self._pending) >= self._group_size:
+            return True
+        return time.monotonic() - self._pending_since >= self._flush_interval
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closing and not self._pending:
+                    self._cond.wait()
+                while not self._group_ready():
+                    remaining = self._pending_since + self._flush_interval - time.monotonic()
+                    self._cond.wait(timeout=max(remaining, 0.0))
+                    if not self._pending:
+                        break
+                closing = self._closing
+            if closing:
+                return  # close() writes what is left
+            try:
+                with self._lock:
+                    self._write_pending()
+            except sqlite3.Error as exc:
+                self._logger.error("Group commit failed, will retry: %s", exc)
+                with self._cond:
+                    if not self._closing:
+                        self._cond.wait(timeout=self._flush_interval)
@@ -23,6 +23,13 @@ except (ImportError, RuntimeError):  # pragma: no cover - hardware optional
     GPIO = None
 
 
+# ACTJv20 mechanism plate pulses as (RASP_IN_PIC state, hold seconds) phases.
+# signal_accept_pulse/signal_rejection_pulse run them with sleeps; the UART
+# protocol schedules the same phases on its timer wheel.
+ACCEPT_PULSE_PHASES = (("ready", 0.1), ("busy", 0.05), ("ready", 0.0))  # shorter busy for accepts
+REJECT_PULSE_PHASES = (("ready", 0.1), ("busy", 0.1), ("ready", 0.0))
+
+
 class BaseHardwareController:
     """Interface for hardware operations."""
 
@@ -59,6 +66,13 @@ class BaseHardwareController:
         """Signal busy state to ACTJv20(RJSR) firmware (RASP_IN_PIC LOW)."""
         raise NotImplementedError
     
+    def signal_pulse_phase(self, state: str) -> None:
+        """Drive RASP_IN_PIC to one pulse phase state ("ready" or "busy")."""
+        if state == "ready":
+            self.signal_ready_to_firmware()
+        else:
+            self.signal_busy_to_firmware()
+
     def signal_rejection_pulse(self) -> None:  # pragma: no cover - interface
         """Send rejection pulse sequence to help ACTJv20 mechanism plate movement."""
         raise NotImplementedError
@@ -283,27 +297,23 @@ class GPIOHardwareController(BaseHardwareController):  # pragma: no cover - hard
         self.logger.debug("ACTJv20(RJSR) signaling BUSY to firmware")
         self.set_rasp_in_pic(False)
     
+    def _run_pulse(self, phases) -> None:
+        for state, hold in phases:
+            self.signal_pulse_phase(state)
+            if hold:
+                time.sleep(hold)
+
     def signal_rejection_pulse(self) -> None:
         """Send rejection pulse sequence to help ACTJv20 mechanism plate movement."""
         self.logger.debug("ACTJv20(RJSR) sending rejection GPIO pulse sequence")
-        import time
         # Extended pulse sequence to help mechanism plate movement when QR is rejected
-        self.signal_ready_to_firmware()  # Signal ready
-        time.sleep(0.1)  # Brief pulse
-        self.signal_busy_to_firmware()   # Back to busy  
-        time.sleep(0.1)
-        self.signal_ready_to_firmware()  # Final ready state
+        self._run_pulse(REJECT_PULSE_PHASES)
     
     def signal_accept_pulse(self) -> None:
         """Send accept pulse sequence to help ACTJv20 mechanism plate movement."""
         self.logger.debug("ACTJv20(RJSR) sending accept GPIO pulse sequence")
-        import time
         # Standard pulse sequence to help mechanism plate movement when QR is accepted
-        self.signal_ready_to_firmware()  # Signal ready
-        time.sleep(0.1)  # Brief pulse
-        self.signal_busy_to_firmware()   # Back to busy  
-        time.sleep(0.05)  # Shorter busy for accepts
-        self.signal_ready_to_firmware()  # Final ready state
+        self._run_pulse(ACCEPT_PULSE_PHASES)
     
     def initialize_actj_gpio(self) -> None:
         """Initialize GPIO specifically for ACTJv20 communication."""
@@ -0,0 +1,237 @@
+"""Direct evdev reader for USB HID (keyboard-wedge) barcode scanners.
+
+The scanner's ``/dev/input/event*`` node is read in a background thread, so
+scanned codes no longer depend on the Tk window having focus; an explicitly
+configured node can also be grabbed exclusively (``EVIOCGRAB``) so they never
+reach other applications.  ``find_scanner_device`` only returns a device that
+matches a configured USB id or name, never just the first keyboard.  Raw
+``input_event`` records are unpacked with ``struct`` (no python-evdev
+dependency), key presses are mapped to characters for a US layout with
+shift handling, and a code is complete at Enter/Tab.  A partial code whose
+next key arrives more than ``max_gap_s`` later (a human at a keyboard, a
+scan cut short) is dropped.  Any file of packed ``input_event`` records
+works as the device, which is how the reader is tested.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import glob
+import logging
+import os
+import re
+import select
+import struct
+import threading
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+# struct input_event { struct timeval time; __u16 type; __u16 code; __s32 value; }
+INPUT_EVENT = struct.Struct("llHHi")
+EV_KEY = 0x01
+KEY_RELEASE, KEY_PRESS, KEY_REPEAT = 0, 1, 2
+EVIOCGRAB = 0x40044590
+
+KEY_TAB = 15
+KEY_ENTER = 28
+KEY_LEFTSHIFT = 42
+KEY_RIGHTSHIFT = 54
+KEY_KPENTER = 96
+TERMINATORS = (KEY_ENTER, KEY_KPENTER, KEY_TAB)
+SHIFT_KEYS = (KEY_LEFTSHIFT, KEY_RIGHTSHIFT)
+
+_ROWS = (
+    (2, "1234567890-=", "!@#$%^&*()_+"),
+    (16, "qwertyuiop[]", "QWERTYUIOP{}"),
+    (30, "asdfghjkl;'`", 'ASDFGHJKL:"~'),
+    (43, "\\zxcvbnm,./", "|ZXCVBNM<>?"),
+)
+KEYMAP = {57: (" ", " ")}  # KEY_SPACE
+for _first, _plain, _shifted in _ROWS:
+    KEYMAP.update({_first + i: pair for i, pair in enumerate(zip(_plain, _shifted))})
+
+DEFAULT_DEVICE_GLOB = "/dev/input/by-id/*-event-kbd"
+SYS_INPUT_ROOT = "/sys/class/input"
+_USB_ID = re.compile(r"^([0-9a-f]{4}):([0-9a-f]{4})$")
+
+
+def _sys_attr(sys_root: str, node: str, *parts: str) -> str:
+    try:
+        with open(os.path.join(sys_root, node, "device", *parts)) as handle:
+            return handle.read().strip().lower()
+    except OSError:
+        return ""
+
+
+def find_scanner_device(
+    match: str, pattern: str = DEFAULT_DEVICE_GLOB, sys_root: str = SYS_INPUT_ROOT
+) -> Optional[str]:
+    """Event node of the keyboard-like input device identified by ``match``.
+
+    ``match`` is a USB ``vendor:product`` id in hex (``0c2e:0b61``) or a
+    case-insensitive substring of the device's by-id link or reported name.
+    Candidates are the devices matching ``pattern``; the first match in sorted
+    order wins.  An empty ``match`` finds nothing: the first keyboard is as
+    likely to be the operator's as the scanner.
+    """
+    match = match.strip().lower()
+    if not match:
+        return None
+    usb_id = _USB_ID.match(match)
+    for link in sorted(glob.glob(pattern)):
+        node = os.path.realpath(link)
+        name = os.path.basename(node)
+        if usb_id:
+            found = (_sys_attr(sys_root, name, "id", "vendor"), _sys_attr(sys_root, name, "id", "product"))
+            if found == usb_id.groups():
+                return node
+        elif match in os.path.basename(link).lower() or match in _sys_attr(sys_root, name, "name"):
+            return node
+    return None
+
+
+def iter_key_events(stream: BinaryIO) -> Iterator[Tuple[float, int, int]]:
+    """Yield ``(timestamp, keycode, value)`` for key events until end of stream."""
+    size = INPUT_EVENT.size
+    pending = b""
+    while True:
+        data = stream.read(size * 64)
+        if not data:
+            return
+        pending += data
+        usable = len(pending) - len(pending) % size
+        for sec, usec, ev_type, code, value in INPUT_EVENT.iter_unpack(pending[:usable]):
+            if ev_type == EV_KEY:
+                yield sec + usec / 1_000_000, code, value
+        pending = pending[usable:]
+
+
+class KeycodeDecoder:
+    """Turn key events into complete codes."""
+
+    def __init__(self, max_gap_s: float = 0.1, max_length: int = 128) -> None:
+        self.max_gap_s = max_gap_s
+        self.max_length = max_length
+        self.dropped = 0
+        self._chars: list = []
+        self._shift = 0
+        self._last_key_at: Optional[float] = None
+
+    def reset(self) -> None:
+        self._chars.clear()
+        self._last_key_at = None
+
+    def feed(self, timestamp: float, keycode: int, value: int) -> Optional[str]:
+        """Consume one key event; returns the code it completes, if any."""
+        if keycode in SHIFT_KEYS:
+            self._shift = max(0, self._shift + (1 if value == KEY_PRESS else -1 if value == KEY_RELEASE else 0))
+            return None
+        if value == KEY_RELEASE:
+            return None
+        if self._chars and self._last_key_at is not None and timestamp - self._last_key_at > self.max_gap_s:
+            self.dropped += 1
+            self._chars.clear()
+        self._last_key_at = timestamp
+        if keycode in TERMINATORS:
+            code = "".join(self._chars).strip()
+            self.reset()
+            return code or None
+        mapped = KEYMAP.get(keycode)
+        if mapped is None:
+            return None
+        if len(self._chars) >= self.max_length:
+            self.dropped += 1
+            self._chars.clear()
+        self._chars.append(mapped[1] if self._shift else mapped[0])
+        return None
+
+
+class HIDScannerReader:
+    """Background thread delivering complete codes from one input device."""
+
+    def __init__(
+        self,
+        device_path: str,
+        on_code: Callable[[str], None],
+        decoder: Optional[KeycodeDecoder] = None,
+        grab: bool = True,
+        poll_s: float = 0.2,
+    ) -> None:
+        self.device_path = device_path
+        self.on_code = on_code
+        self.decoder = decoder or KeycodeDecoder()
+        self.grab = grab
+        self.poll_s = poll_s
+        self.codes_read = 0
+        self._stream: Optional[BinaryIO] = None
+        self._grabbed = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._logger = logging.getLogger("hid_scanner")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Open (and grab) the device and start reading; raises ``OSError``."""
+        if self.running:
+            return
+        self._stream = open(self.device_path, "rb", buffering=0)
+        if self.grab:
+            try:
+                fcntl.ioctl(self._stream, EVIOCGRAB, 1)
+                self._grabbed = True
+            except OSError as exc:  # a plain file, or another reader holds the grab
+                self._logger.warning("Could not grab %s: %s", self.device_path, exc)
+        self._stop.clear()
+        self.decoder.reset()
+        self._thread = threading.Thread(target=self._run, name="hid-scanner", daemon=True)
+        self._thread.start()
+        self._logger.info("Reading barcode scanner %s", self.device_path)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        if self._stream is not None:
+            if self._grabbed:
+                try:
+                    fcntl.ioctl(self._stream, EVIOCGRAB, 0)
+                except OSError:
+                    pass
+                self._grabbed = False
+            self._stream.close()
+            self._stream = None
+
+    def _readable(self) -> Iterator[bytes]:
+        # Wake up every poll_s so stop() is honoured on an idle device
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._stream], [], [], self.poll_s)
+            if ready:
+                data = self._stream.read(INPUT_EVENT.size * 64)
+                if not data:
+                    return
+                yield data
+
+    def _run(self) -> None:
+        try:
+            for timestamp, keycode, value in iter_key_events(_ChunkStream(self._readable())):
+                code = self.decoder.feed(timestamp, keycode, value)
+                if code:
+                    self.codes_read += 1
+                    self.on_code(code)
+        except OSError as exc:  # device unplugged
+            if not self._stop.is_set():
+                self._logger.error("Barcode scanner %s lost: %s", self.device_path, exc)
+        except Exception:  # pragma: no cover - keep the UI alive
+            self._logger.exception("Barcode scanner reader failed")
+
+
+class _ChunkStream:
+    """File-like ``read`` over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+
+    def read(self, _size: int) -> bytes:
+        return next(self._chunks, b"")
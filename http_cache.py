@@ -0,0 +1,149 @@
+"""HTTP revalidation, byte ranges and gzip helpers for the log viewer.
+
+Kept free of Flask so the header logic can be tested on its own.  ETags are
+strong and built from a file signature ``(mtime, size)`` plus any request
+variant (query, encoding).  ``PrecompressedCache`` keeps ``.gz`` copies of
+batch CSVs that are no longer being written, named after their ETag so a
+rewritten batch never serves a stale copy.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+GZIP_LEVEL = 6
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    """The ``Range`` header does not overlap the file."""
+
+
+def etag_for(signature: Tuple[float, int], *variant: object) -> str:
+    """Quoted strong ETag of a ``(mtime, size)`` signature and request variant."""
+    mtime, size = signature
+    tag = f"{int(mtime * 1_000_000):x}-{size:x}"
+    if variant:
+        tag += f"-{zlib.crc32(repr(variant).encode('utf-8')):08x}"
+    return f'"{tag}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive ``(start, end)`` of a single ``bytes=`` range.
+
+    Returns None when the whole file should be sent (no header, a multi-range
+    or malformed request) and raises ``RangeNotSatisfiable`` when the range
+    starts past the end of the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable(header)
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def accepts_gzip(header: Optional[str]) -> bool:
+    """Whether an ``Accept-Encoding`` header allows gzip (q > 0)."""
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def file_chunks(path: Path, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+    """Read ``length`` bytes of ``path`` from ``start`` in chunks."""
+    with path.open("rb") as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            data = handle.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            yield data
+
+
+def gzip_chunks(chunks: Iterable[bytes | str], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """Gzip a streamed body without buffering it."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class PrecompressedCache:
+    """On-disk gzip copies of closed batch files, keyed by their ETag."""
+
+    def __init__(self, cache_dir: Path | str, level: int = GZIP_LEVEL) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.level = level
+        self._lock = threading.Lock()
+
+    def path_for(self, source: Path, etag: str) -> Path:
+        """Path of the ``.gz`` copy of ``source``, compressing it on first use."""
+        tag = etag.strip('"')
+        target = self.cache_dir / f"{source.name}.{tag}.gz"
+        if target.exists():
+            return target
+        with self._lock:
+            if target.exists():
+                return target
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{source.name}.", dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                    filename=source.name, mode="wb", fileobj=raw, compresslevel=self.level, mtime=0
+                ) as handle:
+                    for chunk in file_chunks(source):
+                        handle.write(chunk)
+                os.replace(tmp_name, target)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+            self._prune(source.name, keep=target)
+        return target
+
+    def _prune(self, name: str, keep: Path) -> None:
+        # Older copies of the same batch (the file was rewritten)
+        for stale in self.cache_dir.glob(f"{name}.*.gz"):
+            if stale != keep:
+                stale.unlink(missing_ok=True)
@@ -0,0 +1,123 @@
+"""Fixed-position decoder for batch log timestamps.
+
+Batch CSVs carry ``YYYY-MM-DD HH:MM:SS`` (``logic.write_log``) or, in legacy
+files, ``DD/MM/YYYY HH:MM:SS``.  ``TimestampDecoder`` detects the layout from
+the first value it sees and then decodes by slicing fixed positions into an
+integer key ``YYYYMMDDHHMMSS``, so the hour (``key // 10_000``) and day
+(``key // 1_000_000``) buckets are plain integer divisions.  The validated
+date/hour part is cached, which leaves two small ``int()`` calls per row.
+Values that do not fit the fixed layout (e.g. unpadded fields) fall back to
+``datetime.strptime`` with both formats, so results match the slow path.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S")
+ISO_LAYOUT = "iso"
+DMY_LAYOUT = "dmy"
+
+_HOUR_CACHE_LIMIT = 4096
+
+
+def detect_layout(value: str) -> Optional[str]:
+    if len(value) != 19 or value[10] != " " or value[13] != ":" or value[16] != ":":
+        return None
+    if value[4] == "-" and value[7] == "-":
+        return ISO_LAYOUT
+    if value[2] == "/" and value[5] == "/":
+        return DMY_LAYOUT
+    return None
+
+
+def strptime_key(value: str) -> Optional[int]:
+    """Reference path: integer key via ``datetime.strptime``."""
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            stamp = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return datetime_key(stamp)
+    return None
+
+
+def datetime_key(stamp: datetime) -> int:
+    return (
+        stamp.year * 10_000_000_000
+        + stamp.month * 100_000_000
+        + stamp.day * 1_000_000
+        + stamp.hour * 10_000
+        + stamp.minute * 100
+        + stamp.second
+    )
+
+
+def format_key(key: int) -> str:
+    """``YYYY-MM-DD HH:MM:SS`` text of an integer timestamp key."""
+    text = f"{key:014d}"
+    return f"{text[0:4]}-{text[4:6]}-{text[6:8]} {text[8:10]}:{text[10:12]}:{text[12:14]}"
+
+
+def format_hour_key(hour_key: int) -> str:
+    """``YYYY-MM-DD HH:00`` label of ``key // 10_000``."""
+    text = f"{hour_key:010d}"
+    return f"{text[0:4]}-{text[4:6]}-{text[6:8]} {text[8:10]}:00"
+
+
+def format_minute_key(minute_key: int) -> str:
+    """``YYYY-MM-DD HH:MM`` label of ``key // 100``."""
+    text = f"{minute_key:012d}"
+    return f"{text[0:4]}-{text[4:6]}-{text[6:8]} {text[8:10]}:{text[10:12]}"
+
+
+class TimestampDecoder:
+    """Decode the timestamps of one file into integer keys."""
+
+    __slots__ = ("layout", "_hours")
+
+    def __init__(self) -> None:
+        self.layout: Optional[str] = None
+        self._hours: Dict[str, Optional[int]] = {}
+
+    def key(self, value: str) -> Optional[int]:
+        if self.layout is None:
+            self.layout = detect_layout(value)
+            if self.layout is None:
+                return strptime_key(value)
+        if len(value) != 19 or value[13] != ":" or value[16] != ":":
+            return strptime_key(value)
+        prefix = value[:13]
+        base = self._hours.get(prefix, -1)
+        if base == -1:
+            base = self._hour_base(prefix)
+            if len(self._hours) >= _HOUR_CACHE_LIMIT:
+                self._hours.clear()
+            self._hours[prefix] = base
+        if base is None:
+            return strptime_key(value)
+        minute, second = value[14:16], value[17:19]
+        if not (minute.isdecimal() and second.isdecimal()):
+            return strptime_key(value)
+        minute_value, second_value = int(minute), int(second)
+        if minute_value > 59 or second_value > 59:
+            return strptime_key(value)
+        return base + minute_value * 100 + second_value
+
+    def _hour_base(self, prefix: str) -> Optional[int]:
+        if self.layout == ISO_LAYOUT:
+            if prefix[4] != "-" or prefix[7] != "-" or prefix[10] != " ":
+                return None
+            year, month, day, hour = prefix[0:4], prefix[5:7], prefix[8:10], prefix[11:13]
+        else:
+            if prefix[2] != "/" or prefix[5] != "/" or prefix[10] != " ":
+                return None
+            day, month, year, hour = prefix[0:2], prefix[3:5], prefix[6:10], prefix[11:13]
+        if not (year.isdecimal() and month.isdecimal() and day.isdecimal() and hour.isdecimal()):
+            return None
+        try:
+            stamp = datetime(int(year), int(month), int(day), int(hour))
+        except ValueError:
+            return None
+        return datetime_key(stamp)
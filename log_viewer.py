@@ -2,20 +2,44 @@
 
 from __future__ import annotations
 
-import copy
-import csv
+import atexit
+import gzip
+import io
 import json
 import os
+import queue
 import shutil
 import time
-from collections import defaultdict
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 from pathlib import Path
-from threading import Lock
-
-from flask import Flask, abort, render_template_string, request, send_from_directory
 
+from flask import (
+    Flask,
+    Response,
+    abort,
+    jsonify,
+    render_template_string,
+    request,
+    stream_with_context,
+)
+
+from batch_archive import ARCHIVE_SUFFIX, BatchArchive
 from config import HEADER_TEXT, FOOTER_TEXT, LOG_FOLDER
+from downsample import RESOLUTION_TITLES, RESOLUTIONS, aggregate_buckets
+from http_cache import (
+    PrecompressedCache,
+    RangeNotSatisfiable,
+    accepts_gzip,
+    etag_for,
+    etag_matches,
+    file_chunks,
+    gzip_chunks,
+    parse_range,
+)
+from log_watcher import LogTailWatcher
+from payload_cache import PayloadCache, to_json
+from scan_index import ScanSummaryIndex
 
 
 APP_ROOT = Path(__file__).resolve().parent
@@ -23,15 +47,35 @@ BATCH_LOG_DIR = APP_ROOT / LOG_FOLDER
 STATIC_DIR = APP_ROOT / "static"
 HEADER_LOGO_FILENAME = os.environ.get("LOG_VIEWER_LOGO", "molbio-black-logo.png")
 FAVICON_FILENAME = os.environ.get("LOG_VIEWER_FAVICON", "footer-logo.png")
+CACHE_BUDGET_BYTES = int(float(os.environ.get("LOG_VIEWER_CACHE_MB", "8")) * 1024 * 1024)
+SUMMARY_INDEX_PATH = Path(os.environ.get("LOG_VIEWER_INDEX_DB", APP_ROOT / "log_viewer_index.db"))
+GZIP_ENABLED = os.environ.get("LOG_VIEWER_GZIP", "1") == "1"
+GZIP_CACHE_DIR = Path(os.environ.get("LOG_VIEWER_GZIP_DIR", APP_ROOT / "log_viewer_gzip"))
 
 
 app = Flask(__name__)
 
-_CACHE_LOCK = Lock()
-_CACHE = {
-    "batch_stats": {},  # filename -> {"signature": sig, "data": {...}}
-    "daily_trends": {"signature": None, "data": None},
-}
+# Per-file/per-hour scan aggregates; only bytes appended since the last
+# request are parsed
+_SUMMARY_INDEX = ScanSummaryIndex(BATCH_LOG_DIR, SUMMARY_INDEX_PATH)
+
+# One tail watcher shared by every /stream client; stopped on shutdown
+_WATCHER = LogTailWatcher(BATCH_LOG_DIR)
+atexit.register(_WATCHER.stop)
+SSE_KEEPALIVE_SECONDS = 15
+
+# Chart series are summed into at most this many points (?points= overrides)
+CHART_POINTS = int(os.environ.get("LOG_VIEWER_CHART_POINTS", "240"))
+MAX_CHART_POINTS = 2000
+
+# Computed page payloads, frozen so hits are shared without copying
+_PAYLOAD_CACHE = PayloadCache(CACHE_BUDGET_BYTES)
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+# A batch CSV untouched for this long is closed: its gzip copy is kept on disk
+CLOSED_BATCH_SECONDS = int(os.environ.get("LOG_VIEWER_CLOSED_AFTER", "300"))
+_GZIP_CACHE = PrecompressedCache(GZIP_CACHE_DIR)
 
 
 def _logo_context() -> dict:
@@ -56,8 +100,15 @@ def _human_size(num_bytes: int) -> str:
 def _list_csv(directory: Path) -> list[dict]:
     if not directory.exists():
         return []
+    paths = list(directory.glob("*.csv"))
+    csv_names = {path.name for path in paths}
+    # Archived batches whose CSV was removed are listed under the archive name
+    paths += [
+        path for path in directory.glob(f"*.csv{ARCHIVE_SUFFIX}")
+        if path.name[:-len(ARCHIVE_SUFFIX)] not in csv_names
+    ]
     entries = []
-    for path in directory.glob("*.csv"):
+    for path in paths:
         try:
             stats = path.stat()
         except OSError:
@@ -76,27 +127,6 @@ def _list_csv(directory: Path) -> list[dict]:
     return sorted(entries, key=lambda item: item["mtime"], reverse=True)
 
 
-def _count_scans(files: list[dict]) -> tuple[int, int]:
-    total = 0
-    total_pass = 0
-    for entry in files:
-        path = BATCH_LOG_DIR / entry["name"]
-        try:
-            with path.open(newline="", encoding="utf-8") as handle:
-                reader = csv.reader(handle)
-                header = next(reader, None)
-                for row in reader:
-                    if not row:
-                        continue
-                    total += 1
-                    status = row[4].strip().upper() if len(row) > 4 else ""
-                    if status == "PASS":
-                        total_pass += 1
-        except (OSError, csv.Error):
-            continue
-    return total, total_pass
-
-
 def _file_signature(path: Path) -> tuple | None:
     try:
         stats = path.stat()
@@ -105,130 +135,112 @@ def _file_signature(path: Path) -> tuple | None:
         return None
 
 
-def _read_log_rows(path: Path) -> list[dict]:
-    rows: list[dict] = []
-    try:
-        with path.open(newline="", encoding="utf-8") as handle:
-            reader = csv.reader(handle)
-            header = next(reader, None)
-            expected = ["Timestamp", "BatchNumber", "Mould", "QRCode", "Status"]
-            header_is_present = header and [h.strip() for h in header] == expected
-            if not header_is_present and header:
-                # treat header as first row
-                rows.append({
-                    "timestamp": header[0].strip() if header else "",
-                    "batch": header[1].strip() if len(header) > 1 else "",
-                    "mould": header[2].strip() if len(header) > 2 else "",
-                    "qr": header[3].strip() if len(header) > 3 else "",
-                    "status": header[4].strip() if len(header) > 4 else "",
-                })
-            for row in reader:
-                if not row:
-                    continue
-                rows.append(
-                    {
-                        "timestamp": row[0].strip() if len(row) > 0 else "",
-                        "batch": row[1].strip() if len(row) > 1 else "",
-                        "mould": row[2].strip() if len(row) > 2 else "",
-                        "qr": row[3].strip() if len(row) > 3 else "",
-                        "status": row[4].strip().upper() if len(row) > 4 else "",
-                    }
-                )
-    except (OSError, csv.Error):
-        return []
-    return rows
-
-
-def _batch_stats(filename: str) -> dict:
+def _resolve_log(filename: str) -> Path:
     path = (BATCH_LOG_DIR / filename).resolve()
     if not path.exists() or path.parent != BATCH_LOG_DIR.resolve():
         abort(404)
+    return path
 
-    signature = _file_signature(path)
-    with _CACHE_LOCK:
-        cached = _CACHE["batch_stats"].get(filename)
-        if cached and cached["signature"] == signature:
-            return copy.deepcopy(cached["data"])
-
-    rows = _read_log_rows(path)
-    if not rows:
-        result = {
-            "filename": filename,
-            "total": 0,
-            "pass": 0,
-            "duplicate": 0,
-            "other": 0,
-            "first_time": None,
-            "last_time": None,
-            "timeline": [],
-            "chart_labels": [],
-            "chart_pass": [],
-            "chart_duplicate": [],
-            "chart_other": [],
-        }
-        with _CACHE_LOCK:
-            _CACHE["batch_stats"][filename] = {
-                "signature": signature,
-                "data": copy.deepcopy(result),
-            }
-        return result
-
-    total = len(rows)
-    pass_count = sum(1 for r in rows if r["status"] == "PASS")
-    duplicate_count = sum(1 for r in rows if r["status"] == "DUPLICATE")
-    other_count = total - pass_count - duplicate_count
-
-    def _parse_ts(ts: str) -> datetime | None:
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S"):
-            try:
-                return datetime.strptime(ts, fmt)
-            except ValueError:
-                continue
+
+def _wants_gzip() -> bool:
+    return GZIP_ENABLED and accepts_gzip(request.headers.get("Accept-Encoding"))
+
+
+def _not_modified(etag: str) -> Response | None:
+    if not etag_matches(request.headers.get("If-None-Match"), etag):
         return None
+    response = Response(status=304)
+    response.headers["ETag"] = etag
+    return response
+
+
+def _tagged(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.after_request
+def _compress_response(response: Response) -> Response:
+    """Gzip JSON bodies (including streamed ones) for clients that accept it."""
+    if (
+        response.mimetype != "application/json"
+        or response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or not _wants_gzip()
+    ):
+        return response
+    if response.is_streamed:
+        response.response = gzip_chunks(response.response)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < GZIP_MIN_BYTES:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    etag = response.headers.get("ETag")
+    if etag:
+        response.headers["ETag"] = etag[:-1] + '-gz"'
+    return response
+
+
+def _chart_options(default_resolution: str) -> tuple[str, int]:
+    resolution = request.args.get("resolution", default_resolution)
+    if resolution not in RESOLUTIONS:
+        resolution = default_resolution
+    try:
+        points = int(request.args.get("points", str(CHART_POINTS)))
+    except ValueError:
+        points = CHART_POINTS
+    return resolution, min(max(points, 10), MAX_CHART_POINTS)
 
-    timestamps = [t for r in rows if (t := _parse_ts(r["timestamp"]))]
-    first_time = min(timestamps).strftime("%Y-%m-%d %H:%M:%S") if timestamps else None
-    last_time = max(timestamps).strftime("%Y-%m-%d %H:%M:%S") if timestamps else None
 
-    timeline = defaultdict(lambda: {"PASS": 0, "DUPLICATE": 0, "OTHER": 0})
-    for r in rows:
-        ts = _parse_ts(r["timestamp"])
-        if not ts:
-            continue
-        bucket = ts.replace(minute=0, second=0, microsecond=0)
-        status = r["status"] if r["status"] in ("PASS", "DUPLICATE") else "OTHER"
-        timeline[bucket][status] += 1
-
-    chart_labels = []
-    chart_pass = []
-    chart_duplicate = []
-    chart_other = []
-    for bucket in sorted(timeline.keys()):
-        chart_labels.append(bucket.strftime("%Y-%m-%d %H:%M"))
-        chart_pass.append(timeline[bucket]["PASS"])
-        chart_duplicate.append(timeline[bucket]["DUPLICATE"])
-        chart_other.append(timeline[bucket]["OTHER"])
+def _requested_points(points: int) -> int | None:
+    """``points`` to carry into resolution links, if the request chose it."""
+    return points if "points" in request.args else None
 
-    return {
+
+def _batch_stats(filename: str, resolution: str = "hour", points: int = 0) -> Mapping:
+    path = _resolve_log(filename)
+    signature = _file_signature(path)
+    cache_key = ("batch_stats", filename, resolution, points)
+    cached = _PAYLOAD_CACHE.get(cache_key, signature)
+    if cached is not None:
+        return cached
+
+    _SUMMARY_INDEX.refresh_file(path.name)
+    summary = _SUMMARY_INDEX.file_summary(path.name) or {
+        "total": 0,
+        "pass": 0,
+        "duplicate": 0,
+        "other": 0,
+        "first_time": None,
+        "last_time": None,
+    }
+    series = _SUMMARY_INDEX.series(path.name, resolution)
+    chart_labels, chart = aggregate_buckets(
+        [label for label, _, _, _ in series],
+        {
+            "pass": [passed for _, passed, _, _ in series],
+            "duplicate": [duplicate for _, _, duplicate, _ in series],
+            "other": [other for _, _, _, other in series],
+        },
+        points,
+    )
+
+    result = {
         "filename": filename,
-        "total": total,
-        "pass": pass_count,
-        "duplicate": duplicate_count,
-        "other": other_count,
-        "first_time": first_time,
-        "last_time": last_time,
+        **summary,
+        "resolution": resolution,
         "chart_labels": chart_labels,
-        "chart_pass": chart_pass,
-        "chart_duplicate": chart_duplicate,
-        "chart_other": chart_other,
+        "chart_pass": chart["pass"],
+        "chart_duplicate": chart["duplicate"],
+        "chart_other": chart["other"],
     }
-
-    with _CACHE_LOCK:
-        _CACHE["batch_stats"][filename] = {
-            "signature": signature,
-            "data": copy.deepcopy(result),
-        }
-    return result
+    return _PAYLOAD_CACHE.put(cache_key, signature, result)
 
 
 def _health_metrics() -> dict:
@@ -275,47 +287,26 @@ def _health_metrics() -> dict:
     }
 
 
-def _daily_trends(files: list[dict]) -> dict:
+def _daily_trends(files: list[dict], resolution: str = "day", points: int = 0) -> Mapping:
     signature = tuple((entry["name"], entry.get("mtime"), entry.get("size")) for entry in files)
-    with _CACHE_LOCK:
-        cached = _CACHE["daily_trends"]
-        if cached["signature"] == signature and cached["data"] is not None:
-            return copy.deepcopy(cached["data"])
-
-    totals = defaultdict(lambda: {"total": 0, "pass": 0, "duplicate": 0})
-    for entry in files:
-        path = BATCH_LOG_DIR / entry["name"]
-        rows = _read_log_rows(path)
-        for row in rows:
-            ts = row["timestamp"]
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S"):
-                try:
-                    day = datetime.strptime(ts, fmt).date()
-                    break
-                except ValueError:
-                    day = None
-            if not day:
-                continue
-            totals[day]["total"] += 1
-            status = row["status"]
-            if status == "PASS":
-                totals[day]["pass"] += 1
-            elif status == "DUPLICATE":
-                totals[day]["duplicate"] += 1
-
-    ordered_days = sorted(totals.keys())
-    result = {
-        "labels": [day.strftime("%Y-%m-%d") for day in ordered_days],
-        "total": [totals[day]["total"] for day in ordered_days],
-        "pass": [totals[day]["pass"] for day in ordered_days],
-        "duplicate": [totals[day]["duplicate"] for day in ordered_days],
-    }
-    with _CACHE_LOCK:
-        _CACHE["daily_trends"] = {
-            "signature": signature,
-            "data": copy.deepcopy(result),
-        }
-    return result
+    cache_key = ("daily_trends", resolution, points)
+    cached = _PAYLOAD_CACHE.get(cache_key, signature)
+    if cached is not None:
+        return cached
+
+    _SUMMARY_INDEX.refresh()
+    series = _SUMMARY_INDEX.series(None, resolution)
+    labels, columns = aggregate_buckets(
+        [label for label, _, _, _ in series],
+        {
+            "total": [passed + duplicate + other for _, passed, duplicate, other in series],
+            "pass": [passed for _, passed, _, _ in series],
+            "duplicate": [duplicate for _, _, duplicate, _ in series],
+        },
+        points,
+    )
+    result = {"labels": labels, **columns}
+    return _PAYLOAD_CACHE.put(cache_key, signature, result)
 
 
 TEMPLATE = """
@@ -379,6 +370,8 @@ TEMPLATE = """
         <script>
             const DASHBOARD_REFRESH_INTERVAL = 30000;
             const DASHBOARD_REFRESH_STORAGE_KEY = "batch_dashboard_autorefresh";
+            const LIVE_FEED_ROWS = 10;
+            let liveFeedConnected = false;
 
             function initAutoRefresh(intervalMs, storageKey, checkboxId) {
                 const toggle = document.getElementById(checkboxId);
@@ -395,7 +388,7 @@ TEMPLATE = """
                 setInterval(() => {
                     const toggleElement = document.getElementById(checkboxId);
                     const enabled = !toggleElement || toggleElement.checked;
-                    if (!enabled) {
+                    if (!enabled || liveFeedConnected) {
                         return;
                     }
                     if (!document.hidden) {
@@ -422,6 +415,42 @@ TEMPLATE = """
                 label.textContent = formatDateTime(new Date());
             }
 
+            function initLiveFeed() {
+                if (!window.EventSource) {
+                    return;
+                }
+                const state = document.getElementById("live-feed-state");
+                const body = document.querySelector("#live-feed tbody");
+                const source = new EventSource("/stream");
+                source.onopen = () => {
+                    liveFeedConnected = true;
+                    state.textContent = "(live)";
+                };
+                source.onerror = () => {
+                    liveFeedConnected = false;
+                    state.textContent = "(reconnecting...)";
+                };
+                source.addEventListener("scan", event => {
+                    const scan = JSON.parse(event.data);
+                    const row = document.createElement("tr");
+                    [scan.timestamp, scan.batch, scan.mould, scan.qr, scan.status].forEach(value => {
+                        const cell = document.createElement("td");
+                        cell.textContent = value;
+                        row.appendChild(cell);
+                    });
+                    body.prepend(row);
+                    while (body.rows.length > LIVE_FEED_ROWS) {
+                        body.deleteRow(-1);
+                    }
+                    const total = document.getElementById("total-scans");
+                    total.textContent = Number(total.textContent) + 1;
+                    if (scan.status === "PASS") {
+                        const passed = document.getElementById("total-pass");
+                        passed.textContent = Number(passed.textContent) + 1;
+                    }
+                });
+            }
+
             function filterTable(inputId, tableId) {
                 const query = document.getElementById(inputId).value.toLowerCase();
                 const rows = document.querySelectorAll(`#${tableId} tbody tr`);
@@ -433,6 +462,7 @@ TEMPLATE = """
             document.addEventListener("DOMContentLoaded", () => {
                 updateLastRefreshed("last-refresh-label");
                 initAutoRefresh(DASHBOARD_REFRESH_INTERVAL, DASHBOARD_REFRESH_STORAGE_KEY, "auto-refresh-toggle");
+                initLiveFeed();
             });
         </script>
     </head>
@@ -466,8 +496,8 @@ TEMPLATE = """
             </div>
             <div class="summary-card">
                 <div class="summary-title">Total scans</div>
-                <div class="summary-value">{{ total_scans }}</div>
-                <div class="summary-subtext">PASS: {{ total_pass }}</div>
+                <div class="summary-value" id="total-scans">{{ total_scans }}</div>
+                <div class="summary-subtext">PASS: <span id="total-pass">{{ total_pass }}</span></div>
             </div>
         </section>
         <section class="health-panel">
@@ -479,6 +509,13 @@ TEMPLATE = """
                 <div class="health-item"><span class="health-label">Last Scan</span>{{ health.last_event }}<br><small>{{ health.last_event_age }}</small></div>
             </div>
         </section>
+        <section class="health-panel">
+            <h2>Live Scans <small id="live-feed-state">(connecting...)</small></h2>
+            <table id="live-feed">
+                <thead><tr><th>Time</th><th>Batch</th><th>Mould</th><th>QR Code</th><th>Status</th></tr></thead>
+                <tbody></tbody>
+            </table>
+        </section>
         <main>
         <section id="batch">
             <h2>Batch Logs</h2>
@@ -537,6 +574,7 @@ DETAIL_TEMPLATE = """
             .card { background:#f1f5f9; border-radius:8px; padding:1rem; }
             .label { text-transform:uppercase; letter-spacing:0.08em; font-size:0.75rem; color:#64748b; margin-bottom:0.35rem; display:block; }
             canvas { background:#ffffff; border-radius:8px; box-shadow:0 12px 28px -18px rgba(15,23,42,0.45); padding:1rem; }
+            .resolution-links { display:flex; gap:0.75rem; margin-bottom:0.75rem; font-size:0.9rem; }
             .toolbar { display:flex; flex-wrap:wrap; justify-content:space-between; align-items:center; gap:0.75rem; margin-bottom:1rem; }
             .refresh-toggle { color:#64748b; font-size:0.9rem; display:flex; flex-wrap:wrap; align-items:center; gap:0.75rem; }
             .last-refresh { font-weight:500; color:#475569; }
@@ -609,7 +647,12 @@ DETAIL_TEMPLATE = """
                 <div class="card"><span class="label">First scan</span>{{ stats.first_time or 'N/A' }}</div>
                 <div class="card"><span class="label">Last scan</span>{{ stats.last_time or 'N/A' }}</div>
             </div>
-            <h2>Hourly Breakdown</h2>
+            <h2>{{ resolutions[resolution] }} Breakdown</h2>
+            <div class="resolution-links">
+                {% for key, title in resolutions.items() %}
+                    {% if key == resolution %}<strong>{{ title }}</strong>{% else %}<a href="?resolution={{ key }}{% if points %}&amp;points={{ points }}{% endif %}">{{ title }}</a>{% endif %}
+                {% endfor %}
+            </div>
             <canvas id="timelineChart"></canvas>
         </div>
         <script>
@@ -655,6 +698,7 @@ TRENDS_TEMPLATE = """
             .container { max-width:1080px; margin:0 auto; }
             h1 { color:#ff3b30; margin-bottom:1.5rem; }
             .chart-card { background:#ffffff; border-radius:12px; box-shadow:0 16px 40px -30px rgba(15,23,42,0.7); padding:1.5rem; margin-bottom:2rem; }
+            .resolution-links { display:flex; gap:0.75rem; margin-bottom:1rem; font-size:0.9rem; }
             .toolbar { display:flex; flex-wrap:wrap; justify-content:space-between; align-items:center; gap:0.75rem; margin-bottom:1.2rem; }
             .refresh-toggle { color:#64748b; font-size:0.9rem; display:flex; flex-wrap:wrap; align-items:center; gap:0.75rem; }
             .last-refresh { font-weight:500; color:#475569; }
@@ -727,12 +771,17 @@ TRENDS_TEMPLATE = """
                 </div>
             </div>
             <h1>Scan Trends</h1>
+            <div class="resolution-links">
+                {% for key, title in resolutions.items() %}
+                    {% if key == resolution %}<strong>{{ title }}</strong>{% else %}<a href="?resolution={{ key }}{% if points %}&amp;points={{ points }}{% endif %}">{{ title }}</a>{% endif %}
+                {% endfor %}
+            </div>
             <div class="chart-card">
-                <h2>Daily Volume</h2>
+                <h2>{{ resolutions[resolution] }} Volume</h2>
                 <canvas id="volumeChart"></canvas>
             </div>
             <div class="chart-card">
-                <h2>Daily Pass / Duplicate</h2>
+                <h2>{{ resolutions[resolution] }} Pass / Duplicate</h2>
                 <canvas id="qualityChart"></canvas>
             </div>
         </div>
@@ -771,7 +820,8 @@ TRENDS_TEMPLATE = """
 @app.route("/")
 def index():
     batch_files = _list_csv(BATCH_LOG_DIR)
-    scan_stats = _count_scans(batch_files)
+    _SUMMARY_INDEX.refresh()
+    scan_stats = _SUMMARY_INDEX.totals()
     health = _health_metrics()
     return render_template_string(
         TEMPLATE,
@@ -788,12 +838,85 @@ def index():
 
 
 def _send_csv(directory: Path, filename: str):
+    """Send a CSV with ETag revalidation, single byte ranges and gzip.
+
+    Ranges are served from the plain file (resumed downloads); a full gzip
+    body of a closed batch comes from the on-disk precompressed copy.
+    """
     safe_name = Path(filename).name
     target = directory / safe_name
-    if not target.exists() or target.suffix.lower() != ".csv":
+    signature = _file_signature(target)
+    if signature is not None and safe_name.lower().endswith(f".csv{ARCHIVE_SUFFIX}"):
+        return _send_archive(target, signature)
+    if signature is None or target.suffix.lower() != ".csv":
         abort(404)
-    download = request.args.get("download") == "1"
-    return send_from_directory(directory, safe_name, as_attachment=download)
+    size = signature[1]
+    etag = etag_for(signature)
+    use_gzip = size >= GZIP_MIN_BYTES and _wants_gzip()
+    encoded_etag = etag[:-1] + '-gz"' if use_gzip else etag
+    not_modified = _not_modified(encoded_etag)
+    if not_modified is not None:
+        not_modified.vary.add("Accept-Encoding")
+        return not_modified
+
+    headers = {"Accept-Ranges": "bytes"}
+    if request.args.get("download") == "1":
+        headers["Content-Disposition"] = f'attachment; filename="{safe_name}"'
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if request.headers.get("Range") and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        response = Response(file_chunks(target, start, end - start + 1), status=206, mimetype="text/csv", headers=headers)
+        response.vary.add("Accept-Encoding")
+        return _tagged(response, etag)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        if time.time() - signature[0] >= CLOSED_BATCH_SECONDS:
+            cached = _GZIP_CACHE.path_for(target, etag)
+            headers["Content-Length"] = str(cached.stat().st_size)
+            body = file_chunks(cached)
+        else:
+            body = gzip_chunks(file_chunks(target, 0, size))
+    else:
+        headers["Content-Length"] = str(size)
+        body = file_chunks(target, 0, size)
+    response = Response(body, mimetype="text/csv", headers=headers, direct_passthrough=True)
+    response.vary.add("Accept-Encoding")
+    return _tagged(response, encoded_etag)
+
+
+def _send_archive(target: Path, signature: tuple):
+    """Send an archived batch as the CSV it was made from (no byte ranges)."""
+    etag = etag_for(signature, "csv")
+    use_gzip = _wants_gzip()
+    encoded_etag = etag[:-1] + '-gz"' if use_gzip else etag
+    not_modified = _not_modified(encoded_etag)
+    if not_modified is not None:
+        not_modified.vary.add("Accept-Encoding")
+        return not_modified
+
+    buffer = io.StringIO(newline="")
+    BatchArchive(target).write_csv(buffer)
+    body = buffer.getvalue().encode("utf-8")
+    headers = {}
+    if request.args.get("download") == "1":
+        headers["Content-Disposition"] = f'attachment; filename="{target.name[:-len(ARCHIVE_SUFFIX)]}"'
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = gzip.compress(body, compresslevel=6)
+    response = Response(body, mimetype="text/csv", headers=headers)
+    response.vary.add("Accept-Encoding")
+    return _tagged(response, encoded_etag)
 
 
 @app.route("/batch/<path:filename>")
@@ -803,33 +926,168 @@ def batch_file(filename: str):
 
 @app.route("/batch/<path:filename>/details")
 def batch_details(filename: str):
-    stats = _batch_stats(filename)
+    resolution, points = _chart_options("hour")
+    signature = _file_signature(_resolve_log(filename))
+    if signature is None:
+        abort(404)
+    etag = etag_for(signature, "details", resolution, points)
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    stats = _batch_stats(filename, resolution, points)
     chart_payload = {
-        "labels": stats.pop("chart_labels"),
-        "pass": stats.pop("chart_pass"),
-        "duplicate": stats.pop("chart_duplicate"),
-        "other": stats.pop("chart_other"),
+        "labels": stats["chart_labels"],
+        "pass": stats["chart_pass"],
+        "duplicate": stats["chart_duplicate"],
+        "other": stats["chart_other"],
     }
-    return render_template_string(
+    page = render_template_string(
         DETAIL_TEMPLATE,
         stats=stats,
-        chart_json=json.dumps(chart_payload),
+        chart_json=to_json(chart_payload),
+        resolution=resolution,
+        resolutions=RESOLUTION_TITLES,
+        points=_requested_points(points),
         **_logo_context(),
     )
+    return _tagged(Response(page, mimetype="text/html"), etag)
+
+
+def _row_filter(name: str) -> set[str]:
+    return {value.strip().upper() for value in request.args.get(name, "").split(",") if value.strip()}
+
+
+def _stream_rows(name: str, cursor: int, limit: int, statuses: set[str], moulds: set[str]):
+    yield '{"file": %s, "rows": [' % json.dumps(name)
+    sent = 0
+    next_cursor = None
+    for row_number, row in _SUMMARY_INDEX.iter_rows(name, cursor):
+        if sent == limit:
+            next_cursor = row_number
+            break
+        fields = [cell.strip() for cell in row] + [""] * (5 - len(row))
+        status = fields[4].upper()
+        if (statuses and status not in statuses) or (moulds and fields[2].upper() not in moulds):
+            continue
+        record = {
+            "row": row_number,
+            "timestamp": fields[0],
+            "batch": fields[1],
+            "mould": fields[2],
+            "qr": fields[3],
+            "status": status,
+        }
+        yield ("," if sent else "") + json.dumps(record)
+        sent += 1
+    yield '], "next_cursor": %s}' % json.dumps(next_cursor)
+
+
+@app.route("/api/batch/<path:filename>/rows")
+def batch_rows(filename: str):
+    """Page through a batch log as JSON.
+
+    ``cursor`` is the row number to start from (negative counts back from the
+    end), ``limit`` caps the rows returned (max 1000) and ``status``/``mould``
+    take comma-separated filters.  ``next_cursor`` is null once the end of the
+    indexed rows is reached.
+    """
+    path = _resolve_log(filename)
+    try:
+        cursor = int(request.args.get("cursor", "0"))
+        limit = min(max(int(request.args.get("limit", "200")), 1), 1000)
+    except ValueError:
+        abort(400)
+    signature = _file_signature(path)
+    if signature is None:
+        abort(404)
+    etag = etag_for(signature, "rows", request.query_string)
+    not_modified = _not_modified(etag[:-1] + '-gz"' if _wants_gzip() else etag)
+    if not_modified is not None:
+        return not_modified
+    _SUMMARY_INDEX.refresh_file(path.name)
+    if cursor < 0:
+        cursor = max(_SUMMARY_INDEX.row_count(path.name) + cursor, 0)
+    stream = _stream_rows(path.name, cursor, limit, _row_filter("status"), _row_filter("mould"))
+    return _tagged(Response(stream_with_context(stream), mimetype="application/json"), etag)
+
+
+@app.route("/stream")
+def stream():
+    """Server-Sent Events feed of scan rows as they are appended."""
+    events = _WATCHER.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    row = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: scan\ndata: {json.dumps(row)}\n\n"
+        finally:
+            _WATCHER.unsubscribe(events)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/search")
+def search():
+    """Where and when a cartridge was scanned, across every batch log.
+
+    ``qr`` matches one code exactly; otherwise ``line`` (QR position 1) and/or
+    ``mould`` (positions 2-4) select every code of that line/mould.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), 1000)
+    except ValueError:
+        abort(400)
+    _SUMMARY_INDEX.refresh()
+    matches = _SUMMARY_INDEX.find_qr(
+        qr_code=request.args.get("qr"),
+        line=request.args.get("line"),
+        mould=request.args.get("mould"),
+        limit=limit,
+    )
+    return jsonify({"count": len(matches), "matches": matches})
 
 
 @app.route("/trends")
 def trends():
     batch_files = _list_csv(BATCH_LOG_DIR)
-    aggregated = _daily_trends(batch_files)
-    return render_template_string(
+    resolution, points = _chart_options("day")
+    listing = tuple((entry["name"], entry["mtime"], entry["size"]) for entry in batch_files)
+    latest = (max((entry["mtime"] for entry in batch_files), default=0.0), sum(entry["size"] for entry in batch_files))
+    etag = etag_for(latest, "trends", listing, resolution, points)
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    aggregated = _daily_trends(batch_files, resolution, points)
+    page = render_template_string(
         TRENDS_TEMPLATE,
-        trends_json=json.dumps(aggregated),
+        trends_json=to_json(aggregated),
+        resolution=resolution,
+        resolutions=RESOLUTION_TITLES,
+        points=_requested_points(points),
         **_logo_context(),
     )
+    return _tagged(Response(page, mimetype="text/html"), etag)
+
+
+@app.route("/cache-stats")
+def cache_stats():
+    return jsonify(_PAYLOAD_CACHE.stats())
 
 
 if __name__ == "__main__":
     port = int(os.environ.get("LOG_VIEWER_PORT", "8080"))
     debug = os.environ.get("LOG_VIEWER_DEBUG", "0") == "1"
-    app.run(host="0.0.0.0", port=port, debug=debug)
+    try:
+        app.run(host="0.0.0.0", port=port, debug=debug)
+    finally:
+        _WATCHER.stop()
@@ -0,0 +1,254 @@
+"""Single background watcher that tails batch CSVs and fans out new rows.
+
+One thread follows the log folder for every connected client: it uses Linux
+inotify (through libc, no extra dependency) when available and otherwise
+polls ``stat`` of the most recently written CSV, re-listing the folder only
+every ``rescan_interval`` seconds.  New complete rows are parsed once and put
+on each subscriber's queue; a subscriber that falls behind by more than its
+queue size loses the oldest rows instead of stalling the others.
+"""
+
+from __future__ import annotations
+
+import csv
+import ctypes
+import ctypes.util
+import logging
+import os
+import queue
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from batch_log import LOG_HEADER
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify wrapper for one directory."""
+
+    def __init__(self, directory: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        # Self-pipe so wake() can end a select() that is waiting for events
+        self._wake_r, self._wake_w = os.pipe()
+
+    def wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def read_names(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if self._fd not in readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names, offset = set(), 0
+        while offset + _IN_EVENT.size <= len(data):
+            _, _, _, length = _IN_EVENT.unpack_from(data, offset)
+            offset += _IN_EVENT.size
+            names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class LogTailWatcher:
+    """Tail new rows of the CSVs in ``log_dir`` for any number of subscribers."""
+
+    def __init__(
+        self,
+        log_dir: Path | str,
+        poll_interval: float = 0.5,
+        rescan_interval: float = 5.0,
+        queue_size: int = 1000,
+        use_inotify: bool = True,
+    ) -> None:
+        self.log_dir = Path(log_dir)
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.queue_size = queue_size
+        self.use_inotify = use_inotify
+        self.mode: Optional[str] = None
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, int] = {}
+        self._active: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._notifier: Optional[_Inotify] = None
+        self._logger = logging.getLogger("log_viewer.watcher")
+
+    # ---------------- Subscribers ----------------
+    def subscribe(self) -> queue.Queue:
+        events: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.append(events)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="log-tail-watcher", daemon=True)
+                self._thread.start()
+        self._ready.wait(timeout=5.0)
+        return events
+
+    def unsubscribe(self, events: queue.Queue) -> None:
+        with self._lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """End the watcher thread and close its inotify descriptor.
+
+        Safe to call more than once; a later ``subscribe`` starts a new thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+            notifier = self._notifier
+        if notifier is not None:
+            notifier.wake()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        self._ready.clear()
+
+    def _publish(self, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            while True:
+                try:
+                    events.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        events.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    # ---------------- Watching ----------------
+    def _run(self) -> None:
+        self._snapshot_offsets()
+        notifier = None
+        if self.use_inotify and self.log_dir.exists():
+            try:
+                notifier = _Inotify(self.log_dir)
+            except (OSError, AttributeError) as exc:
+                self._logger.info("inotify unavailable (%s); polling %s", exc, self.log_dir)
+        self.mode = "inotify" if notifier else "poll"
+        with self._lock:
+            self._notifier = notifier
+        self._ready.set()
+        try:
+            if notifier:
+                self._inotify_loop(notifier)
+            else:
+                self._poll_loop()
+        finally:
+            if notifier:
+                with self._lock:
+                    self._notifier = None
+                notifier.close()
+
+    def _snapshot_offsets(self) -> None:
+        # Only rows written after the watcher starts are streamed
+        latest = None
+        for path in self._csv_files():
+            try:
+                stats = path.stat()
+            except OSError:
+                continue
+            self._offsets[path.name] = stats.st_size
+            if latest is None or stats.st_mtime > latest[0]:
+                latest = (stats.st_mtime, path.name)
+        self._active = latest[1] if latest else None
+
+    def _csv_files(self) -> List[Path]:
+        return list(self.log_dir.glob("*.csv")) if self.log_dir.exists() else []
+
+    def _inotify_loop(self, notifier: _Inotify) -> None:
+        while not self._stop.is_set():
+            for name in notifier.read_names(timeout=1.0):
+                if name.endswith(".csv"):
+                    self._drain(name)
+
+    def _poll_loop(self) -> None:
+        next_rescan = 0.0
+        while not self._stop.wait(self.poll_interval):
+            now = time.monotonic()
+            if now >= next_rescan:
+                next_rescan = now + self.rescan_interval
+                for path in self._csv_files():
+                    self._drain(path.name)
+            elif self._active:
+                self._drain(self._active)
+
+    def _drain(self, name: str) -> None:
+        path = self.log_dir / name
+        try:
+            size = path.stat().st_size
+        except OSError:
+            self._offsets.pop(name, None)
+            return
+        offset = self._offsets.get(name, 0)
+        if size < offset:
+            offset = 0  # rewritten under the same name
+        if size == offset:
+            return
+        try:
+            with path.open("rb") as handle:
+                handle.seek(offset)
+                data = handle.read(size - offset)
+        except OSError:
+            return
+        complete = data.rfind(b"\n") + 1
+        self._offsets[name] = offset + complete
+        self._active = name
+        if not complete:
+            return
+        text = data[:complete].decode("utf-8", errors="replace")
+        try:
+            rows = list(csv.reader(text.splitlines()))
+        except csv.Error:
+            return
+        for index, row in enumerate(rows):
+            if not row or (offset == 0 and index == 0 and [cell.strip() for cell in row] == LOG_HEADER):
+                continue
+            fields = [cell.strip() for cell in row] + [""] * (5 - len(row))
+            self._publish(
+                {
+                    "file": name,
+                    "timestamp": fields[0],
+                    "batch": fields[1],
+                    "mould": fields[2],
+                    "qr": fields[3],
+                    "status": fields[4].upper(),
+                }
+            )
@@ -1,19 +1,26 @@
 # logic.py
 
-import csv
-import json
 import logging
 import os
 import re
 import string
 import time
-from datetime import datetime
 from typing import Callable, Optional
 
 import tkinter as tk
 
-from config import LOG_FOLDER, RECOVERY_FILE
+from actuators import ActuatorQueue
+from batch_log import BatchLogWriter
+from config import (
+    LOG_FLUSH_EVERY_ROWS,
+    LOG_FLUSH_INTERVAL_MS,
+    LOG_FOLDER,
+    LOG_FSYNC_ON_CLOSE,
+    RECOVERY_FILE,
+)
 from hardware import get_hardware_controller
+from mould_index import MouldRangeIndex
+from recovery_journal import RecoveryJournal
 
 
 # Hardware controller
@@ -23,7 +30,11 @@ _hardware_error_handler: Optional[Callable[[str], None]] = None
 
 
 def set_hardware_error_handler(handler: Optional[Callable[[str], None]]) -> None:
-    """Register a callback that receives hardware error messages."""
+    """Register a callback that receives hardware error messages.
+
+    The callback also runs on the actuator worker thread, so it must not
+    touch Tk directly.
+    """
 
     global _hardware_error_handler
     _hardware_error_handler = handler
@@ -55,22 +66,23 @@ def _handle_hardware_exception(exc: Exception) -> None:
 
 
 # ---------------- LED & BUZZER Integration ----------------
+# Patterns run on the actuator worker thread so scan validation never sleeps.
+_actuators = ActuatorQueue(_hardware, on_error=_handle_hardware_exception)
+
+
 def blink_light(color, duration=0.3):
-    """Trigger LED blink; swallow hardware errors to keep UI alive."""
-    try:
-        _hardware.light_on(color)
-        time.sleep(duration)
-        _hardware.light_off(color)
-    except Exception as exc:  # pragma: no cover - hardware dependent
-        _handle_hardware_exception(exc)
+    """Queue an LED blink; returns immediately."""
+    _actuators.blink(color, duration)
 
 
 def buzz(duration=0.5):
-    """Trigger buzzer with hardware exception handling."""
-    try:
-        _hardware.buzz(duration)
-    except Exception as exc:  # pragma: no cover - hardware dependent
-        _handle_hardware_exception(exc)
+    """Queue a buzzer pulse; returns immediately."""
+    _actuators.buzz(duration)
+
+
+def shutdown_actuators(timeout=2.0):
+    """Let queued LED/buzzer patterns finish and stop the worker thread."""
+    _actuators.close(timeout)
 
 
 # ---------------- Highlight + Validation Helpers ----------------
@@ -175,6 +187,8 @@ def calculate_batch_size(qr_start, qr_end):
 def handle_qr_scan(qr_code, batch_line, mould_ranges, duplicate_checker=None):
     """Validate a QR code and return (status, mould).
 
+    mould_ranges is either a {mould: (start, end)} dict or a prebuilt
+    MouldRangeIndex; pass the index on the scan path to avoid rebuilding it.
     duplicate_checker is an optional callable that receives qr_code and
     returns True if the code has already been scanned for the active batch.
     """
@@ -188,13 +202,15 @@ def handle_qr_scan(qr_code, batch_line, mould_ranges, duplicate_checker=None):
         buzz()
         return "LINE MISMATCH", None
 
-    for mould, (start, end) in mould_ranges.items():
-        if start <= qr_code <= end:
-            if duplicate_checker and duplicate_checker(qr_code):
-                blink_light("YELLOW")
-                return "DUPLICATE", mould
-            blink_light("GREEN")
-            return "PASS", mould
+    if not isinstance(mould_ranges, MouldRangeIndex):
+        mould_ranges = MouldRangeIndex(mould_ranges)
+    mould = mould_ranges.find(qr_code)
+    if mould is not None:
+        if duplicate_checker and duplicate_checker(qr_code):
+            blink_light("YELLOW")
+            return "DUPLICATE", mould
+        blink_light("GREEN")
+        return "PASS", mould
 
     blink_light("RED")
     buzz()
@@ -202,60 +218,56 @@ def handle_qr_scan(qr_code, batch_line, mould_ranges, duplicate_checker=None):
 
 
 # ---------------- CSV Logging ----------------
-def init_log(batch_number):
+def _open_batch_log(batch_number, append):
     os.makedirs(LOG_FOLDER, exist_ok=True)
     csv_path = os.path.join(LOG_FOLDER, f"{batch_number}.csv")
-    log_file = open(csv_path, mode="w", newline="")
-    csv_writer = csv.writer(log_file)
-    csv_writer.writerow(["Timestamp", "BatchNumber", "Mould", "QRCode", "Status"])
-    return log_file, csv_writer
+    return BatchLogWriter(
+        csv_path,
+        append=append,
+        flush_every_rows=LOG_FLUSH_EVERY_ROWS,
+        flush_interval_ms=LOG_FLUSH_INTERVAL_MS,
+        fsync_on_close=LOG_FSYNC_ON_CLOSE,
+    )
 
 
-def write_log(csv_writer, log_file, batch_number, mould, qr_code, status):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    csv_writer.writerow([timestamp, batch_number, mould or "UNKNOWN", qr_code, status])
-    log_file.flush()
+def init_log(batch_number):
+    return _open_batch_log(batch_number, append=False)
+
 
+def write_log(batch_log, batch_number, mould, qr_code, status):
+    batch_log.write(batch_number, mould, qr_code, status)
 
-def close_log(log_file):
-    if log_file and not log_file.closed:
-        log_file.close()
+
+def close_log(batch_log):
+    if batch_log and not batch_log.closed:
+        batch_log.close()
 
 
 def resume_log(batch_number):
-    os.makedirs(LOG_FOLDER, exist_ok=True)
-    csv_path = os.path.join(LOG_FOLDER, f"{batch_number}.csv")
-    file_exists = os.path.exists(csv_path)
-    log_file = open(csv_path, mode="a", newline="")
-    csv_writer = csv.writer(log_file)
-    if not file_exists:
-        csv_writer.writerow(["Timestamp", "BatchNumber", "Mould", "QRCode", "Status"])
-    return log_file, csv_writer
+    return _open_batch_log(batch_number, append=True)
+
+
+# ---------------- Recovery Journal ----------------
+_recovery_journal = RecoveryJournal(os.path.join(LOG_FOLDER, RECOVERY_FILE))
 
 
 def save_recovery_state(state_data):
-    os.makedirs(LOG_FOLDER, exist_ok=True)
-    recovery_path = os.path.join(LOG_FOLDER, RECOVERY_FILE)
-    with open(recovery_path, "w", encoding="utf-8") as handle:
-        json.dump(state_data, handle, ensure_ascii=False, indent=2)
+    """Compact the journal to a single snapshot of the full session state."""
+    _recovery_journal.write_snapshot(state_data)
+
+
+def append_recovery_delta(counters, last_qr, last_status):
+    """Record one scan; returns False if no snapshot has been written yet."""
+    return _recovery_journal.append_delta(counters, last_qr=last_qr, last_status=last_status)
 
 
 def load_recovery_state():
-    recovery_path = os.path.join(LOG_FOLDER, RECOVERY_FILE)
-    try:
-        with open(recovery_path, "r", encoding="utf-8") as handle:
-            return json.load(handle)
-    except FileNotFoundError:
-        return None
-    except json.JSONDecodeError:
+    state = _recovery_journal.load()
+    if state is None:
         clear_recovery_state()
-        return None
+    return state
 
 
 def clear_recovery_state():
-    recovery_path = os.path.join(LOG_FOLDER, RECOVERY_FILE)
-    try:
-        os.remove(recovery_path)
-    except FileNotFoundError:
-        pass
+    _recovery_journal.clear()
 
@@ -1,6 +1,7 @@
 import csv
 import logging
 import os
+import queue
 import socket
 import threading
 import time
@@ -39,10 +40,24 @@ from config import (
     CAMERA_PORT,
     CAMERA_BAUDRATE,
     CAMERA_TIMEOUT,
+    CAMERA_RETRIGGER_MS,
+    CAMERA_RESPONSE_TIMEOUT_MS,
+    CAMERA_CONTINUOUS,
+    CAMERA_RESULT_TTL_MS,
+    HID_SCANNER_ENABLED,
+    HID_SCANNER_DEVICE,
+    HID_SCANNER_GRAB,
+    HID_SCANNER_MATCH,
+    HID_SCANNER_MAX_GAP_MS,
 )
 from duplicate_tracker import DuplicateTracker
+from mould_index import MouldRangeIndex
+from qr_codec import BatchBitmap
+from scan_attempts import ScanAttempts
+from hid_scanner import HIDScannerReader, KeycodeDecoder, find_scanner_device
 from layout import create_main_window
 from logic import (
+    append_recovery_delta,
     batch_number_validator,
     clear_recovery_state,
     close_log,
@@ -58,9 +73,17 @@ from logic import (
     resume_log,
     set_hardware_error_handler,
     save_recovery_state,
+    shutdown_actuators,
     write_log,
 )
 from hardware import get_hardware_controller
+from camera_protocol import (
+    DECODE,
+    MIN_QR_LENGTH,
+    TRIGGER_COMMAND,
+    CameraFrameParser,
+    DecodeSlot,
+)
 
 STATUS_TEXT_COLORS = {
     "PASS": "#e8ffe8",
@@ -85,6 +108,7 @@ CONTROLLER_RESPONSE_TIMEOUT_MS = 12_000  # T_CMD_MAX_WAIT_MS
 CMD_RETRY = 0x14  # 20
 CMD_FINAL = 0x13  # 19
 BUSY_SETTLE_MS = 20  # T_BUSY_SETTLE_MS
+HARDWARE_ERROR_POLL_MS = 100
 DEFAULT_CONTROLLER_PORTS = (
     "/dev/ttyS0",
     "/dev/ttyAMA0",
@@ -98,25 +122,73 @@ class CameraQRScanner:
     """
     Automatic QR scanner using serial camera interface.
     Compatible with /dev/qrscanner hardware from SCANNER project.
+
+    The trigger loop reads the port continuously and frames responses with
+    ``CameraFrameParser``.  A new trigger goes out as soon as the camera has
+    answered the previous one (scanner-ready), never sooner than
+    ``retrigger_interval_ms`` after it, or after ``response_timeout_ms`` of
+    silence.
+
+    Triggered mode (default) starts the loop per scan request and gives up at
+    the per-cartridge deadline.  Continuous mode keeps the loop running from
+    ``start_continuous`` on and parks each decode, stamped with its monotonic
+    receive time, in ``slot`` for ``result_ttl_ms``.  A scan request is then
+    answered at once from a fresh decode, or by the next decode before its
+    deadline.  A code equal to the last one delivered is never delivered
+    again until the camera has reported a gap (no decode) in between.
     """
-    
-    def __init__(self, port="/dev/qrscanner", on_qr_detected=None):
+
+    READ_POLL_S = 0.02
+
+    def __init__(
+        self,
+        port="/dev/qrscanner",
+        on_qr_detected=None,
+        retrigger_interval_ms=50,
+        response_timeout_ms=1000,
+        decode_deadline_ms=CONTROLLER_RESPONSE_TIMEOUT_MS - 1000,
+        serial_port=None,
+        continuous=False,
+        result_ttl_ms=300,
+    ):
         """
         Initialize camera QR scanner.
         
         Args:
             port: Serial port for QR camera (default: /dev/qrscanner)
             on_qr_detected: Callback function(qr_code) when QR is detected
+            retrigger_interval_ms: Minimum gap between two triggers
+            response_timeout_ms: Silence after which the camera is re-triggered
+            decode_deadline_ms: Longest a scan may run when no deadline is given
+            serial_port: Pre-opened port (test doubles, bench tools)
+            continuous: Keep sensing between scan requests
+            result_ttl_ms: How long a continuous-mode decode may answer a request
         """
         self.port = port
         self.on_qr_detected = on_qr_detected
-        self.scanner = None
+        self.retrigger_interval_ms = retrigger_interval_ms
+        self.response_timeout_ms = response_timeout_ms
+        self.decode_deadline_ms = decode_deadline_ms
+        self.continuous = continuous
+        self.scanner = serial_port
         self.running = False
+        self.sensing = False
         self.scan_thread = None
+        self.sense_thread = None
+        self.triggers_sent = 0
+        self.slot = DecodeSlot(result_ttl_ms / 1000.0)
+        self._deadline = None
+        self._request_deadline = None  # continuous mode: open scan request
+        self._request_lock = threading.Lock()
+        self._last_delivered = None
+        self._delivered_at = float("-inf")
+        self._parser = CameraFrameParser()
         self._logger = logging.getLogger("CameraQRScanner")
         
     def connect(self):
         """Open connection to camera scanner."""
+        if self.scanner is not None:
+            return True
         if serial is None:
             raise RuntimeError("pyserial not installed - cannot use camera scanner")
         
@@ -124,7 +196,7 @@ class CameraQRScanner:
             self.scanner = serial.Serial(
                 self.port,
                 baudrate=115200,
-                timeout=5,
+                timeout=self.READ_POLL_S,
                 parity=serial.PARITY_NONE,
                 stopbits=serial.STOPBITS_ONE,
                 bytesize=serial.EIGHTBITS
@@ -134,17 +206,41 @@ class CameraQRScanner:
         except Exception as e:
             self._logger.error(f"Failed to connect camera scanner on {self.port}: {e}")
             return False
+
+    def start_continuous(self):
+        """Start sensing in the background (continuous mode)."""
+        if self.scanner is None:
+            self._logger.warning("Cannot start sensing - scanner not connected")
+            return False
+        if self.sensing:
+            return True
+        self.sensing = True
+        self.sense_thread = threading.Thread(target=self._sense_loop, daemon=True)
+        self.sense_thread.start()
+        self._logger.info("Camera continuous sensing started")
+        return True
     
-    def start_scanning(self):
-        """Start automatic QR detection in background thread."""
+    def start_scanning(self, deadline=None):
+        """Start automatic QR detection in background thread.
+
+        Args:
+            deadline: ``time.monotonic()`` value after which scanning stops
+                (default: ``decode_deadline_ms`` from now)
+        """
         if self.scanner is None:
             self._logger.warning("Cannot start scan - scanner not connected")
             return False
         
+        if deadline is None:
+            deadline = time.monotonic() + self.decode_deadline_ms / 1000.0
+        if self.continuous:
+            return self._request_decode(deadline)
+
         if self.running:
             self._logger.warning("Scan already in progress")
             return False
         
+        self._deadline = deadline
         self.running = True
         self.scan_thread = threading.Thread(target=self._scan_loop, daemon=True)
         self.scan_thread.start()
@@ -153,79 +249,149 @@ class CameraQRScanner:
     
     def stop_scanning(self):
         """Stop automatic QR detection."""
+        if self.continuous:
+            with self._request_lock:
+                self._request_deadline = None
+            return
         self.running = False
-        if self.scan_thread:
+        if self.scan_thread and self.scan_thread is not threading.current_thread():
             self.scan_thread.join(timeout=2.0)
         self._logger.info("Camera scanning stopped")
+
+    def _request_decode(self, deadline):
+        """Answer a scan request from the slot, or open it for the next decode."""
+        if not self.sensing and not self.start_continuous():
+            return False
+        now = time.monotonic()
+        with self._request_lock:
+            decode = self.slot.take(now, not_before=self._delivered_at)
+            # The previous cartridge may still be under the camera
+            if decode and decode.text == self._last_delivered:
+                decode = None
+            if decode is None:
+                self._request_deadline = deadline
+                return True
+            self._mark_delivered(decode.text, now)
+        self._logger.info("Answered from decode received %.0f ms ago", (now - decode.received_at) * 1000)
+        if self.on_qr_detected:
+            self.on_qr_detected(decode.text)
+        return True
+
+    def _mark_delivered(self, qr_code, now):
+        self._request_deadline = None
+        self._last_delivered = qr_code
+        self._delivered_at = now
     
     def _trigger_scan(self):
         """Send trigger command to camera to capture QR code."""
-        try:
-            # Command structure from SCANNER/matrix.py
-            trigger_cmd = bytes([0x7E, 0x00, 0x08, 0x01, 0x00, 0x02, 0x01, 0xAB, 0xCD, 0x00])
-            
-            self.scanner.flush()
-            self.scanner.write(trigger_cmd)
-            
-            # Read 7-byte response header
-            response = self.scanner.read(size=7)
-            
-            if len(response) != 7:
-                self._logger.warning(f"Invalid response length: {len(response)}")
-                return None
-            
-            # Check for success response: 02 00 00 01 00 33 31
-            if (response[0] == 0x02 and response[1] == 0x00 and 
-                response[2] == 0x00 and response[3] == 0x01 and
-                response[4] == 0x00 and response[5] == 0x33 and 
-                response[6] == 0x31):
-                
-                # Read QR code data (up to 50 bytes)
-                qr_data = self.scanner.readline(50)
-                qr_text = qr_data.decode('utf-8', errors='ignore').strip()
-                
-                if len(qr_text) >= 10:  # Minimum valid QR length
-                    self._logger.info(f"QR detected: {qr_text}")
-                    return qr_text
-                else:
-                    self._logger.warning(f"QR too short: '{qr_text}'")
-                    return None
-            else:
-                self._logger.warning(f"Bad response: {response.hex()}")
-                return None
-                
-        except Exception as e:
-            self._logger.error(f"Scan trigger error: {e}")
+        self.scanner.write(TRIGGER_COMMAND)
+        self.triggers_sent += 1
+
+    def _read_frames(self):
+        """Frames completed by whatever the port delivers within one poll."""
+        waiting = getattr(self.scanner, "in_waiting", 0) or 1
+        data = self.scanner.read(waiting)
+        return self._parser.feed(data) if data else []
+
+    def _accept_frame(self, frame):
+        """Return the QR text of a usable decode frame, else None."""
+        if frame.kind != DECODE:
             return None
-    
-    def _scan_loop(self):
-        """Background thread that continuously triggers scans."""
-        last_qr = None
-        
-        while self.running:
+        qr_text = frame.text
+        if len(qr_text) >= MIN_QR_LENGTH:  # Minimum valid QR length
+            self._logger.info(f"QR detected: {qr_text}")
+            return qr_text
+        self._logger.warning(f"QR too short: '{qr_text}'")
+        return None
+
+    def _trigger_loop(self, keep_going, report_misses=False):
+        """Trigger the camera while ``keep_going(now)`` holds.
+
+        Yields ``(qr_code, received_at)`` for every valid decode, and
+        ``(None, received_at)`` for every answer without one (no-read,
+        unusable decode, silence) when ``report_misses`` is set.
+        """
+        retrigger_s = self.retrigger_interval_ms / 1000.0
+        response_s = self.response_timeout_ms / 1000.0
+        self._parser.reset()
+        try:
+            self.scanner.reset_input_buffer()
+        except Exception:
+            pass
+        awaiting_until = None
+        next_trigger = 0.0
+
+        while keep_going(time.monotonic()):
             try:
-                qr_code = self._trigger_scan()
-                
-                if qr_code and qr_code != last_qr:
-                    last_qr = qr_code
-                    
-                    # Call callback with detected QR
-                    if self.on_qr_detected:
-                        self.on_qr_detected(qr_code)
-                    
-                    # Stop after successful detection
-                    self.running = False
-                    break
-                
-                time.sleep(0.3)  # Brief delay between scans
-                
+                now = time.monotonic()
+                if awaiting_until is None and now >= next_trigger:
+                    self._trigger_scan()
+                    awaiting_until = now + response_s
+
+                frames = self._read_frames()
+                now = time.monotonic()
+                if not frames and awaiting_until is not None and now >= awaiting_until:
+                    frames = self._parser.expire()
+                    awaiting_until = None  # silent camera: trigger again
+                    next_trigger = now
+                    if not frames and report_misses:
+                        yield None, now
+                for frame in frames:
+                    # The camera answered, so it is ready for the next trigger
+                    awaiting_until = None
+                    next_trigger = now + retrigger_s
+                    qr_code = self._accept_frame(frame)
+                    if qr_code:
+                        yield qr_code, now
+                    elif report_misses:
+                        yield None, now
+
             except Exception as e:
                 self._logger.error(f"Scan loop error: {e}")
                 time.sleep(1)  # Longer delay on error
     
+    def _scan_loop(self):
+        """Background thread that re-triggers the camera until a decode or the deadline."""
+        for qr_code, _ in self._trigger_loop(lambda now: self.running and now < self._deadline):
+            self.running = False
+            # Call callback with detected QR
+            if self.on_qr_detected:
+                self.on_qr_detected(qr_code)
+            return
+        if self.running:
+            self._logger.warning("Camera decode deadline reached after %d triggers", self.triggers_sent)
+        self.running = False
+
+    def _expire_request(self, now):
+        with self._request_lock:
+            if self._request_deadline is not None and now >= self._request_deadline:
+                self._request_deadline = None
+                self._logger.warning("Camera decode deadline reached after %d triggers", self.triggers_sent)
+        return self.sensing
+
+    def _sense_loop(self):
+        """Continuous mode: keep the slot fresh and answer open requests."""
+        for qr_code, received_at in self._trigger_loop(self._expire_request, report_misses=True):
+            with self._request_lock:
+                if qr_code is None:
+                    # Gap in decodes: whatever was delivered has left the camera
+                    self._last_delivered = None
+                    continue
+                # Until then the same code is still the previous cartridge
+                if self._request_deadline is None or qr_code == self._last_delivered:
+                    self.slot.put(qr_code, received_at)
+                    continue
+                self._mark_delivered(qr_code, received_at)
+            if self.on_qr_detected:
+                self.on_qr_detected(qr_code)
+        self.sensing = False
+    
     def close(self):
         """Close scanner connection."""
         self.stop_scanning()
+        self.sensing = False
+        if self.sense_thread and self.sense_thread is not threading.current_thread():
+            self.sense_thread.join(timeout=2.0)
         if self.scanner:
             try:
                 self.scanner.close()
@@ -236,10 +402,18 @@ class CameraQRScanner:
 
 
 class ControllerLink:
-    """Serial bridge that synchronises scans with the ACTJ controller."""
+    """Serial bridge that synchronises scans with the ACTJ controller.
+
+    A dedicated reader thread blocks on the port, drives the busy line as soon
+    as a scan command byte arrives and puts the decoded command on a
+    thread-safe queue that the Tk thread polls with ``after``.  Serial latency
+    is therefore independent of how busy the Tk event loop is, and the reader
+    never calls into Tk.
+    """
 
     RETRY_CMD = CMD_RETRY  # 0x14 (20)
     FINAL_CMD = CMD_FINAL  # 0x13 (19)
+    COMMAND_POLL_MS = 10
 
     def __init__(
         self,
@@ -249,7 +423,8 @@ class ControllerLink:
         on_link_down=None,
         ports=DEFAULT_CONTROLLER_PORTS,
         baudrate: int = 115200,
-        poll_interval_ms: int = 20,
+        read_timeout: float = 0.1,
+        serial_port=None,
     ) -> None:
         self._hardware = hardware
         self._window = window
@@ -257,14 +432,22 @@ class ControllerLink:
         self._on_link_down = on_link_down
         self._ports = ports
         self._baudrate = baudrate
-        self._poll_interval_ms = poll_interval_ms
+        self._read_timeout = read_timeout
         self._serial = None
-        self._after_id = None
         self._pending = False
         self._busy_low = False
         self._active = False
+        self._lock = threading.RLock()
+        self._commands: "queue.Queue" = queue.Queue()
+        self._reader = None
+        self._stop_event = threading.Event()
         self._logger = logging.getLogger("actj.sync")
 
+        if serial_port is not None:
+            # Pre-opened port (pty test doubles, bench tools)
+            self._attach(serial_port, getattr(serial_port, "port", "injected port"))
+            return
+
         if serial is None:
             self._logger.info("pyserial not available; controller sync disabled")
             return
@@ -274,15 +457,15 @@ class ControllerLink:
     def _connect(self) -> None:
         for port in self._ports:
             try:
-                self._serial = serial.Serial(
+                handle = serial.Serial(
                     port=port,
                     baudrate=self._baudrate,
                     bytesize=serial.EIGHTBITS,
                     parity=serial.PARITY_NONE,
                     stopbits=serial.STOPBITS_ONE,
-                    timeout=0,
+                    timeout=self._read_timeout,
                 )
-                self._serial.reset_input_buffer()
+                handle.reset_input_buffer()
             except SerialException as exc:
                 self._logger.warning("Unable to open %s: %s", port, exc)
                 continue
@@ -290,67 +473,102 @@ class ControllerLink:
                 self._logger.warning("Unexpected error on %s: %s", port, exc)
                 continue
 
-            self._logger.info("Linked to ACTJ controller on %s", port)
-            self._active = True
-            self._schedule_poll(initial=True)
+            self._attach(handle, port)
             return
 
         self._serial = None
         self._active = False
         self._logger.error("Unable to locate ACTJ controller serial port; sync disabled")
 
-    def _schedule_poll(self, initial: bool = False) -> None:
-        if not self._serial:
-            return
-        if self._after_id is not None:
-            return
-        delay = 0 if initial else self._poll_interval_ms
-        self._after_id = self._window.after(delay, self._poll_serial)
-
-    def _poll_serial(self) -> None:
-        self._after_id = None
-        if not self._serial:
-            return
+    def _attach(self, handle, port_name) -> None:
+        self._serial = handle
+        self._active = True
+        self._logger.info("Linked to ACTJ controller on %s", port_name)
+        self._stop_event.clear()
+        self._reader = threading.Thread(
+            target=self._reader_loop, args=(handle,), name="actj-reader", daemon=True
+        )
+        self._reader.start()
+        self._poll_commands()
 
-        try:
-            while True:
-                chunk = self._serial.read(1)
+    # ---------------- Reader thread ----------------
+    def _reader_loop(self, handle) -> None:
+        while not self._stop_event.is_set():
+            try:
+                # Blocks until a byte arrives or the read timeout expires
+                chunk = handle.read(1)
                 if not chunk:
-                    break
-                command = chunk[0]
+                    continue
+                received_at = time.perf_counter()
+                waiting = handle.in_waiting
+                if waiting:
+                    chunk += handle.read(waiting)
+            except Exception as exc:
+                if self._stop_event.is_set():
+                    return
+                self._commands.put(exc)
+                return
+
+            for command in chunk:
                 if command in (self.RETRY_CMD, self.FINAL_CMD):
-                    self._handle_command(command == self.FINAL_CMD)
+                    self._on_command_received(handle, command == self.FINAL_CMD, received_at)
                 else:
                     self._logger.debug("Ignoring unexpected byte 0x%02X", command)
-        except SerialException as exc:
-            self._handle_serial_failure(exc)
-            return
-        except Exception as exc:  # pragma: no cover - serial edge case
-            self._handle_serial_failure(exc)
-            return
 
-        self._schedule_poll()
+    def _on_command_received(self, handle, final_attempt: bool, received_at: float) -> None:
+        with self._lock:
+            self._pending = True
+            if not self._busy_low:
+                self._set_busy(False)
+                self._busy_low = True
+            latency_ms = (time.perf_counter() - received_at) * 1000.0
+        self._logger.debug("Command-to-busy latency %.3f ms", latency_ms)
+        try:
+            handle.reset_input_buffer()
+        except Exception:  # pragma: no cover - reset may fail on virtual ports
+            pass
+        self._commands.put(final_attempt)
+
+    # ---------------- Tk thread ----------------
+    def _poll_commands(self) -> None:
+        self._dispatch_commands()
+        if not self._active:
+            return
+        try:
+            self._window.after(self.COMMAND_POLL_MS, self._poll_commands)
+        except Exception as exc:  # pragma: no cover - window already destroyed
+            self._logger.debug("Unable to schedule controller dispatch: %s", exc)
 
-    def _handle_command(self, final_attempt: bool) -> None:
-        self._pending = True
-        if not self._busy_low:
-            self._set_busy(False)
-            self._busy_low = True
-        if self._serial:
+    def _dispatch_commands(self) -> None:
+        while True:
             try:
-                self._serial.reset_input_buffer()
-            except Exception:  # pragma: no cover - reset may fail on virtual ports
+                item = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, Exception):
+                self._handle_serial_failure(item)
+                return
+            if self._on_scan_request and self._serial:
+                self._on_scan_request(item)
+
+    def _stop_reader(self) -> None:
+        self._stop_event.set()
+        if self._serial and hasattr(self._serial, "cancel_read"):
+            try:
+                self._serial.cancel_read()
+            except Exception:  # pragma: no cover - not supported on every port
                 pass
-        if self._on_scan_request:
-            self._on_scan_request(final_attempt)
+        reader = self._reader
+        self._reader = None
+        if reader and reader is not threading.current_thread():
+            reader.join(timeout=max(self._read_timeout * 5, 0.5))
 
     def _handle_serial_failure(self, exc: Exception) -> None:
         self._logger.error("Controller link lost: %s", exc)
-        if self._after_id is not None:
-            self._window.after_cancel(self._after_id)
-            self._after_id = None
-        self._release_busy()
-        self._pending = False
+        self._stop_reader()
+        with self._lock:
+            self._release_busy()
+            self._pending = False
         if self._serial:
             try:
                 self._serial.close()
@@ -368,9 +586,10 @@ class ControllerLink:
             self._logger.warning("Failed to drive busy line (%s): %s", busy, exc)
 
     def _release_busy(self) -> None:
-        if self._busy_low:
-            self._set_busy(True)
-            self._busy_low = False
+        with self._lock:
+            if self._busy_low:
+                self._set_busy(True)
+                self._busy_low = False
 
     def send_result(self, status: str) -> bool:
         return self.send_code(self._map_status(status), f"status={status}")
@@ -399,20 +618,23 @@ class ControllerLink:
             self._handle_serial_failure(exc)
             return False
         finally:
-            self._pending = False
-            self._release_busy()
+            with self._lock:
+                self._pending = False
+                self._release_busy()
         return True
 
     def cancel_pending(self, fallback_code: str = "S", reason: str = "") -> None:
         if not self._pending:
             return
         if not self._serial:
-            self._pending = False
-            self._release_busy()
+            with self._lock:
+                self._pending = False
+                self._release_busy()
             return
         if not self.send_code(fallback_code, reason or "cancel_pending"):
-            self._pending = False
-            self._release_busy()
+            with self._lock:
+                self._pending = False
+                self._release_busy()
 
     def has_pending(self) -> bool:
         return self._pending
@@ -422,18 +644,18 @@ class ControllerLink:
         return self._active
 
     def close(self) -> None:
-        if self._after_id is not None:
-            self._window.after_cancel(self._after_id)
-            self._after_id = None
+        self._stop_reader()
         if self._pending and self._serial:
             try:
                 self.send_code("S", "closing")
             except Exception:
+                with self._lock:
+                    self._pending = False
+                    self._release_busy()
+        else:
+            with self._lock:
                 self._pending = False
                 self._release_busy()
-        else:
-            self._pending = False
-            self._release_busy()
         if self._serial:
             try:
                 self._serial.close()
@@ -453,9 +675,10 @@ class BatchScannerApp:
         self.dynamic_widgets = []
         self.mould_rows = []
         self.mould_ranges = {}
+        self.mould_index = None
         self.duplicate_tracker = DuplicateTracker()
-        self.csv_writer = None
-        self.log_file = None
+        self.scan_bitmap = None
+        self.batch_log = None
         self.batch_number = ""
         self.batch_line = ""
         self.counters = {"accepted": 0, "duplicate": 0, "rejected": 0, "total": 0}
@@ -464,6 +687,9 @@ class BatchScannerApp:
         self.last_status = "READY"
         self.session_start = None
         self.banner_after_id = None
+        # Hardware errors reported from worker threads (LED/buzzer actuators)
+        self._hardware_errors: "queue.Queue" = queue.Queue()
+        self._hardware_error_poll_id = None
         self.auto_advance = AUTO_ADVANCE
         # Use pre-initialized hardware controller if provided (from launch_app)
         self.hardware = hardware_controller if hardware_controller else get_hardware_controller()
@@ -471,6 +697,8 @@ class BatchScannerApp:
         self.awaiting_hardware = False
         self._controller_timeout_id = None
         self._manual_scan_timeout_id = None
+        self._scan_deadline = None
+        self.scan_attempts = ScanAttempts(CONTROLLER_RESPONSE_TIMEOUT_MS / 1000.0)
         self.legacy_mode = False
         self.legacy_integration = None
         self.legacy_uart_protocol = None
@@ -500,12 +728,15 @@ class BatchScannerApp:
         # Initialize camera QR scanner
         self.camera_scanner = None
         self._init_camera_scanner()
+        self.hid_scanner = None
+        self._init_hid_scanner()
 
         self._build_setup_frame()
         self._build_scan_frame()
         self._maybe_resume_session()
         self.window.protocol("WM_DELETE_WINDOW", self._on_close)
         set_hardware_error_handler(self._on_hardware_error)
+        self._poll_hardware_errors()
 
         # Initialize hardware pins to match firmware expectations
         if not hardware_controller:
@@ -541,12 +772,18 @@ class BatchScannerApp:
         try:
             self.camera_scanner = CameraQRScanner(
                 port=CAMERA_PORT,
-                on_qr_detected=self._on_camera_qr_detected
+                on_qr_detected=self._on_camera_qr_detected,
+                retrigger_interval_ms=CAMERA_RETRIGGER_MS,
+                response_timeout_ms=CAMERA_RESPONSE_TIMEOUT_MS,
+                continuous=CAMERA_CONTINUOUS,
+                result_ttl_ms=CAMERA_RESULT_TTL_MS,
             )
             
             # Try to connect (will fail gracefully if hardware not present)
             if self.camera_scanner.connect():
                 logging.getLogger("camera").info(f"Camera QR scanner ready on {CAMERA_PORT}")
+                if CAMERA_CONTINUOUS:
+                    self.camera_scanner.start_continuous()
             else:
                 logging.getLogger("camera").warning("Camera scanner not available - using manual entry")
                 self.camera_scanner = None
@@ -554,21 +791,69 @@ class BatchScannerApp:
             logging.getLogger("camera").warning(f"Camera scanner initialization failed: {e}")
             self.camera_scanner = None
     
+    def _init_hid_scanner(self):
+        """Read the USB barcode scanner's input device directly, if configured."""
+        logger = logging.getLogger("hid_scanner")
+        if not HID_SCANNER_ENABLED:
+            return
+        if HID_SCANNER_DEVICE == "auto":
+            if not HID_SCANNER_MATCH.strip():
+                logger.warning("hid_scanner device = auto needs a match - using entry field")
+                return
+            device = find_scanner_device(HID_SCANNER_MATCH)
+            grab = False  # never take a guessed device away from the desktop
+        else:
+            device, grab = HID_SCANNER_DEVICE, HID_SCANNER_GRAB
+        if not device:
+            logger.warning("No USB barcode scanner input device found - using entry field")
+            return
+        reader = HIDScannerReader(
+            device,
+            on_code=self._on_hid_code,
+            decoder=KeycodeDecoder(max_gap_s=HID_SCANNER_MAX_GAP_MS / 1000.0),
+            grab=grab,
+        )
+        try:
+            reader.start()
+        except OSError as e:
+            logger.warning(f"Cannot read {device}: {e} - using entry field")
+            return
+        self.hid_scanner = reader
+
+    def _on_hid_code(self, qr_code):
+        """Called from the reader thread with a complete scanned code."""
+        self.window.after(0, self._process_hid_qr, qr_code)
+
+    def _process_hid_qr(self, qr_code):
+        """Feed a scanned code to validation (runs in main thread)."""
+        if not self.scanning_active:
+            logging.getLogger("hid_scanner").info(f"Ignoring scan outside a batch: {qr_code}")
+            return
+        self._submit_qr(qr_code)
+
     def _on_camera_qr_detected(self, qr_code):
         """Called when camera automatically detects a QR code."""
         # Update UI with scanned QR (runs in background thread, so use after())
-        self.window.after(0, self._process_camera_qr, qr_code)
+        self.window.after(0, self._process_camera_qr, qr_code, time.monotonic())
     
-    def _process_camera_qr(self, qr_code):
+    def _process_camera_qr(self, qr_code, received_at=None):
         """Process QR code detected by camera (runs in main thread)."""
         logger = logging.getLogger("camera")
         logger.info(f"Camera detected QR: {qr_code}")
         
         # Only process if firmware is waiting for scan result
         if not self.awaiting_hardware:
-            logger.warning("Camera QR detected but firmware not waiting - ignoring")
+            code = qr_code.strip().upper()
+            if self.scanning_active and self.scan_attempts.note_decode(code, received_at or time.monotonic(), "camera"):
+                logger.info("Camera QR arrived after the attempt ended - kept for the retry")
+            else:
+                logger.warning("Camera QR detected but firmware not waiting - ignoring")
             return
         
+        self._submit_qr(qr_code)
+
+    def _submit_qr(self, qr_code):
+        """Validate ``qr_code`` as if it had been typed into the entry."""
         # Update entry field
         self.qr_entry.delete(0, tk.END)
         self.qr_entry.insert(0, qr_code)
@@ -940,6 +1225,13 @@ class BatchScannerApp:
         if self.auto_advance and widget:
             self.window.after_idle(widget.focus_set)
 
+    def _attach_scan_bitmap(self):
+        """Track scanned serials of the active ranges as per-mould bitsets."""
+        self.scan_bitmap = BatchBitmap(self.mould_ranges)
+        self.duplicate_tracker.attach_bitmap(self.batch_number, self.scan_bitmap)
+        if not self.scan_bitmap.covers_all(self.mould_ranges):
+            self.duplicate_tracker.preload(self.batch_number)
+
     def _check_duplicate(self, qr_code: str) -> bool:
         if not self.batch_number:
             return False
@@ -1089,6 +1381,10 @@ class BatchScannerApp:
             return
 
         self.awaiting_hardware = True
+        now = time.monotonic()
+        attempt = self.scan_attempts.begin(final_attempt, now)
+        # Camera decoding must finish 1 s before the controller gives up
+        self._scan_deadline = now + (CONTROLLER_RESPONSE_TIMEOUT_MS - 1000) / 1000.0
         self._clear_controller_timeout()
         self._controller_timeout_id = self.window.after(
             CONTROLLER_RESPONSE_TIMEOUT_MS,
@@ -1107,6 +1403,18 @@ class BatchScannerApp:
         detail = f"Cartridge positioned. QR scan {'(final attempt)' if final_attempt else 'requested'}..."
         self._show_banner("Scanning QR", detail, status_key="READY")
 
+        # A decode that came in after the previous attempt timed out answers at once
+        late = self.scan_attempts.pending_decode() if attempt.requests > 1 else None
+        if late:
+            logger.info(
+                "Attempt %d answered from %s decode received %.0f ms earlier",
+                attempt.requests,
+                late.source,
+                (now - late.received_at) * 1000,
+            )
+            self._submit_qr(late.code)
+            return
+
         # Allow BUSY_SETTLE_MS for hardware to settle before QR scan
         self.window.after(BUSY_SETTLE_MS, self._start_qr_scan_sequence)
 
@@ -1118,6 +1426,7 @@ class BatchScannerApp:
             return
 
         self.awaiting_hardware = True
+        self._scan_deadline = time.monotonic() + (CONTROLLER_RESPONSE_TIMEOUT_MS - 1000) / 1000.0
         self._clear_controller_timeout()
 
         if not self.scan_frame.winfo_manager():
@@ -1148,7 +1457,10 @@ class BatchScannerApp:
         
         # Enable manual entry for USB scanners or keyboard input
         self.qr_entry.config(state="normal")
-        self.qr_entry.focus_set()
+        # A directly read scanner does not need focus, unless its reader has
+        # stopped (scanner unplugged) and input falls back to the entry field
+        if not (self.hid_scanner and self.hid_scanner.running):
+            self.qr_entry.focus_set()
         
         # Clear any previous QR code
         self.qr_entry.delete(0, tk.END)
@@ -1157,7 +1469,7 @@ class BatchScannerApp:
         if self.camera_scanner:
             logger.info("Starting automatic USB/camera QR scan - cartridge positioned")
             try:
-                self.camera_scanner.start_scanning()
+                self.camera_scanner.start_scanning(deadline=self._scan_deadline)
                 self._show_banner("Auto scanning", "Camera scanning QR code...", status_key="READY")
             except Exception as e:
                 logger.warning(f"Camera scan failed: {e}")
@@ -1225,7 +1537,9 @@ class BatchScannerApp:
             self._manual_scan_timeout_id = None
         
         sent = self.controller_link.send_result(status)
-        if not sent:
+        if sent:
+            self.scan_attempts.finish()
+        else:
             logging.getLogger("actj.sync").warning("Failed to deliver %s to controller", status)
         
         # Release busy signal so firmware can proceed with mechanical operations
@@ -1251,10 +1565,19 @@ class BatchScannerApp:
         self._show_banner("Controller offline", "Check UART cable and power.", status_key="OUT OF BATCH")
 
     def _on_hardware_error(self, message: str) -> None:
-        def show_banner():
-            self._show_banner("Hardware error", message, status_key="OUT OF BATCH")
+        # May run on the actuator worker thread: only queue the message here
+        self._hardware_errors.put(message)
 
-        self.window.after_idle(show_banner)
+    def _poll_hardware_errors(self) -> None:
+        message = None
+        while True:
+            try:
+                message = self._hardware_errors.get_nowait()
+            except queue.Empty:
+                break
+        if message is not None:
+            self._show_banner("Hardware error", message, status_key="OUT OF BATCH")
+        self._hardware_error_poll_id = self.window.after(HARDWARE_ERROR_POLL_MS, self._poll_hardware_errors)
 
     def _format_status_detail(self, status, qr_code, mould):
         qr_display = qr_code if qr_code and qr_code not in {"", "None"} else "No QR"
@@ -1338,6 +1661,12 @@ class BatchScannerApp:
             self._show_setup()
             return
 
+        self.mould_index = MouldRangeIndex(self.mould_ranges)
+        if self.mould_index.overlaps:
+            logging.getLogger("qr.scan").warning(
+                "Resumed batch has overlapping mould ranges: %s", self.mould_index.overlaps
+            )
+
         stored_counters = state.get("counters", {})
         for key in self.counters:
             self.counters[key] = int(stored_counters.get(key, 0))
@@ -1353,7 +1682,14 @@ class BatchScannerApp:
         else:
             self.session_start = datetime.now()
 
-        self.log_file, self.csv_writer = resume_log(self.batch_number)
+        # Rehydrate the duplicate bitsets (or index) before the first scan arrives
+        self._attach_scan_bitmap()
+        missing = sum(self.scan_bitmap.counts().values()) - self.counters["accepted"]
+        if missing > 0:
+            # Recovery file lagged behind the committed scans
+            self.counters["accepted"] += missing
+            self.counters["total"] += missing
+        self.batch_log = resume_log(self.batch_number)
         self.scanning_active = True
         self._show_scan()
         self._update_scan_display(self.last_qr, self.last_status, mould=None, persist=False)
@@ -1635,6 +1971,13 @@ class BatchScannerApp:
         if not valid:
             return
 
+        mould_index = MouldRangeIndex(self.mould_ranges)
+        if mould_index.overlaps:
+            first, second = mould_index.overlaps[0]
+            messagebox.showerror("Error", f"QR ranges of moulds {first} and {second} overlap")
+            return
+        self.mould_index = mould_index
+
         os.makedirs(SETUP_LOG_FOLDER, exist_ok=True)
         setup_path = os.path.join(SETUP_LOG_FOLDER, f"{self.batch_number}_setup.csv")
         with open(setup_path, "w", newline="") as handle:
@@ -1643,16 +1986,17 @@ class BatchScannerApp:
             writer.writerows(mould_data)
 
         clear_recovery_state()
-        self.log_file, self.csv_writer = init_log(self.batch_number)
+        self.batch_log = init_log(self.batch_number)
         self.session_start = datetime.now()
         self._reset_scan_state()
+        self._attach_scan_bitmap()
         
         # ACTJv20(RJSR) Legacy Integration - Batch Start
         if self.legacy_mode and self.legacy_integration:
             legacy = self.legacy_integration
             legacy.set_batch_context(
                 self.batch_line,
-                self.mould_ranges,
+                self.mould_index,
                 lambda code: self._check_duplicate(code)
             )
             legacy.handle_batch_start()
@@ -1701,8 +2045,10 @@ class BatchScannerApp:
                 legacy_waiting = False
 
         if not self.awaiting_hardware and not legacy_waiting:
-            # QR input received but firmware not waiting - ignore
+            # QR input received but firmware not waiting - keep it for a retry of this cartridge
+            late_code = self.qr_entry.get().strip().upper()
             self.qr_entry.delete(0, tk.END)
+            self.scan_attempts.note_decode(late_code, time.monotonic(), "entry")
             return
 
         qr_code = self.qr_entry.get().strip().upper()
@@ -1718,12 +2064,17 @@ class BatchScannerApp:
             self.window.after_cancel(self._manual_scan_timeout_id)
             self._manual_scan_timeout_id = None
 
-        status, mould = handle_qr_scan(
-            qr_code,
-            self.batch_line,
-            self.mould_ranges,
-            duplicate_checker=lambda code: self._check_duplicate(code),
-        )
+        # Same cartridge as an earlier attempt whose answer never reached the controller
+        earlier = self.scan_attempts.outcome(qr_code)
+        if earlier:
+            status, mould = earlier
+        else:
+            status, mould = handle_qr_scan(
+                qr_code,
+                self.batch_line,
+                self.mould_index or self.mould_ranges,
+                duplicate_checker=lambda code: self._check_duplicate(code),
+            )
 
         if (
             self.legacy_mode
@@ -1741,22 +2092,28 @@ class BatchScannerApp:
                     "Failed to send QR result to ACTJv20 firmware: %s", exc
                 )
 
-        if status == "PASS":
-            self.counters["accepted"] += 1
-            self.duplicate_tracker.record_scan(self.batch_number, qr_code)
-            logger.info(f"QR accepted: {qr_code} -> {mould}")
-        elif status == "DUPLICATE":
-            self.counters["duplicate"] += 1
-            logger.warning(f"QR duplicate: {qr_code}")
+        if earlier:
+            # Already counted and logged on the earlier attempt
+            logger.info(f"QR {qr_code} resent with earlier outcome {status}")
+            self._update_scan_display(qr_code, status, mould, persist=False)
         else:
-            self.counters["rejected"] += 1
-            logger.warning(f"QR rejected ({status}): {qr_code}")
+            if status == "PASS":
+                self.counters["accepted"] += 1
+                self.duplicate_tracker.record_scan(self.batch_number, qr_code)
+                logger.info(f"QR accepted: {qr_code} -> {mould}")
+            elif status == "DUPLICATE":
+                self.counters["duplicate"] += 1
+                logger.warning(f"QR duplicate: {qr_code}")
+            else:
+                self.counters["rejected"] += 1
+                logger.warning(f"QR rejected ({status}): {qr_code}")
 
-        self.counters["total"] += 1
-        self._update_scan_display(qr_code, status, mould)
-
-        if self.csv_writer and self.log_file:
-            write_log(self.csv_writer, self.log_file, self.batch_number, mould, qr_code, status)
+            self.counters["total"] += 1
+            self.scan_attempts.record_outcome(qr_code, status, mould, time.monotonic())
+            self._update_scan_display(qr_code, status, mould)
+
+            if self.batch_log:
+                write_log(self.batch_log, self.batch_number, mould, qr_code, status)
 
         self.awaiting_hardware = False
 
@@ -1778,6 +2135,13 @@ class BatchScannerApp:
         self._show_banner(status, detail, status_key=status)
         self.window.update_idletasks()
         if persist:
+            self._persist_scan()
+
+    def _persist_scan(self):
+        """Journal the per-scan counters; the mould setup is in the snapshot."""
+        if not self.scanning_active or not self.batch_number:
+            return
+        if not append_recovery_delta(dict(self.counters), self.last_qr, self.last_status):
             self._persist_state()
 
     def _persist_state(self):
@@ -1806,25 +2170,26 @@ class BatchScannerApp:
 
     def stop_scanning(self, show_message=True):
         self._abort_pending_controller_request(reason="batch_stop")
+        self.scan_attempts.finish()
         
         # ACTJv20(RJSR) Legacy Integration - Batch End
         if self.legacy_mode and self.legacy_integration:
             self.legacy_integration.handle_batch_end()
             logging.getLogger("actj.legacy").info("ACTJv20(RJSR) batch end sequence completed")
             
-        if not self.scanning_active and not self.log_file:
+        if not self.scanning_active and not self.batch_log:
             return
         self.scanning_active = False
         self.qr_entry.config(state="disabled")
         self._set_qr_focus(False)
         self.qr_entry.delete(0, tk.END)
-        close_log(self.log_file)
-        self.log_file = None
-        self.csv_writer = None
+        close_log(self.batch_log)
+        self.batch_log = None
         clear_recovery_state()
         if self.batch_number:
             self.duplicate_tracker.reset_batch(self.batch_number)
         self.mould_ranges.clear()
+        self.mould_index = None
         for key in self.counters:
             self.counters[key] = 0
         self.last_qr = "None"
@@ -1881,17 +2246,21 @@ class BatchScannerApp:
     # ---------------- Shutdown ----------------
     def _on_close(self):
         set_hardware_error_handler(None)
+        if self._hardware_error_poll_id:
+            self.window.after_cancel(self._hardware_error_poll_id)
+            self._hardware_error_poll_id = None
         self._abort_pending_controller_request(reason="shutdown")
         if self.scanning_active:
             self._persist_state()
-        if self.log_file:
-            close_log(self.log_file)
-            self.log_file = None
-            self.csv_writer = None
+        if self.batch_log:
+            close_log(self.batch_log)
+            self.batch_log = None
         if self.controller_link:
             self.controller_link.close()
         if self.camera_scanner:
             self.camera_scanner.close()
+        if self.hid_scanner:
+            self.hid_scanner.stop()
         if self.legacy_mode and self.legacy_integration:
             try:
                 self.legacy_integration.shutdown_sequence()
@@ -1902,6 +2271,7 @@ class BatchScannerApp:
         except Exception:
             pass
         self.duplicate_tracker.close()
+        shutdown_actuators()
         self.window.destroy()
 
 
@@ -0,0 +1,67 @@
+"""Sorted interval index over the validated mould QR ranges of a batch."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class MouldRangeIndex(Mapping):
+    """Map a QR code to its mould in O(log n).
+
+    Built once per batch (``start_scanning``/resume) from ``{mould: (start,
+    end)}``.  Ranges are sorted by start so a lookup is a single bisect plus
+    one end comparison.  Overlapping ranges are reported in ``overlaps``; when
+    any exist, lookups fall back to the first matching mould in definition
+    order, which is what the linear scan in ``handle_qr_scan`` used to return.
+
+    The index is a read-only mapping of the original ranges, so it can be
+    shared wherever a ``mould_ranges`` dict was passed before (for example
+    ``ACTJLegacyIntegration.set_batch_context``).
+    """
+
+    def __init__(self, mould_ranges: Mapping) -> None:
+        self._ranges: Dict[str, Tuple[str, str]] = {
+            mould: (start, end) for mould, (start, end) in mould_ranges.items()
+        }
+        ordered = sorted(
+            (start, end, mould) for mould, (start, end) in self._ranges.items()
+        )
+        self._starts: List[str] = [start for start, _, _ in ordered]
+        self._ends: List[str] = [end for _, end, _ in ordered]
+        self._moulds: List[str] = [mould for _, _, mould in ordered]
+        self.overlaps: List[Tuple[str, str]] = self._find_overlaps(ordered)
+
+    @staticmethod
+    def _find_overlaps(ordered) -> List[Tuple[str, str]]:
+        overlaps = []
+        reach_end, reach_mould = None, None
+        for start, end, mould in ordered:
+            if reach_end is not None and start <= reach_end:
+                overlaps.append((reach_mould, mould))
+            if reach_end is None or end > reach_end:
+                reach_end, reach_mould = end, mould
+        return overlaps
+
+    def find(self, qr_code: str) -> Optional[str]:
+        """Return the mould whose range contains ``qr_code`` (string order)."""
+        if self.overlaps:
+            for mould, (start, end) in self._ranges.items():
+                if start <= qr_code <= end:
+                    return mould
+            return None
+        position = bisect_right(self._starts, qr_code) - 1
+        if position >= 0 and qr_code <= self._ends[position]:
+            return self._moulds[position]
+        return None
+
+    # ---------------- Mapping protocol ----------------
+    def __getitem__(self, mould: str) -> Tuple[str, str]:
+        return self._ranges[mould]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ranges)
+
+    def __len__(self) -> int:
+        return len(self._ranges)
@@ -0,0 +1,103 @@
+"""Bounded LRU cache for computed log viewer payloads."""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of a JSON-like value (dict -> mappingproxy, list -> tuple)."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class FrozenJSONEncoder(json.JSONEncoder):
+    """JSON encoder for frozen values without thawing them first.
+
+    Tuples already encode as arrays; a mappingproxy is handed over as a
+    shallow dict of its items, so nested values are never copied.
+    """
+
+    def default(self, value: Any) -> Any:
+        if isinstance(value, MappingProxyType):
+            return dict(value)
+        return super().default(value)
+
+
+def to_json(value: Any) -> str:
+    """``json.dumps`` of a frozen value."""
+    return json.dumps(value, cls=FrozenJSONEncoder)
+
+
+def approximate_size(value: Any) -> int:
+    """Rough deep size in bytes of a frozen payload."""
+    size = sys.getsizeof(value)
+    if isinstance(value, MappingProxyType):
+        size += sys.getsizeof({}) + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, tuple):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class PayloadCache:
+    """LRU of frozen payloads keyed by name and validated by a signature.
+
+    Entries are evicted least-recently-used first once their accounted size
+    exceeds ``max_bytes``.  Payloads are frozen on insert, so callers share
+    them without copying.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, signature: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, signature: Any, payload: Any) -> Any:
+        """Store ``payload`` and return its frozen form."""
+        frozen = freeze(payload)
+        size = approximate_size(frozen)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            if size <= self.max_bytes:
+                self._entries[key] = (signature, frozen, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return frozen
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
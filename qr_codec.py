@@ -0,0 +1,257 @@
+"""Compact integer encoding of cartridge QR codes and per-mould bitsets.
+
+A cartridge QR is 14 upper-case alphanumerics laid out as::
+
+    L  l  MMM  PPPP  S  NNNN
+    0  1  2-4  5-8   9  10-13
+
+``l`` is the production line and ``MMM`` the mould (both validated by
+``logic.validate_qr_match``); ``L`` and ``PPPP`` form the lot prefix; ``S`` and
+``NNNN`` are the ``[A-Z]\\d{4}`` serial that ``logic.calculate_batch_size``
+counts.  ``encode_qr`` maps the code losslessly to integers, and for a fixed
+(line, mould, lot) key the serial index preserves the string order used by
+``start <= qr <= end`` range checks.
+
+``MouldBitset`` tracks scanned serials of one mould range with one bit per
+serial, so a full A0000-Z9999 range (260k serials) costs ~32 KB.
+``BatchBitmap`` groups the bitsets of a batch and serialises them to a blob;
+it finds the bitset for a QR with a ``mould_index.MouldRangeIndex`` bisect and
+encodes the QR once per lookup.  ``snapshot`` copies the bits so the blob can
+be encoded without holding the lock that guards marking.
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from mould_index import MouldRangeIndex
+
+SERIALS_PER_LETTER = 10_000
+SERIAL_SPACE = 26 * SERIALS_PER_LETTER
+_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_DIGIT = {ch: value for value, ch in enumerate(_ALPHABET)}
+_QR_PATTERN = re.compile(r"^[0-9A-Z]{9}[A-Z]\d{4}$")
+_BLOB_MAGIC = b"QRBM"
+_BLOB_VERSION = 1
+
+
+class CartridgeCode(NamedTuple):
+    line: int
+    mould: int
+    lot: int
+    serial: int
+
+    @property
+    def key(self) -> Tuple[int, int, int]:
+        return (self.line, self.mould, self.lot)
+
+
+def _base36(text: str) -> int:
+    value = 0
+    for ch in text:
+        value = value * 36 + _DIGIT[ch]
+    return value
+
+
+def _from_base36(value: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 36)
+        chars.append(_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def encode_qr(qr_code: str) -> Optional[CartridgeCode]:
+    """Return the integer form of ``qr_code`` or None if it is not a cartridge QR."""
+    if not _QR_PATTERN.match(qr_code):
+        return None
+    return CartridgeCode(
+        line=_DIGIT[qr_code[1]],
+        mould=_base36(qr_code[2:5]),
+        lot=_base36(qr_code[0] + qr_code[5:9]),
+        serial=(ord(qr_code[9]) - 65) * SERIALS_PER_LETTER + int(qr_code[10:14]),
+    )
+
+
+def decode_qr(code: CartridgeCode) -> str:
+    """Inverse of ``encode_qr``."""
+    lot = _from_base36(code.lot, 5)
+    letter, number = divmod(code.serial, SERIALS_PER_LETTER)
+    return (
+        lot[0]
+        + _ALPHABET[code.line]
+        + _from_base36(code.mould, 3)
+        + lot[1:]
+        + chr(65 + letter)
+        + f"{number:04d}"
+    )
+
+
+class MouldBitset:
+    """One bit per serial of a contiguous ``start..end`` mould range."""
+
+    __slots__ = ("key", "first", "last", "bits", "count")
+
+    def __init__(self, start: CartridgeCode, end: CartridgeCode) -> None:
+        if start.key != end.key or end.serial < start.serial:
+            raise ValueError("range is not a contiguous serial run")
+        self.key = start.key
+        self.first = start.serial
+        self.last = end.serial
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @property
+    def size(self) -> int:
+        return self.last - self.first + 1
+
+    def covers(self, code: CartridgeCode) -> bool:
+        return code.key == self.key and self.first <= code.serial <= self.last
+
+    def test(self, code: CartridgeCode) -> bool:
+        offset = code.serial - self.first
+        return bool(self.bits[offset >> 3] & (1 << (offset & 7)))
+
+    def mark(self, code: CartridgeCode) -> bool:
+        """Set the bit for ``code``; returns False if it was already set."""
+        offset = code.serial - self.first
+        mask = 1 << (offset & 7)
+        if self.bits[offset >> 3] & mask:
+            return False
+        self.bits[offset >> 3] |= mask
+        self.count += 1
+        return True
+
+    def clear(self) -> None:
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+
+def _mould_name_ok(mould: str) -> bool:
+    """True if ``mould`` fits the blob's one-byte-length ASCII name field."""
+    try:
+        return len(mould.encode("ascii")) <= 255
+    except UnicodeEncodeError:
+        return False
+
+
+class BitmapSnapshot(NamedTuple):
+    """Copy of a ``BatchBitmap``'s bits, encoded to a blob by ``to_blob``."""
+
+    signature: int
+    moulds: List[Tuple[str, int, bytes]]
+
+    def to_blob(self) -> bytes:
+        parts = [struct.pack("<4sBIH", _BLOB_MAGIC, _BLOB_VERSION, self.signature, len(self.moulds))]
+        for mould, count, bits in self.moulds:
+            name = mould.encode("ascii")
+            parts.append(struct.pack("<B", len(name)) + name)
+            parts.append(struct.pack("<II", count, len(bits)))
+            parts.append(bits)
+        return zlib.compress(b"".join(parts))
+
+
+class BatchBitmap:
+    """Per-mould bitsets for the validated ranges of one batch."""
+
+    def __init__(self, mould_ranges: Dict[str, Tuple[str, str]]) -> None:
+        self._moulds: Dict[str, MouldBitset] = {}
+        for mould, (start, end) in mould_ranges.items():
+            if not _mould_name_ok(mould):
+                continue  # name cannot be stored in the blob; strings still work
+            start_code, end_code = encode_qr(start), encode_qr(end)
+            if start_code is None or end_code is None:
+                continue
+            try:
+                self._moulds[mould] = MouldBitset(start_code, end_code)
+            except ValueError:
+                continue  # lot prefix changes inside the range; strings still work
+        self._index = MouldRangeIndex({mould: mould_ranges[mould] for mould in self._moulds})
+        self._signature = self._range_signature(mould_ranges)
+
+    @staticmethod
+    def _range_signature(mould_ranges: Dict[str, Tuple[str, str]]) -> int:
+        text = "|".join(f"{m}:{s}:{e}" for m, (s, e) in sorted(mould_ranges.items()))
+        return zlib.crc32(text.encode("ascii", "replace"))
+
+    def covers_all(self, mould_ranges: Dict[str, Tuple[str, str]]) -> bool:
+        """True when every mould range is represented by a bitset."""
+        return set(mould_ranges) == set(self._moulds)
+
+    def _bitset_for(self, qr_code: str) -> Tuple[Optional[MouldBitset], Optional[CartridgeCode]]:
+        mould = self._index.find(qr_code)
+        if mould is None:
+            return None, None
+        bitset, code = self._moulds[mould], encode_qr(qr_code)
+        if code is None or not bitset.covers(code):
+            return None, None
+        return bitset, code
+
+    def seen(self, qr_code: str) -> Optional[bool]:
+        """Whether ``qr_code`` was marked; None if no bitset covers it."""
+        bitset, code = self._bitset_for(qr_code)
+        return None if bitset is None else bitset.test(code)
+
+    def mark(self, qr_code: str) -> Optional[bool]:
+        """Record ``qr_code``; False if already set, None if no bitset covers it."""
+        bitset, code = self._bitset_for(qr_code)
+        return None if bitset is None else bitset.mark(code)
+
+    def mark_all(self, qr_codes: Iterable[str]) -> None:
+        for qr_code in qr_codes:
+            self.mark(qr_code)
+
+    def counts(self) -> Dict[str, int]:
+        """Unique scanned serials per mould."""
+        return {mould: bitset.count for mould, bitset in self._moulds.items()}
+
+    def clear(self) -> None:
+        for bitset in self._moulds.values():
+            bitset.clear()
+
+    # ---------------- Persistence ----------------
+    def snapshot(self) -> BitmapSnapshot:
+        """Copy the current bits; cheap enough to take under a lock."""
+        return BitmapSnapshot(
+            self._signature,
+            [(mould, bitset.count, bytes(bitset.bits)) for mould, bitset in sorted(self._moulds.items())],
+        )
+
+    def to_blob(self) -> bytes:
+        return self.snapshot().to_blob()
+
+    def load_blob(self, blob: bytes) -> bool:
+        """Restore bits saved by ``to_blob``; False if the ranges changed."""
+        try:
+            data = zlib.decompress(blob)
+            magic, version, signature, count = struct.unpack_from("<4sBIH", data, 0)
+        except (zlib.error, struct.error):
+            return False
+        if magic != _BLOB_MAGIC or version != _BLOB_VERSION or signature != self._signature:
+            return False
+        offset = struct.calcsize("<4sBIH")
+        restored: Dict[str, Tuple[int, bytes]] = {}
+        try:
+            for _ in range(count):
+                (name_len,) = struct.unpack_from("<B", data, offset)
+                offset += 1
+                mould = data[offset:offset + name_len].decode("ascii")
+                offset += name_len
+                marked, length = struct.unpack_from("<II", data, offset)
+                offset += 8
+                restored[mould] = (marked, data[offset:offset + length])
+                offset += length
+        except (struct.error, UnicodeDecodeError):
+            return False
+        if set(restored) != set(self._moulds):
+            return False
+        if any(len(bits) != len(self._moulds[m].bits) for m, (_, bits) in restored.items()):
+            return False
+        for mould, (marked, bits) in restored.items():
+            bitset = self._moulds[mould]
+            bitset.bits = bytearray(bits)
+            bitset.count = marked
+        return True
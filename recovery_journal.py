@@ -0,0 +1,178 @@
+"""Append-only, checksummed journal for the scanning recovery state.
+
+The journal is a text file of one record per line::
+
+    <crc32 as 8 hex digits> <compact JSON payload>
+
+The first record is a snapshot of the full session state (batch, line,
+moulds, counters, ...).  Every scan appends a small delta carrying only the
+counters that changed plus ``last_qr``/``last_status``.  Replaying the file
+applies the deltas to the snapshot in order and stops at the first record
+whose checksum does not match, so a write torn by power loss costs at most
+the scan that was being recorded.  After ``compact_every`` deltas the merged
+state is written back as a single snapshot (temp file + fsync + rename).
+
+Files written by older releases (a plain ``json.dump`` of the state) are
+still accepted by ``load``.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import zlib
+from typing import Any, Dict, Optional
+
+_SNAPSHOT = "snapshot"
+_DELTA = "delta"
+_DELTA_FIELDS = ("last_qr", "last_status")
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(body), body)
+
+
+def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+        return None
+    body = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(body):
+            return None
+        payload = json.loads(body.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def active_batch(path: str) -> Optional[str]:
+    """Batch number of the session journalled at ``path``, if any.
+
+    Read-only, for other processes such as the log archiver: unlike
+    ``RecoveryJournal.load`` it never rewrites a torn journal.
+    """
+    try:
+        with open(path, "rb") as handle:
+            data = handle.read()
+    except OSError:
+        return None
+    state = None
+    for line in data.splitlines(keepends=True):
+        record = _decode(line)
+        if record is None:
+            break
+        if record.get("t") == _SNAPSHOT and isinstance(record.get("state"), dict):
+            state = record["state"]
+    if state is None:
+        state = RecoveryJournal._load_legacy(data)
+    batch = (state or {}).get("batch_number")
+    return str(batch) if batch else None
+
+
+class RecoveryJournal:
+    """Snapshot + per-scan delta journal stored at ``path``."""
+
+    def __init__(self, path: str, compact_every: int = 500) -> None:
+        self.path = path
+        self._compact_every = max(1, compact_every)
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._deltas = 0
+
+    def write_snapshot(self, state: Dict[str, Any]) -> None:
+        """Replace the journal with a single snapshot of ``state``."""
+        with self._lock:
+            self._state = copy.deepcopy(state)
+            self._rewrite()
+
+    def append_delta(self, counters: Dict[str, int], **fields: Any) -> bool:
+        """Append the changes since the last record; False without a snapshot."""
+        with self._lock:
+            if self._state is None:
+                return False
+            current = self._state.setdefault("counters", {})
+            record: Dict[str, Any] = {"t": _DELTA}
+            changed = {key: value for key, value in counters.items() if current.get(key) != value}
+            if changed:
+                record["counters"] = changed
+            for key in _DELTA_FIELDS:
+                if key in fields and self._state.get(key) != fields[key]:
+                    record[key] = fields[key]
+            if len(record) == 1:
+                return True
+            self._apply(record)
+            if self._deltas + 1 >= self._compact_every:
+                self._rewrite()
+                return True
+            with open(self.path, "ab") as handle:
+                handle.write(_encode(record))
+            self._deltas += 1
+            return True
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Replay the journal; returns the recovered state or None."""
+        with self._lock:
+            self._state, self._deltas = None, 0
+            try:
+                with open(self.path, "rb") as handle:
+                    data = handle.read()
+            except FileNotFoundError:
+                return None
+            torn = False
+            for line in data.splitlines(keepends=True):
+                record = _decode(line)
+                if record is None:
+                    torn = True
+                    break
+                if record.get("t") == _SNAPSHOT and isinstance(record.get("state"), dict):
+                    self._state, self._deltas = record["state"], 0
+                elif record.get("t") == _DELTA and self._state is not None:
+                    self._apply(record)
+                    self._deltas += 1
+            if self._state is None:
+                self._state = self._load_legacy(data)
+                torn = self._state is not None
+            if self._state is None:
+                return None
+            if torn:
+                # Drop the damaged tail so later appends stay readable
+                self._rewrite()
+            return copy.deepcopy(self._state)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state, self._deltas = None, 0
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    # ---------------- Internals ----------------
+    @staticmethod
+    def _load_legacy(data: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            state = json.loads(data.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        return state if isinstance(state, dict) else None
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        self._state.setdefault("counters", {}).update(record.get("counters", {}))
+        for key in _DELTA_FIELDS:
+            if key in record:
+                self._state[key] = record[key]
+
+    def _rewrite(self) -> None:
+        # Caller holds _lock
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as handle:
+            handle.write(_encode({"t": _SNAPSHOT, "state": self._state}))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.path)
+        self._deltas = 0
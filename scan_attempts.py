@@ -0,0 +1,101 @@
+"""Per-cartridge context across the controller's CMD_RETRY / CMD_FINAL requests.
+
+The firmware asks for the same cartridge up to three times (``CMD_RETRY``
+twice, then ``CMD_FINAL``) until it gets an accept, reject or duplicate
+answer.  An ``AttemptContext`` spans those requests: decodes that arrive
+after an attempt timed out are kept with their receive time, and the
+validation outcome of every code is remembered.  The next request for the
+same cartridge is then answered at once from the newest kept decode, and a
+code validated earlier in the sequence is answered with its first outcome
+instead of being counted again (and turning into a duplicate of itself).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY_S = 0.5  # Firmware pause before re-requesting
+
+
+@dataclass
+class AttemptDecode:
+    code: str
+    received_at: float  # time.monotonic()
+    source: str
+    status: Optional[str] = None
+    mould: Optional[str] = None
+
+
+class AttemptContext:
+    """Decodes and outcomes for the cartridge currently at the scan station."""
+
+    def __init__(self, opened_at: float) -> None:
+        self.opened_at = opened_at
+        self.requested_at = opened_at
+        self.requests = 0
+        self.final_requested = False
+        self.decodes: Dict[str, AttemptDecode] = {}
+
+    def add(self, code: str, received_at: float, source: str) -> AttemptDecode:
+        decode = self.decodes.pop(code, None)
+        if decode is None:
+            decode = AttemptDecode(code, received_at, source)
+        else:
+            decode.received_at = received_at
+            decode.source = source
+        self.decodes[code] = decode  # newest last
+        return decode
+
+    def latest(self) -> Optional[AttemptDecode]:
+        return next(reversed(self.decodes.values()), None)
+
+    def outcome(self, code: str) -> Optional[Tuple[str, Optional[str]]]:
+        decode = self.decodes.get(code)
+        if decode is None or decode.status is None:
+            return None
+        return decode.status, decode.mould
+
+
+class ScanAttempts:
+    """Open/close ``AttemptContext`` objects as controller requests arrive."""
+
+    def __init__(self, request_timeout_s: float, max_attempts: int = MAX_ATTEMPTS) -> None:
+        # A context older than a whole retry sequence belongs to another cartridge
+        self.max_sequence_s = max_attempts * (request_timeout_s + RETRY_DELAY_S)
+        self.current: Optional[AttemptContext] = None
+
+    def begin(self, final_attempt: bool, now: float) -> AttemptContext:
+        """Register a scan request; returns the context it belongs to."""
+        context = self.current
+        if context is None or context.final_requested or now - context.opened_at > self.max_sequence_s:
+            context = self.current = AttemptContext(now)
+        context.requests += 1
+        context.requested_at = now
+        context.final_requested = final_attempt
+        return context
+
+    def note_decode(self, code: str, now: float, source: str) -> Optional[AttemptDecode]:
+        """Keep a decode for the open context (None when there is none)."""
+        if self.current is None or not code:
+            return None
+        return self.current.add(code, now, source)
+
+    def pending_decode(self) -> Optional[AttemptDecode]:
+        """Newest decode kept for the open context."""
+        return self.current.latest() if self.current else None
+
+    def outcome(self, code: str) -> Optional[Tuple[str, Optional[str]]]:
+        return self.current.outcome(code) if self.current else None
+
+    def record_outcome(self, code: str, status: str, mould: Optional[str], now: float) -> None:
+        if self.current is None:
+            return
+        decode = self.current.decodes.get(code) or self.current.add(code, now, "entry")
+        decode.status = status
+        decode.mould = mould
+
+    def finish(self) -> None:
+        """The controller got a final answer for this cartridge."""
+        self.current = None
@@ -0,0 +1,517 @@
+"""Persistent summary index over the batch CSV logs for the log viewer.
+
+Each CSV in the log folder is tracked in a SQLite side database by name
+together with the byte offset up to which it has been parsed.  ``refresh``
+reads only the bytes appended since the last call (complete lines only, so a
+row being written is picked up next time) and folds them into per-file
+totals and per-hour counts; per-day figures are summed from the hourly rows.
+Every ``ROW_MARK_INTERVAL``-th row also gets its byte offset recorded, so
+``iter_rows`` can page through a large file by seeking instead of reading it
+from the top, and every scanned QR is entered in an inverted index
+(``find_qr``) pointing back at its file, row, byte offset and timestamp.
+Only a file that was replaced is parsed again from the start: one that
+shrank, changed inode, or whose first bytes no longer match the fingerprint
+taken when it was last read (a batch restarted under the same name).  Files
+that disappeared are dropped from the index.  Columnar batch archives
+(``batch_archive``) are indexed from their columns in one pass once their
+CSV has been removed; their scans have no byte offset (-1).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from batch_archive import ARCHIVE_SUFFIX, ArchiveError, BatchArchive
+from batch_log import LOG_HEADER
+from downsample import week_label
+from log_timestamps import TimestampDecoder, format_hour_key, format_key, format_minute_key
+
+HEAD_FINGERPRINT_BYTES = 256
+ROW_MARK_INTERVAL = 512
+SCHEMA_VERSION = 2  # bump when the tables change; older index files are rebuilt
+
+
+def _is_header(row: List[str]) -> bool:
+    return [cell.strip() for cell in row] == LOG_HEADER
+
+
+def _lines(
+    source: Iterable[bytes], offset: int, starts: List[int], end: Optional[int] = None
+) -> Iterator[str]:
+    """Decoded byte lines of ``source`` (read from file offset ``offset``).
+
+    Each line's file offset is recorded in ``starts``; lines starting at or
+    after ``end`` are not read.
+    """
+    position = offset
+    for line in source:
+        if end is not None and position >= end:
+            return
+        starts.append(position)
+        position += len(line)
+        yield line.decode("utf-8", errors="replace")
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _status_column(status: str) -> str:
+    if status == "PASS":
+        return "pass"
+    if status == "DUPLICATE":
+        return "duplicate"
+    return "other"
+
+
+class _FileDelta:
+    """Counters accumulated from one chunk of newly appended rows."""
+
+    def __init__(self) -> None:
+        self.counts = {"pass": 0, "duplicate": 0, "other": 0}
+        self.hours: Dict[int, Dict[str, int]] = defaultdict(lambda: {"pass": 0, "duplicate": 0, "other": 0})
+        self.minutes: Dict[int, Dict[str, int]] = defaultdict(lambda: {"pass": 0, "duplicate": 0, "other": 0})
+        self.first_key: Optional[int] = None
+        self.last_key: Optional[int] = None
+        self.decoder = TimestampDecoder()
+        self.inode = 0
+        self.head_len = 0
+        self.head_crc = 0
+        self.marks: List[Tuple[int, int]] = []
+        self.scans: List[Tuple[str, int, int, Optional[int], str]] = []
+
+    def add(self, row: List[str], row_number: int, start: int) -> None:
+        status = row[4].strip().upper() if len(row) > 4 else ""
+        qr_code = row[3].strip().upper() if len(row) > 3 else ""
+        self.record(self.decoder.key(row[0].strip()), status, qr_code, row_number, start)
+
+    def record(self, key: Optional[int], status: str, qr_code: str, row_number: int, start: int) -> None:
+        column = _status_column(status)
+        self.counts[column] += 1
+        if qr_code:
+            self.scans.append((qr_code, row_number, start, key, status))
+        if key is None:
+            return
+        self.hours[key // 10_000][column] += 1
+        self.minutes[key // 100][column] += 1
+        if self.first_key is None or key < self.first_key:
+            self.first_key = key
+        if self.last_key is None or key > self.last_key:
+            self.last_key = key
+
+    @property
+    def first_ts(self) -> Optional[str]:
+        return format_key(self.first_key) if self.first_key is not None else None
+
+    @property
+    def last_ts(self) -> Optional[str]:
+        return format_key(self.last_key) if self.last_key is not None else None
+
+
+class ScanSummaryIndex:
+    """Incrementally maintained scan aggregates for a directory of batch CSVs."""
+
+    def __init__(self, log_dir: Path | str, db_path: Path | str) -> None:
+        self.log_dir = Path(log_dir)
+        path = Path(db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The index is only a cache of the logs: rebuild it on a schema change
+            for table in ("log_files", "hourly_counts", "minute_counts", "row_marks", "qr_scans"):
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS log_files (
+                name TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                inode INTEGER NOT NULL DEFAULT 0,
+                head_len INTEGER NOT NULL DEFAULT 0,
+                head_crc INTEGER NOT NULL DEFAULT 0,
+                pass INTEGER NOT NULL DEFAULT 0,
+                duplicate INTEGER NOT NULL DEFAULT 0,
+                other INTEGER NOT NULL DEFAULT 0,
+                first_ts TEXT,
+                last_ts TEXT
+            );
+            CREATE TABLE IF NOT EXISTS hourly_counts (
+                name TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                pass INTEGER NOT NULL DEFAULT 0,
+                duplicate INTEGER NOT NULL DEFAULT 0,
+                other INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (name, hour)
+            );
+            CREATE INDEX IF NOT EXISTS hourly_counts_hour ON hourly_counts (hour);
+            CREATE TABLE IF NOT EXISTS minute_counts (
+                name TEXT NOT NULL,
+                minute TEXT NOT NULL,
+                pass INTEGER NOT NULL DEFAULT 0,
+                duplicate INTEGER NOT NULL DEFAULT 0,
+                other INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (name, minute)
+            );
+            CREATE TABLE IF NOT EXISTS row_marks (
+                name TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                PRIMARY KEY (name, row)
+            );
+            CREATE TABLE IF NOT EXISTS qr_scans (
+                qr TEXT NOT NULL,
+                name TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                ts INTEGER,
+                status TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS qr_scans_qr ON qr_scans (qr);
+            CREATE INDEX IF NOT EXISTS qr_scans_line_mould ON qr_scans (substr(qr, 2, 4));
+            CREATE INDEX IF NOT EXISTS qr_scans_mould ON qr_scans (substr(qr, 3, 3));
+            CREATE INDEX IF NOT EXISTS qr_scans_name ON qr_scans (name);
+            """
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- Refresh ----------------
+    def refresh(self) -> None:
+        """Bring the index up to date with the CSV files on disk."""
+        with self._lock:
+            known = {row[0]: row[1:] for row in self._conn.execute(
+                "SELECT name, offset, size, mtime, inode, head_len, head_crc FROM log_files"
+            )}
+            present = set()
+            paths = list(self.log_dir.glob("*.csv")) if self.log_dir.exists() else []
+            csv_names = {path.name for path in paths}
+            if self.log_dir.exists():
+                # An archive only counts once its CSV is gone (no double counting)
+                paths += [
+                    path for path in self.log_dir.glob(f"*{ARCHIVE_SUFFIX}")
+                    if path.name[:-len(ARCHIVE_SUFFIX)] not in csv_names
+                ]
+            for path in paths:
+                if self._refresh_path(path, known.get(path.name)):
+                    present.add(path.name)
+            for name in set(known) - present:
+                self._forget(name)
+            self._conn.commit()
+
+    def refresh_file(self, name: str) -> None:
+        """Bring a single file up to date (cheap path for a live detail view)."""
+        with self._lock:
+            state = self._conn.execute(
+                "SELECT offset, size, mtime, inode, head_len, head_crc FROM log_files WHERE name = ?",
+                (name,),
+            ).fetchone()
+            if not self._refresh_path(self.log_dir / name, state) and state:
+                self._forget(name)
+            self._conn.commit()
+
+    def _refresh_path(self, path: Path, state: Optional[tuple]) -> bool:
+        # Caller holds _lock; returns False if the file is gone
+        try:
+            stats = path.stat()
+        except OSError:
+            return False
+        if state:
+            offset, size, mtime, inode, head_len, head_crc = state
+            if size == stats.st_size and mtime == stats.st_mtime and inode == stats.st_ino:
+                return True
+            if path.name.endswith(ARCHIVE_SUFFIX) or (
+                stats.st_size < offset
+                or inode != stats.st_ino
+                or self._head_crc(path, head_len) != head_crc
+            ):
+                self._forget(path.name)
+                state = None
+        if path.name.endswith(ARCHIVE_SUFFIX):
+            self._ingest_archive(path, stats)
+        else:
+            self._ingest(path, state[0] if state else 0, stats, is_new=state is None)
+        return True
+
+    @staticmethod
+    def _head_crc(path: Path, length: int) -> Optional[int]:
+        try:
+            with path.open("rb") as handle:
+                return zlib.crc32(handle.read(length))
+        except OSError:
+            return None
+
+    def _forget(self, name: str) -> None:
+        self._conn.execute("DELETE FROM log_files WHERE name = ?", (name,))
+        self._conn.execute("DELETE FROM hourly_counts WHERE name = ?", (name,))
+        self._conn.execute("DELETE FROM minute_counts WHERE name = ?", (name,))
+        self._conn.execute("DELETE FROM row_marks WHERE name = ?", (name,))
+        self._conn.execute("DELETE FROM qr_scans WHERE name = ?", (name,))
+
+    def _ingest(self, path: Path, offset: int, stats: os.stat_result, is_new: bool) -> None:
+        try:
+            with path.open("rb") as handle:
+                handle.seek(offset)
+                data = handle.read(max(stats.st_size - offset, 0))
+                head_len = min(offset + data.rfind(b"\n") + 1, HEAD_FINGERPRINT_BYTES)
+                handle.seek(0)
+                head_crc = zlib.crc32(handle.read(head_len))
+        except OSError:
+            return
+        complete = data.rfind(b"\n") + 1
+        row_number = 0
+        if not is_new:
+            (row_number,) = self._conn.execute(
+                "SELECT pass + duplicate + other FROM log_files WHERE name = ?", (path.name,)
+            ).fetchone()
+        delta = _FileDelta()
+        starts: List[int] = []
+        try:
+            reader = csv.reader(_lines(io.BytesIO(data[:complete]), offset, starts))
+            for row in reader:
+                start = starts[0]
+                starts.clear()
+                if not row or (offset == 0 and reader.line_num == 1 and _is_header(row)):
+                    continue
+                if row_number % ROW_MARK_INTERVAL == 0:
+                    delta.marks.append((row_number, start))
+                delta.add(row, row_number, start)
+                row_number += 1
+        except csv.Error:
+            pass
+        delta.inode, delta.head_len, delta.head_crc = stats.st_ino, head_len, head_crc
+        self._store(path.name, offset + complete, stats.st_size, stats.st_mtime, delta, is_new)
+
+    def _ingest_archive(self, path: Path, stats: os.stat_result) -> None:
+        try:
+            archive = BatchArchive(path)
+            keys = archive.keys()
+            statuses = archive.column("status")
+            qr_codes = archive.qr_codes()
+        except (OSError, ArchiveError):
+            return
+        delta = _FileDelta()
+        for row_number, (key, status, qr_code) in enumerate(zip(keys, statuses, qr_codes)):
+            delta.record(key, status, qr_code, row_number, -1)
+        delta.inode = stats.st_ino
+        self._store(path.name, stats.st_size, stats.st_size, stats.st_mtime, delta, is_new=True)
+
+    def _store(self, name: str, offset: int, size: int, mtime: float, delta: _FileDelta, is_new: bool) -> None:
+        counts = delta.counts
+        first_ts, last_ts = delta.first_ts, delta.last_ts
+        if is_new:
+            self._conn.execute(
+                "INSERT INTO log_files (name, offset, size, mtime, inode, head_len, head_crc,"
+                " pass, duplicate, other, first_ts, last_ts)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, offset, size, mtime, delta.inode, delta.head_len, delta.head_crc,
+                 counts["pass"], counts["duplicate"], counts["other"], first_ts, last_ts),
+            )
+        else:
+            self._conn.execute(
+                """
+                UPDATE log_files SET
+                    offset = ?, size = ?, mtime = ?, inode = ?, head_len = ?, head_crc = ?,
+                    pass = pass + ?, duplicate = duplicate + ?, other = other + ?,
+                    first_ts = CASE WHEN first_ts IS NULL OR ? < first_ts THEN ? ELSE first_ts END,
+                    last_ts = CASE WHEN last_ts IS NULL OR ? > last_ts THEN ? ELSE last_ts END
+                WHERE name = ?
+                """,
+                (offset, size, mtime, delta.inode, delta.head_len, delta.head_crc,
+                 counts["pass"], counts["duplicate"], counts["other"],
+                 first_ts, first_ts, last_ts, last_ts, name),
+            )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO row_marks (name, row, offset) VALUES (?, ?, ?)",
+            [(name, row, start) for row, start in delta.marks],
+        )
+        self._conn.executemany(
+            "INSERT INTO qr_scans (qr, name, row, offset, ts, status) VALUES (?, ?, ?, ?, ?, ?)",
+            [(qr_code, name, row, start, key, status) for qr_code, row, start, key, status in delta.scans],
+        )
+        for table, column, buckets, label in (
+            ("hourly_counts", "hour", delta.hours, format_hour_key),
+            ("minute_counts", "minute", delta.minutes, format_minute_key),
+        ):
+            self._conn.executemany(
+                f"""
+                INSERT INTO {table} (name, {column}, pass, duplicate, other) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (name, {column}) DO UPDATE SET
+                    pass = pass + excluded.pass,
+                    duplicate = duplicate + excluded.duplicate,
+                    other = other + excluded.other
+                """,
+                [
+                    (name, label(bucket), c["pass"], c["duplicate"], c["other"])
+                    for bucket, c in buckets.items()
+                ],
+            )
+
+    # ---------------- Rows ----------------
+    def iter_rows(self, name: str, start_row: int = 0) -> Iterator[Tuple[int, List[str]]]:
+        """Yield ``(row number, fields)`` of indexed rows from ``start_row`` on.
+
+        Reading starts at the nearest sparse row mark at or before
+        ``start_row`` and streams from there, so a page reads only the rows
+        before it since that mark and the rows it yields, not the rest of
+        the file.  Rows appended after the last refresh are not yielded.
+        """
+        with self._lock:
+            indexed = self._conn.execute(
+                "SELECT offset FROM log_files WHERE name = ?", (name,)
+            ).fetchone()
+            mark = self._conn.execute(
+                "SELECT row, offset FROM row_marks WHERE name = ? AND row <= ? ORDER BY row DESC LIMIT 1",
+                (name, max(start_row, 0)),
+            ).fetchone()
+        if indexed is None:
+            return
+        if name.endswith(ARCHIVE_SUFFIX):
+            try:
+                rows = BatchArchive(self.log_dir / name).rows()
+                yield from enumerate(islice(rows, max(start_row, 0), None), max(start_row, 0))
+            except (OSError, ArchiveError):
+                return
+            return
+        row_number, offset = mark or (0, 0)
+        try:
+            handle = (self.log_dir / name).open("rb")
+        except OSError:
+            return
+        with handle:
+            starts: List[int] = []
+            try:
+                handle.seek(offset)
+                reader = csv.reader(_lines(handle, offset, starts, end=indexed[0]))
+                for row in reader:
+                    starts.clear()
+                    if not row or (offset == 0 and reader.line_num == 1 and _is_header(row)):
+                        continue
+                    if row_number >= start_row:
+                        yield row_number, row
+                    row_number += 1
+            except (OSError, csv.Error):
+                return
+
+    # ---------------- QR search ----------------
+    def find_qr(
+        self,
+        qr_code: Optional[str] = None,
+        line: Optional[str] = None,
+        mould: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[dict]:
+        """Scans of one QR, or of every QR of a line and/or mould, newest first.
+
+        ``line`` is QR position 1 and ``mould`` positions 2-4; a partial
+        ``line + mould`` value is matched as a prefix.  Scans from archived
+        batches have an ``offset`` of -1.
+        """
+        qr_code, line, mould = ((value or "").strip().upper() for value in (qr_code, line, mould))
+        if qr_code:
+            where, params = "qr = ?", [qr_code]
+        elif line:
+            prefix = (line + mould)[:4]
+            where, params = "substr(qr, 2, 4) >= ? AND substr(qr, 2, 4) < ?", [prefix, _prefix_end(prefix)]
+        elif mould:
+            where, params = "substr(qr, 3, 3) = ?", [mould]
+        else:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT qr, name, row, offset, ts, status FROM qr_scans WHERE {where}"
+                " ORDER BY ts DESC, name, row LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            {
+                "qr": qr,
+                "file": name,
+                "row": row,
+                "offset": offset,
+                "timestamp": format_key(ts) if ts is not None else None,
+                "status": status,
+            }
+            for qr, name, row, offset, ts, status in rows
+        ]
+
+    # ---------------- Queries ----------------
+    def totals(self) -> Tuple[int, int]:
+        """(total scans, PASS scans) across every indexed file."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(pass + duplicate + other), 0), COALESCE(SUM(pass), 0) FROM log_files"
+            ).fetchone()
+        return int(row[0]), int(row[1])
+
+    def row_count(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pass + duplicate + other FROM log_files WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def file_summary(self, name: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pass, duplicate, other, first_ts, last_ts FROM log_files WHERE name = ?",
+                (name,),
+            ).fetchone()
+        if row is None:
+            return None
+        passed, duplicate, other, first_ts, last_ts = row
+        return {
+            "total": passed + duplicate + other,
+            "pass": passed,
+            "duplicate": duplicate,
+            "other": other,
+            "first_time": first_ts,
+            "last_time": last_ts,
+        }
+
+    def series(self, name: Optional[str] = None, resolution: str = "hour") -> List[Tuple[str, int, int, int]]:
+        """(label, pass, duplicate, other) per minute/hour/day/week, oldest first.
+
+        ``name`` restricts the series to one file; None sums every file.
+        """
+        if resolution == "minute":
+            table, label = "minute_counts", "minute"
+        elif resolution == "hour":
+            table, label = "hourly_counts", "hour"
+        elif resolution in ("day", "week"):
+            table, label = "hourly_counts", "substr(hour, 1, 10)"
+        else:
+            raise ValueError(f"unknown resolution {resolution!r}")
+        where = "WHERE name = ?" if name is not None else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {label} AS bucket, SUM(pass), SUM(duplicate), SUM(other)"
+                f" FROM {table} {where} GROUP BY bucket ORDER BY bucket",
+                (name,) if name is not None else (),
+            ).fetchall()
+        if resolution != "week":
+            return rows
+        weeks: Dict[str, List[int]] = {}
+        for day, passed, duplicate, other in rows:
+            totals = weeks.setdefault(week_label(day), [0, 0, 0])
+            totals[0] += passed
+            totals[1] += duplicate
+            totals[2] += other
+        return [(week, *totals) for week, totals in weeks.items()]
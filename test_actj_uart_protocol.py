@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+"""
+ACTJv20 UART Scan State Machine Test
+
+Steps ACTJv20UARTProtocol through its scan handshake with a manual timer
+wheel and checks the state transitions, the response bytes and the
+RASP_IN_PIC sequence, including the mechanism plate pulses shared with the
+hardware helpers.
+
+Usage:
+    python3 test_actj_uart_protocol.py
+"""
+
+import sys
+
+import pytest
+
+from actj_uart_protocol import (
+    BUSY_BEFORE_RESPONSE_S,
+    FINAL_READY_S,
+    RESPONSE_SETTLE_S,
+    SCAN_TIMEOUT_S,
+    ACTJv20UARTProtocol,
+    ScanState,
+)
+from hardware import ACCEPT_PULSE_PHASES, REJECT_PULSE_PHASES, BaseHardwareController
+from timer_wheel import TimerHandle
+
+CMD_RETRY, CMD_STOP = 20, 0
+
+
+class ManualWheel:
+    """TimerWheel stand-in whose timers fire only when the test says so."""
+
+    def __init__(self):
+        self.timers = []
+
+    def schedule(self, delay, callback, *args):
+        handle = TimerHandle(delay, callback, args, 0)
+        self.timers.append(handle)
+        return handle
+
+    def fire_next(self):
+        """Fire the oldest live timer; returns its delay."""
+        while True:
+            handle = self.timers.pop(0)
+            if not handle.cancelled:
+                handle.callback(*handle.args)
+                return handle.deadline
+
+    def fire_all(self):
+        delays = []
+        while any(not handle.cancelled for handle in self.timers):
+            delays.append(self.fire_next())
+        return delays
+
+    def stop(self):
+        pass
+
+
+class RecordingHardware(BaseHardwareController):
+    def __init__(self):
+        self.lines = []
+
+    def signal_ready_to_firmware(self):
+        self.lines.append("ready")
+
+    def signal_busy_to_firmware(self):
+        self.lines.append("busy")
+
+
+class RecordingSerial:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+
+@pytest.fixture
+def protocol():
+    uart = ACTJv20UARTProtocol(timer_wheel=ManualWheel())
+    uart.hardware = RecordingHardware()
+    uart.serial_port = RecordingSerial()
+    return uart
+
+
+def _pulse_delays(phases):
+    return [hold for _, hold in phases[:-1]]
+
+
+@pytest.mark.parametrize(
+    "status, response, phases",
+    [("PASS", b"A", ACCEPT_PULSE_PHASES), ("DUPLICATE", b"R", REJECT_PULSE_PHASES)],
+)
+def test_scan_runs_responding_pulsing_idle(protocol, status, response, phases):
+    wheel = protocol._timers
+    protocol._handle_command(CMD_RETRY)
+    assert protocol.state is ScanState.AWAITING_QR and protocol.is_waiting_for_qr
+    assert protocol.hardware.lines == ["busy"]
+
+    assert protocol.process_qr_input("QR", validation_result=(status, "M01")) == (status, "M01")
+    assert protocol.state is ScanState.RESPONDING
+    assert protocol.serial_port.written == []  # the byte waits for busy to settle
+
+    assert wheel.fire_next() == BUSY_BEFORE_RESPONSE_S
+    assert protocol.serial_port.written == [response]
+    assert protocol.state is ScanState.PULSING
+
+    delays = wheel.fire_all()
+    assert delays == [RESPONSE_SETTLE_S] + _pulse_delays(phases) + [FINAL_READY_S]
+    assert protocol.state is ScanState.IDLE
+    assert protocol.hardware.lines == ["busy", "busy"] + [state for state, _ in phases] + ["ready"]
+
+
+def test_scan_timeout_sends_scanner_error(protocol):
+    wheel = protocol._timers
+    protocol._handle_command(CMD_RETRY)
+    assert wheel.fire_next() == SCAN_TIMEOUT_S
+    assert protocol.serial_port.written == [b"S"]
+    assert protocol.state is ScanState.RESPONDING
+    assert wheel.fire_all() == [BUSY_BEFORE_RESPONSE_S]
+    assert protocol.state is ScanState.IDLE
+    assert protocol.hardware.lines[-1] == "ready"
+    assert protocol.process_qr_input("QR", validation_result=("PASS", None)) == (None, None)
+
+
+def test_stop_abandons_scan_and_its_timeout(protocol):
+    wheel = protocol._timers
+    protocol._handle_command(CMD_RETRY)
+    protocol._handle_command(CMD_STOP)
+    assert protocol.state is ScanState.IDLE and not protocol.is_waiting_for_qr
+    assert wheel.fire_all() == []
+    assert protocol.serial_port.written == []
+
+
+def test_new_scan_command_supersedes_pending_steps(protocol):
+    wheel = protocol._timers
+    protocol._handle_command(CMD_RETRY)
+    protocol.process_qr_input("QR", validation_result=("PASS", None))
+    protocol._handle_command(CMD_RETRY)  # firmware restarted the scan
+    assert protocol.state is ScanState.AWAITING_QR
+    wheel.fire_next()  # the first scan's response step
+    assert protocol.serial_port.written == []
+    assert protocol.state is ScanState.AWAITING_QR
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
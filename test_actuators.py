@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Actuator Queue Test
+
+Checks the LED/buzzer worker: per-channel coalescing, ordering across
+channels, pre-emption of a lit blink, error reporting from the worker
+thread and shutdown.
+
+Usage:
+    python3 test_actuators.py
+"""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from actuators import ActuatorQueue
+from hardware import BaseHardwareController
+
+
+class RecordingHardware(BaseHardwareController):
+    """Records actuator calls; a buzz can be held open with ``gate``."""
+
+    def __init__(self):
+        self.events = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.buzzing = threading.Event()
+        self.buzz_error = None
+
+    def light_on(self, color):
+        self.events.append(("on", color, time.monotonic()))
+
+    def light_off(self, color):
+        self.events.append(("off", color, time.monotonic()))
+
+    def buzz(self, duration):
+        self.events.append(("buzz", duration, time.monotonic()))
+        self.buzzing.set()
+        if self.buzz_error:
+            raise self.buzz_error
+        self.gate.wait(2.0)
+
+    def calls(self):
+        return [event[:2] for event in self.events]
+
+
+@pytest.fixture
+def hardware():
+    return RecordingHardware()
+
+
+def _hold_worker(hardware, actuators):
+    """Keep the worker busy on a buzz so later commands stay queued."""
+    hardware.gate.clear()
+    actuators.buzz(0.0)
+    assert hardware.buzzing.wait(2.0)
+
+
+def test_latest_pattern_per_channel_wins(hardware):
+    actuators = ActuatorQueue(hardware)
+    _hold_worker(hardware, actuators)
+    actuators.blink("RED", 0.01)
+    actuators.blink("YELLOW", 0.01)
+    actuators.blink("GREEN", 0.01)
+    actuators.buzz(0.1)
+    actuators.buzz(0.2)
+    hardware.gate.set()
+    assert actuators.wait_idle(2.0)
+    assert hardware.calls() == [("buzz", 0.0), ("on", "GREEN"), ("off", "GREEN"), ("buzz", 0.2)]
+    actuators.close()
+
+
+def test_channels_keep_their_queue_order(hardware):
+    actuators = ActuatorQueue(hardware)
+    _hold_worker(hardware, actuators)
+    actuators.buzz(0.1)
+    actuators.blink("RED", 0.01)
+    actuators.buzz(0.2)  # replaces the queued buzz in place, still ahead of the blink
+    hardware.gate.set()
+    assert actuators.wait_idle(2.0)
+    assert hardware.calls() == [("buzz", 0.0), ("buzz", 0.2), ("on", "RED"), ("off", "RED")]
+    actuators.close()
+
+
+def test_newer_blink_cuts_a_lit_lamp_short(hardware):
+    actuators = ActuatorQueue(hardware)
+    started = time.monotonic()
+    actuators.blink("RED", 5.0)
+    while not hardware.events:
+        time.sleep(0.001)
+    actuators.blink("GREEN", 0.01)
+    assert actuators.wait_idle(2.0)
+    assert time.monotonic() - started < 1.0
+    assert hardware.calls() == [("on", "RED"), ("off", "RED"), ("on", "GREEN"), ("off", "GREEN")]
+    actuators.close()
+
+
+def test_errors_are_reported_from_the_worker(hardware):
+    errors = []
+    actuators = ActuatorQueue(hardware, on_error=lambda exc: errors.append((exc, threading.current_thread().name)))
+    hardware.buzz_error = RuntimeError("buzzer pin busy")
+    caller = threading.current_thread().name
+    actuators.buzz(0.1)
+    assert actuators.wait_idle(2.0)
+    assert [(str(exc), name) for exc, name in errors] == [("buzzer pin busy", "actuators")]
+    assert caller != "actuators"
+
+    # The worker survives the error
+    hardware.buzz_error = None
+    actuators.blink("GREEN", 0.01)
+    assert actuators.wait_idle(2.0)
+    assert hardware.calls()[-2:] == [("on", "GREEN"), ("off", "GREEN")]
+    actuators.close()
+
+
+def test_close_plays_queued_patterns_and_stops_the_worker(hardware):
+    actuators = ActuatorQueue(hardware)
+    _hold_worker(hardware, actuators)
+    actuators.blink("RED", 0.01)
+    worker = actuators._thread
+    closer = threading.Thread(target=actuators.close)
+    closer.start()
+    hardware.gate.set()
+    closer.join(2.0)
+    assert not closer.is_alive() and not worker.is_alive()
+    assert hardware.calls() == [("buzz", 0.0), ("on", "RED"), ("off", "RED")]
+
+    actuators.buzz(0.1)  # ignored once closed
+    assert actuators._thread is None
+    assert len(hardware.events) == 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,190 @@
+"""Tests and size benchmark for the columnar batch log archive."""
+
+import csv
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+import batch_archive
+from batch_archive import LOG_HEADER, ArchiveError, BatchArchive, archive_batch, main
+from recovery_journal import RecoveryJournal
+from scan_index import ScanSummaryIndex
+
+
+def _write(path, rows, header=True):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        if header:
+            writer.writerow(LOG_HEADER)
+        writer.writerows(rows)
+
+
+def _batch(rows, seed=7):
+    random.seed(seed)
+    moment = datetime(2025, 1, 2, 7, 58, 0)
+    out = []
+    for serial in range(rows):
+        moment += timedelta(seconds=random.randint(1, 5))
+        status = "DUPLICATE" if random.random() < 0.02 else "PASS"
+        mould = random.choice(["VNC", "VND"])
+        out.append([moment.strftime("%Y-%m-%d %H:%M:%S"), "B1", mould, f"XA{mould}2401A{serial:04d}", status])
+    return out
+
+
+def test_round_trip_keeps_odd_rows(tmp_path):
+    rows = _batch(50) + [
+        ["2025-01-02 09:00:00", "B1", "VNC", "NOT-A-CARTRIDGE", "PASS"],
+        ["2025-01-02 09:00:01", "B1", "VNC", "xavnc2401a0001", "pass"],
+        ["03/01/2025 09:00:02", "B1", " VND", "XAVND2401A0002", "REJECTED"],
+        ["garbage", "B1", "VNC", "XAVNC2401A0003", "PASS"],
+        ["2025-01-02 09:00:04", "B1", "VNC"],
+        ["2025-01-02 09:00:05", "B1", "VNC", "XAVNC2401A0004", "PASS", "extra"],
+    ]
+    source = tmp_path / "B1.csv"
+    _write(source, rows)
+    target = archive_batch(source)
+    assert target.name == "B1.csv.bca"
+    assert target.stat().st_mtime == source.stat().st_mtime
+    archive = BatchArchive(target)
+    assert archive.row_count == len(rows)
+    assert list(archive.rows()) == rows
+    assert sorted(archive.raw_rows) == [51, 52, 53, 54, 55]
+    assert archive.keys()[53] is None
+    assert archive.keys()[52] == 20250103090002
+    assert archive.status_counts()["REJECTED"] == 1
+
+    with open(tmp_path / "out.csv", "w", newline="") as handle:
+        archive.write_csv(handle)
+    assert (tmp_path / "out.csv").read_bytes() == source.read_bytes()
+
+
+def test_bucket_counts_match_summary_index(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    rows = _batch(3000)
+    _write(logs / "B1.csv", rows)
+    index = ScanSummaryIndex(logs, tmp_path / "csv.db")
+    index.refresh()
+    from_csv = (index.totals(), index.series("B1.csv", "hour"), index.series("B1.csv", "minute"))
+    hits_csv = index.find_qr(mould="VND", limit=5000)
+
+    archive_batch(logs / "B1.csv", remove_source=True)
+    assert [path.name for path in logs.iterdir()] == ["B1.csv.bca"]
+    index.refresh()
+    assert (index.totals(), index.series("B1.csv.bca", "hour"), index.series("B1.csv.bca", "minute")) == (
+        from_csv[0], from_csv[1], from_csv[2],
+    )
+    hits_archive = index.find_qr(mould="VND", limit=5000)
+    assert [(hit["qr"], hit["row"], hit["timestamp"]) for hit in hits_archive] == [
+        (hit["qr"], hit["row"], hit["timestamp"]) for hit in hits_csv
+    ]
+    assert {hit["offset"] for hit in hits_archive} == {-1}
+    assert list(index.iter_rows("B1.csv.bca", 2998)) == [(2998, rows[2998]), (2999, rows[2999])]
+
+    hourly = BatchArchive(logs / "B1.csv.bca").bucket_counts(3600)
+    assert [sum(counts.values()) for counts in hourly.values()] == [
+        passed + duplicate + other for _, passed, duplicate, other in from_csv[1]
+    ]
+
+
+def test_archive_is_ten_times_smaller(tmp_path):
+    source = tmp_path / "B1.csv"
+    _write(source, _batch(20000))
+    target = archive_batch(source)
+    assert target.stat().st_size * 10 <= source.stat().st_size
+
+
+def test_csv_and_archive_are_not_counted_twice(tmp_path):
+    _write(tmp_path / "B1.csv", _batch(10))
+    archive_batch(tmp_path / "B1.csv")
+    index = ScanSummaryIndex(tmp_path, tmp_path / "index.db")
+    index.refresh()
+    assert index.totals()[0] == 10
+    assert index.file_summary("B1.csv.bca") is None
+
+
+def test_cli_skips_recent_files_and_rejects_bad_archives(tmp_path, capsys):
+    _write(tmp_path / "B1.csv", _batch(10))
+    main([str(tmp_path), "--older-than-days", "1", "--delete-source"])
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["B1.csv"]
+    main([str(tmp_path), "--older-than-days", "0", "--delete-source"])
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["B1.csv.bca"]
+    capsys.readouterr()
+    main(["--extract", str(tmp_path / "B1.csv.bca")])
+    assert capsys.readouterr().out.splitlines()[0] == ",".join(LOG_HEADER)
+
+    (tmp_path / "bad.csv.bca").write_bytes(b"QRBX")
+    with pytest.raises(ArchiveError):
+        BatchArchive(tmp_path / "bad.csv.bca")
+
+
+def test_cli_keeps_the_batch_in_the_recovery_journal(tmp_path):
+    for name in ("B1", "B2"):
+        _write(tmp_path / f"{name}.csv", _batch(10))
+    journal = RecoveryJournal(str(tmp_path / "recovery.json"))
+    journal.write_snapshot({"batch_number": "B2", "counters": {"accepted": 10}})
+    journal.append_delta({"accepted": 11}, last_qr="Q", last_status="PASS")
+    args = [str(tmp_path), "--older-than-days", "0", "--delete-source", "--recovery-file", journal.path]
+    assert main(args) == 0
+    assert sorted(path.name for path in tmp_path.glob("B*")) == ["B1.csv.bca", "B2.csv"]
+
+    journal.clear()
+    assert main(args) == 0
+    assert sorted(path.name for path in tmp_path.glob("B*")) == ["B1.csv.bca", "B2.csv.bca"]
+
+
+def test_cli_exits_non_zero_when_an_archive_fails(tmp_path, monkeypatch):
+    _write(tmp_path / "B1.csv", _batch(10))
+
+    def fail(path, remove_source=False):
+        raise ArchiveError("verification failed")
+
+    monkeypatch.setattr(batch_archive, "archive_batch", fail)
+    assert main([str(tmp_path), "--older-than-days", "0", "--delete-source"]) == 1
+    assert (tmp_path / "B1.csv").exists()
+
+
+def test_cli_keeps_csv_that_is_not_utf8(tmp_path, capsys):
+    _write(tmp_path / "B1.csv", _batch(10))
+    with open(tmp_path / "B1.csv", "ab") as handle:
+        handle.write(b"2025-01-02 09:00:00,B1,VNC,XAVNC2401A\xff001,PASS\r\n")
+    assert main([str(tmp_path), "--older-than-days", "0", "--delete-source"]) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["B1.csv"]
+    assert "skipped B1.csv" in capsys.readouterr().err
+
+
+def bench_archive(rows=200_000):
+    import tempfile
+    import time
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "B1.csv"
+        _write(source, _batch(rows))
+        started = time.perf_counter()
+        target = archive_batch(source)
+        archived = time.perf_counter() - started
+        started = time.perf_counter()
+        BatchArchive(target).bucket_counts(3600)
+        aggregated = time.perf_counter() - started
+        print(f"{rows} rows: csv {source.stat().st_size} bytes, archive {target.stat().st_size} bytes "
+              f"({source.stat().st_size / target.stat().st_size:.1f}x)")
+        print(f"archive {archived:.2f} s, hourly counts from archive {aggregated:.2f} s")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in (
+        test_round_trip_keeps_odd_rows,
+        test_bucket_counts_match_summary_index,
+        test_archive_is_ten_times_smaller,
+        test_csv_and_archive_are_not_counted_twice,
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    bench_archive(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
+    sys.exit(0)
@@ -0,0 +1,57 @@
+"""Tests for the buffered BatchLogWriter."""
+
+import csv
+from datetime import datetime
+
+from batch_log import LOG_HEADER, BatchLogWriter
+
+
+def _legacy_csv(path, rows):
+    with open(path, mode="w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(LOG_HEADER)
+        for stamp, batch, mould, qr, status in rows:
+            writer.writerow([stamp, batch, mould or "UNKNOWN", qr, status])
+
+
+def test_output_matches_synchronous_writer(tmp_path):
+    scans = [("B1", "M01", f"QR{i:05d}", "PASS" if i % 3 else "DUPLICATE") for i in range(500)]
+    scans.append(("B1", None, "BAD,QR", "OUT OF BATCH"))
+
+    log = BatchLogWriter(str(tmp_path / "B1.csv"), flush_every_rows=7, flush_interval_ms=5)
+    for scan in scans:
+        log.write(*scan)
+    assert log.drain(timeout=5.0)
+    log.close()
+
+    with open(tmp_path / "B1.csv", newline="") as handle:
+        stamps = [row[0] for row in csv.reader(handle)][1:]
+    for stamp in stamps:
+        datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S")
+    _legacy_csv(tmp_path / "legacy.csv", [(stamp, *scan) for stamp, scan in zip(stamps, scans)])
+    assert (tmp_path / "B1.csv").read_bytes() == (tmp_path / "legacy.csv").read_bytes()
+
+
+def test_resume_appends_without_second_header(tmp_path):
+    path = str(tmp_path / "B2.csv")
+    first = BatchLogWriter(path)
+    first.write("B2", "M01", "QR1", "PASS")
+    first.close()
+    resumed = BatchLogWriter(path, append=True, flush_every_rows=1000, flush_interval_ms=10_000)
+    resumed.write("B2", "M01", "QR2", "PASS")
+    assert resumed.drain(timeout=5.0)
+    with open(path, newline="") as handle:
+        rows = list(csv.reader(handle))
+    resumed.close()
+    assert rows[0] == LOG_HEADER
+    assert [row[3] for row in rows[1:]] == ["QR1", "QR2"]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_output_matches_synchronous_writer(pathlib.Path(tmp))
+        test_resume_appends_without_second_header(pathlib.Path(tmp))
+    print("batch log tests passed")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+"""
+Camera Trigger Protocol Test
+
+Checks the incremental framing of camera responses and that CameraQRScanner
+re-triggers as soon as the camera answers a no-read, stops at the decode
+deadline and hands the first valid code to its callback.  In continuous mode
+a scan request must be answered straight from a fresh timestamped decode.
+
+Usage:
+    python3 test_camera_protocol.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from camera_protocol import (
+    DECODE,
+    NO_READ,
+    SUCCESS_HEADER,
+    TRIGGER_COMMAND,
+    CameraFrameParser,
+    DecodeSlot,
+)
+from main import CameraQRScanner
+
+NO_READ_HEADER = bytes([0x02, 0x00, 0x00, 0x01, 0x00, 0x30, 0x30])
+QR = b"ABC1234567890\r\n"
+
+
+def test_split_feed_yields_one_decode():
+    parser = CameraFrameParser()
+    message = SUCCESS_HEADER + QR
+    frames = []
+    for byte in message:
+        frames += parser.feed(bytes([byte]))
+    assert [(f.kind, f.text) for f in frames] == [(DECODE, "ABC1234567890")]
+    assert parser.pending == 0
+
+
+def test_noise_and_no_read_frames():
+    parser = CameraFrameParser()
+    frames = parser.feed(b"\xff\x10" + NO_READ_HEADER + b"\x02\x05" + SUCCESS_HEADER + QR)
+    assert [f.kind for f in frames] == [NO_READ, DECODE]
+    assert parser.discarded == 4
+
+
+def test_payload_capped_without_terminator():
+    parser = CameraFrameParser(max_payload=50)
+    frames = parser.feed(SUCCESS_HEADER + b"X" * 60)
+    assert len(frames) == 1 and len(frames[0].data) == 50
+    assert parser.pending == 0 and parser.discarded == 10  # trailing bytes are noise
+
+
+def test_expire_returns_partial_decode_or_drops():
+    parser = CameraFrameParser()
+    assert parser.feed(SUCCESS_HEADER + b"PARTIALCODE") == []
+    assert [f.text for f in parser.expire()] == ["PARTIALCODE"]
+    parser.feed(b"\x02\x00")
+    assert parser.expire() == []
+    assert parser.pending == 0
+
+
+class FakeCamera:
+    """pyserial-like double that answers each trigger from a script."""
+
+    def __init__(self, responses, delay=0.002, default=None):
+        self.responses = list(responses)
+        self.default = default
+        self.delay = delay
+        self.triggers = []
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        assert data == TRIGGER_COMMAND
+        now = time.monotonic()
+        self.triggers.append(now)
+        response = self.responses.pop(0) if self.responses else self.default
+        if response is not None:
+            with self._lock:
+                self._pending.append((now + self.delay, response))
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            now = time.monotonic()
+            return sum(len(data) for due, data in self._pending if due <= now)
+
+    def read(self, size):
+        time.sleep(0.001)
+        with self._lock:
+            now = time.monotonic()
+            ready = b"".join(data for due, data in self._pending if due <= now)
+            self._pending = [(due, data) for due, data in self._pending if due > now]
+            if len(ready) > size:
+                self._pending.insert(0, (now, ready[size:]))
+        return ready[:size]
+
+    def reset_input_buffer(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _scan(camera, **kwargs):
+    found = []
+    done = threading.Event()
+
+    def on_qr(code):
+        found.append(code)
+        done.set()
+
+    scanner = CameraQRScanner(on_qr_detected=on_qr, serial_port=camera, **kwargs)
+    assert scanner.start_scanning()
+    scanner.scan_thread.join(timeout=5)
+    return scanner, found
+
+
+def test_retriggers_right_after_no_read():
+    camera = FakeCamera([NO_READ_HEADER] * 3 + [SUCCESS_HEADER + QR])
+    started = time.monotonic()
+    scanner, found = _scan(camera, retrigger_interval_ms=20)
+    assert found == ["ABC1234567890"]
+    assert scanner.triggers_sent == 4
+    # Three no-reads used to cost three fixed 0.3 s sleeps
+    assert time.monotonic() - started < 0.5
+    gaps = [b - a for a, b in zip(camera.triggers, camera.triggers[1:])]
+    assert min(gaps) >= 0.02
+
+
+def test_silent_camera_is_retriggered_after_response_timeout():
+    camera = FakeCamera([None, SUCCESS_HEADER + QR])
+    scanner, found = _scan(camera, response_timeout_ms=100)
+    assert found == ["ABC1234567890"]
+    assert 0.09 <= camera.triggers[1] - camera.triggers[0] < 0.5
+
+
+def test_deadline_stops_scanning():
+    camera = FakeCamera([NO_READ_HEADER] * 1000)
+    found = []
+    scanner = CameraQRScanner(on_qr_detected=found.append, serial_port=camera, retrigger_interval_ms=10)
+    started = time.monotonic()
+    assert scanner.start_scanning(deadline=started + 0.2)
+    scanner.scan_thread.join(timeout=5)
+    assert not scanner.running and found == []
+    assert 0.2 <= time.monotonic() - started < 0.6
+
+
+
+def test_decode_slot_freshness():
+    slot = DecodeSlot(ttl_s=0.3)
+    slot.put("ABC1234567890", received_at=10.0)
+    assert slot.take(now=10.5) is None  # too old
+    slot.put("ABC1234567890", received_at=10.0)
+    assert slot.take(now=10.1, not_before=10.05) is None  # before the last answer
+    slot.put("ABC1234567890", received_at=10.0)
+    assert slot.take(now=10.1).text == "ABC1234567890"
+    assert slot.peek() is None
+
+
+def _continuous(camera, found, **kwargs):
+    scanner = CameraQRScanner(
+        on_qr_detected=found.append, serial_port=camera, continuous=True, retrigger_interval_ms=10, **kwargs
+    )
+    assert scanner.start_continuous()
+    return scanner
+
+
+def _wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_continuous_request_answered_from_slot():
+    camera = FakeCamera([], default=SUCCESS_HEADER + QR)
+    found = []
+    scanner = _continuous(camera, found)
+    try:
+        assert _wait_for(lambda: scanner.slot.peek() is not None)
+        assert scanner.start_scanning()
+        # Answered synchronously, without waiting for another exposure
+        assert found == ["ABC1234567890"]
+        # The same code again is still the previous cartridge: not delivered
+        assert scanner.start_scanning()
+        assert not _wait_for(lambda: len(found) == 2, timeout=0.2)
+        # Once the camera sees nothing, the same code is a new cartridge
+        camera.responses = [NO_READ_HEADER]
+        assert _wait_for(lambda: found == ["ABC1234567890"] * 2)
+    finally:
+        scanner.close()
+
+
+def test_continuous_request_waits_for_next_decode():
+    second = b"XYZ9876543210\r\n"
+    camera = FakeCamera([NO_READ_HEADER] * 5 + [SUCCESS_HEADER + second], default=NO_READ_HEADER)
+    found = []
+    scanner = _continuous(camera, found)
+    try:
+        assert scanner.start_scanning()
+        assert found == []
+        assert _wait_for(lambda: found == ["XYZ9876543210"])
+    finally:
+        scanner.close()
+
+
+def test_continuous_request_expires_at_deadline():
+    camera = FakeCamera([], default=NO_READ_HEADER)
+    found = []
+    scanner = _continuous(camera, found)
+    try:
+        assert scanner.start_scanning(deadline=time.monotonic() + 0.05)
+        assert _wait_for(lambda: scanner._request_deadline is None)
+        camera.default = SUCCESS_HEADER + QR
+        assert _wait_for(lambda: scanner.slot.peek() is not None)
+        assert found == []
+    finally:
+        scanner.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -38,7 +38,7 @@ def test_complete_integration():
         print(f"   ✅ Legacy integration: {type(legacy).__name__}")
         
         # Test UART protocol
-        from actj_uart_protocol import get_uart_protocol
+        from actj_uart_protocol import ScanState, get_uart_protocol
         uart = get_uart_protocol()
         print(f"   ✅ UART protocol: {type(uart).__name__}")
         
@@ -91,8 +91,10 @@ def test_complete_integration():
         uart.serial_port = MockSerial()
         
         print("   Testing QR processing through UART...")
-        uart._waiting_for_qr = True
+        uart._handle_command(20)  # Scan command, as sent by the firmware
+        assert uart.is_waiting_for_qr
         uart.process_qr_input("MVANC00001")
+        assert uart.state is ScanState.RESPONDING
         
         if uart.serial_port.data:
             response = uart.serial_port.data[-1]
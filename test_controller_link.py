@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""
+ControllerLink Reader Thread Test
+
+Drives main.ControllerLink through a pseudo-terminal that stands in for the
+ACTJ controller UART and checks that scan commands reach the busy line in
+well under a millisecond, independent of the Tk event loop, and reach the
+application only when the Tk thread polls the command queue.
+
+Usage:
+    python3 test_controller_link.py
+"""
+
+import fcntl
+import os
+import queue
+import select
+import statistics
+import struct
+import sys
+import termios
+import time
+import tty
+
+import pytest
+
+if not hasattr(os, "openpty"):  # pragma: no cover - Windows dev machines
+    pytest.skip("pty support required", allow_module_level=True)
+
+from main import CMD_FINAL, CMD_RETRY, ControllerLink
+
+
+class PtySerial:
+    """Minimal pyserial-compatible wrapper around the slave side of a pty."""
+
+    def __init__(self, fd, timeout=0.1):
+        self.fd = fd
+        self.timeout = timeout
+        self.port = os.ttyname(fd)
+
+    @property
+    def in_waiting(self):
+        raw = fcntl.ioctl(self.fd, termios.FIONREAD, b"\0\0\0\0")
+        return struct.unpack("I", raw)[0]
+
+    def read(self, size=1):
+        ready, _, _ = select.select([self.fd], [], [], self.timeout)
+        if not ready:
+            return b""
+        return os.read(self.fd, size)
+
+    def write(self, data):
+        return os.write(self.fd, data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        termios.tcflush(self.fd, termios.TCIFLUSH)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class RecordingHardware:
+    def __init__(self):
+        self.busy_events = queue.Queue()
+
+    def set_busy(self, busy):
+        self.busy_events.put((busy, time.perf_counter()))
+
+
+class QueueWindow:
+    """Stand-in for the Tk root: after() callbacks run when drained."""
+
+    def __init__(self):
+        self.callbacks = queue.Queue()
+
+    def after(self, _delay, callback, *args):
+        self.callbacks.put((callback, args))
+
+    def drain_until(self, predicate, timeout=1.0):
+        """Run the polled callbacks, as the Tk loop would, until ``predicate()``."""
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < deadline, "timed out waiting for the Tk poll"
+            callback, args = self.callbacks.get(timeout=timeout)
+            callback(*args)
+
+
+def _make_link():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    hardware = RecordingHardware()
+    window = QueueWindow()
+    requests = []
+    link = ControllerLink(
+        hardware,
+        window,
+        requests.append,
+        serial_port=PtySerial(slave),
+    )
+    return master, link, hardware, window, requests
+
+
+def test_command_dispatch_latency():
+    master, link, hardware, window, requests = _make_link()
+    try:
+        assert link.active
+        end_to_end = []
+        for index in range(50):
+            command = CMD_FINAL if index % 2 else CMD_RETRY
+            sent_at = time.perf_counter()
+            os.write(master, bytes([command]))
+            busy, busy_at = hardware.busy_events.get(timeout=1.0)
+            assert busy is False
+            end_to_end.append((busy_at - sent_at) * 1000.0)
+
+            window.drain_until(lambda: len(requests) == index + 1)
+            assert requests[-1] is (command == CMD_FINAL)
+            assert link.has_pending()
+
+            assert link.send_result("PASS")
+            assert os.read(master, 1) == b"A"
+            released, _ = hardware.busy_events.get(timeout=1.0)
+            assert released is True
+
+        median_ms = statistics.median(end_to_end)
+        print(f"pty write -> busy line: median {median_ms:.3f} ms, max {max(end_to_end):.3f} ms")
+        assert median_ms < 1.0
+    finally:
+        link.close()
+        os.close(master)
+
+
+def test_unexpected_bytes_are_ignored():
+    master, link, hardware, window, requests = _make_link()
+    try:
+        os.write(master, b"\x01\x02")
+        time.sleep(0.05)
+        callback, args = window.callbacks.get(timeout=1.0)  # one Tk poll
+        callback(*args)
+        assert hardware.busy_events.empty()
+        assert requests == []
+        assert not link.has_pending()
+    finally:
+        link.close()
+        os.close(master)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
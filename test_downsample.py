@@ -0,0 +1,31 @@
+"""Tests for chart series downsampling."""
+
+from downsample import aggregate_buckets, week_label
+
+
+def test_aggregate_buckets_preserves_totals():
+    labels = [f"h{i:02d}" for i in range(10)]
+    columns = {"pass": list(range(10)), "duplicate": [1] * 10}
+    out_labels, out_columns = aggregate_buckets(labels, columns, 4)
+    assert out_labels == ["h00", "h03", "h06", "h09"]
+    assert out_columns == {"pass": [3, 12, 21, 9], "duplicate": [3, 3, 3, 1]}
+    assert sum(out_columns["pass"]) == sum(columns["pass"])
+
+
+def test_aggregate_buckets_leaves_short_series():
+    labels, columns = ["a", "b"], {"pass": [1, 2]}
+    assert aggregate_buckets(labels, columns, 5) == (["a", "b"], {"pass": [1, 2]})
+    assert aggregate_buckets(labels, columns, 0) == (["a", "b"], {"pass": [1, 2]})
+
+
+def test_week_label_is_monday():
+    assert week_label("2025-01-06") == "2025-01-06"
+    assert week_label("2025-01-12") == "2025-01-06"
+    assert week_label("2025-01-01") == "2024-12-30"
+
+
+if __name__ == "__main__":
+    test_aggregate_buckets_preserves_totals()
+    test_aggregate_buckets_leaves_short_series()
+    test_week_label_is_monday()
+    print("downsample tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Duplicate Tracker Write-Behind Test
+
+Checks that queued scans survive a failing group commit and that the writer
+thread keeps running after one.
+
+Usage:
+    python3 test_duplicate_tracker.py
+"""
+
+import sqlite3
+import sys
+import time
+
+import pytest
+
+from duplicate_tracker import DuplicateTracker
+
+
+class FailingConnection:
+    """Proxy for a sqlite3 connection whose next ``failures`` writes fail."""
+
+    def __init__(self, conn, failures):
+        self._conn = conn
+        self.failures = failures
+
+    def executemany(self, sql, rows):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _stored(db_path, batch):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {qr for (qr,) in conn.execute("SELECT qr FROM scanned_qr WHERE batch = ?", (batch,))}
+    finally:
+        conn.close()
+
+
+def _wait_for(condition, timeout=3.0):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_failed_group_commit_is_retried(tmp_path):
+    db_path = tmp_path / "scan_state.db"
+    tracker = DuplicateTracker(db_path, flush_interval=0.02, group_size=1)
+    tracker._conn = FailingConnection(tracker._conn, failures=2)
+    try:
+        tracker.record_scan("B1", "QR0001")
+        assert _wait_for(lambda: tracker._conn.failures == 0)
+        assert _wait_for(lambda: _stored(db_path, "B1") == {"QR0001"})
+
+        # The writer survived the errors and still commits new scans
+        assert tracker._writer.is_alive()
+        tracker.record_scan("B1", "QR0002")
+        assert _wait_for(lambda: _stored(db_path, "B1") == {"QR0001", "QR0002"})
+    finally:
+        tracker.close()
+
+
+def test_flush_error_keeps_rows_queued(tmp_path):
+    db_path = tmp_path / "scan_state.db"
+    tracker = DuplicateTracker(db_path, flush_interval=60.0, group_size=1000)
+    tracker._conn = FailingConnection(tracker._conn, failures=1)
+    tracker.record_scan("B1", "QR0001")
+    with pytest.raises(sqlite3.OperationalError):
+        tracker.flush()
+    assert tracker.already_scanned("B1", "QR0001")
+    tracker.close()
+    assert _stored(db_path, "B1") == {"QR0001"}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
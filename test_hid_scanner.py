@@ -0,0 +1,144 @@
+"""Tests for the direct evdev barcode scanner reader (file-backed event stream)."""
+
+import io
+import threading
+
+from hid_scanner import (
+    EV_KEY,
+    INPUT_EVENT,
+    KEY_ENTER,
+    KEY_LEFTSHIFT,
+    KEY_PRESS,
+    KEY_RELEASE,
+    KEYMAP,
+    HIDScannerReader,
+    KeycodeDecoder,
+    find_scanner_device,
+    iter_key_events,
+)
+
+EV_SYN = 0x00
+KEYCODES = {plain: code for code, (plain, _) in KEYMAP.items()}
+KEYCODES.update({shifted: code for code, (plain, shifted) in KEYMAP.items() if shifted != plain})
+
+
+def _events(text, start=100.0, step=0.004, terminator=KEY_ENTER):
+    """Packed input_event records typing ``text`` like a scanner would."""
+    records = []
+    now = start
+
+    def emit(code, value):
+        nonlocal now
+        sec, usec = int(now), int(round((now - int(now)) * 1_000_000))
+        records.append(INPUT_EVENT.pack(sec, usec, EV_KEY, code, value))
+        records.append(INPUT_EVENT.pack(sec, usec, EV_SYN, 0, 0))
+        now += step
+
+    for char in text:
+        code = KEYCODES[char]
+        shifted = KEYMAP[code][0] != char
+        if shifted:
+            emit(KEY_LEFTSHIFT, KEY_PRESS)
+        emit(code, KEY_PRESS)
+        emit(code, KEY_RELEASE)
+        if shifted:
+            emit(KEY_LEFTSHIFT, KEY_RELEASE)
+    emit(terminator, KEY_PRESS)
+    emit(terminator, KEY_RELEASE)
+    return b"".join(records)
+
+
+def _decode(data, decoder=None):
+    decoder = decoder or KeycodeDecoder()
+    codes = []
+    for event in iter_key_events(io.BytesIO(data)):
+        code = decoder.feed(*event)
+        if code:
+            codes.append(code)
+    return codes
+
+
+def test_decoder_handles_shift_and_terminator():
+    assert _decode(_events("AB12-x/9Z") + _events("Q1W2E3", start=101.0)) == ["AB12-x/9Z", "Q1W2E3"]
+
+
+def test_slow_keys_drop_the_partial_code():
+    decoder = KeycodeDecoder(max_gap_s=0.1)
+    # A human typing at 300 ms per key never forms a code
+    assert _decode(_events("AB1", step=0.3), decoder) == []
+    assert decoder.dropped >= 1
+    assert _decode(_events("AB12345678", start=200.0), decoder) == ["AB12345678"]
+
+
+def test_split_records_are_reassembled():
+    data = _events("AB12345678")
+
+    class Trickle(io.BytesIO):
+        def read(self, size=-1):
+            return super().read(5)
+
+    assert list(iter_key_events(Trickle(data))) == list(iter_key_events(io.BytesIO(data)))
+    # A torn record at the end of the stream is ignored
+    assert _decode(data + data[:10]) == ["AB12345678"]
+
+
+def test_reader_thread_delivers_codes_from_event_file(tmp_path):
+    device = tmp_path / "event0"
+    device.write_bytes(_events("AB12345678") + _events("AB87654321", start=101.0))
+    codes = []
+    done = threading.Event()
+
+    def on_code(code):
+        codes.append(code)
+        if len(codes) == 2:
+            done.set()
+
+    reader = HIDScannerReader(str(device), on_code)  # the grab fails on a plain file
+    reader.start()
+    try:
+        assert done.wait(2.0)
+    finally:
+        reader.stop()
+    assert codes == ["AB12345678", "AB87654321"]
+    assert reader.codes_read == 2 and not reader.running
+
+
+def test_scanner_device_must_be_matched(tmp_path):
+    by_id, sys_root = tmp_path / "by-id", tmp_path / "sys"
+    by_id.mkdir()
+    for node, link, name, usb_id in (
+        ("event2", "usb-Dell_KB216_Keyboard-event-kbd", "Dell KB216", ("413c", "2113")),
+        ("event5", "usb-0c2e_0b61-event-kbd", "Honeywell Imaging Scanner", ("0c2e", "0b61")),
+    ):
+        (tmp_path / node).write_bytes(b"")
+        (by_id / link).symlink_to(tmp_path / node)
+        device = sys_root / node / "device"
+        (device / "id").mkdir(parents=True)
+        (device / "name").write_text(name + "\n")
+        (device / "id" / "vendor").write_text(usb_id[0] + "\n")
+        (device / "id" / "product").write_text(usb_id[1] + "\n")
+
+    def find(match):
+        return find_scanner_device(match, pattern=str(by_id / "*-event-kbd"), sys_root=str(sys_root))
+
+    scanner = str(tmp_path / "event5")
+    assert find("") is None  # the sorted first keyboard is the operator's
+    assert find("0C2E:0B61") == scanner
+    assert find("honeywell") == scanner
+    assert find("usb-0c2e") == scanner
+    assert find("0c2e:ffff") is None
+    assert find("zebra") is None
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_decoder_handles_shift_and_terminator()
+    test_slow_keys_drop_the_partial_code()
+    test_split_records_are_reassembled()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reader_thread_delivers_codes_from_event_file(pathlib.Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_scanner_device_must_be_matched(pathlib.Path(tmp))
+    print("hid scanner tests passed")
@@ -0,0 +1,92 @@
+"""Tests for the log viewer's conditional GET, range and gzip helpers."""
+
+import gzip
+import os
+
+import pytest
+
+from http_cache import (
+    PrecompressedCache,
+    RangeNotSatisfiable,
+    accepts_gzip,
+    etag_for,
+    etag_matches,
+    file_chunks,
+    gzip_chunks,
+    parse_range,
+)
+
+
+def test_etag_tracks_signature_and_variant():
+    etag = etag_for((1700000000.25, 4096))
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == etag_for((1700000000.25, 4096))
+    assert etag != etag_for((1700000000.26, 4096))
+    assert etag != etag_for((1700000000.25, 4097))
+    assert etag_for((1.0, 1), "rows", b"cursor=0") != etag_for((1.0, 1), "rows", b"cursor=200")
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=900-5000", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    assert parse_range("bytes=x-y", 1000) is None
+    assert parse_range(None, 1000) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("deflate, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("br")
+    assert not accepts_gzip(None)
+
+
+def test_streamed_gzip_and_file_chunks(tmp_path):
+    path = tmp_path / "B1.csv"
+    path.write_bytes(b"".join(b"2025-01-02 08:00:00,B1,M01,QR%06d,PASS\n" % i for i in range(5000)))
+    data = path.read_bytes()
+    assert b"".join(file_chunks(path, 100, 70000)) == data[100:70100]
+    assert b"".join(file_chunks(path)) == data
+    assert gzip.decompress(b"".join(gzip_chunks(file_chunks(path)))) == data
+    assert gzip.decompress(b"".join(gzip_chunks(['{"rows": [', "1", "]}"]))) == b'{"rows": [1]}'
+
+
+def test_precompressed_copy_follows_etag(tmp_path):
+    source = tmp_path / "B1.csv"
+    source.write_text("Timestamp,BatchNumber,Mould,QRCode,Status\n" * 100)
+    cache = PrecompressedCache(tmp_path / "gz")
+    first = cache.path_for(source, '"abc-1"')
+    assert gzip.decompress(first.read_bytes()) == source.read_bytes()
+    os.utime(first, (0, 0))
+    assert cache.path_for(source, '"abc-1"') == first
+    assert first.stat().st_mtime == 0  # reused, not recompressed
+
+    source.write_text("rewritten\n")
+    second = cache.path_for(source, '"abc-2"')
+    assert gzip.decompress(second.read_bytes()) == b"rewritten\n"
+    assert sorted(path.name for path in (tmp_path / "gz").iterdir()) == [second.name]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_etag_tracks_signature_and_variant()
+    test_parse_range()
+    test_accepts_gzip()
+    for test in (test_streamed_gzip_and_file_chunks, test_precompressed_copy_follows_etag):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("http cache tests passed")
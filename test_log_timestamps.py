@@ -0,0 +1,99 @@
+"""Tests and benchmark for the fixed-position log timestamp decoder."""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from log_timestamps import TimestampDecoder, format_hour_key, format_key, strptime_key
+
+SAMPLES = [
+    "2025-01-02 08:15:09",
+    "2025-01-02 23:59:59",
+    "2024-02-29 00:00:00",
+    "2025-02-29 10:00:00",  # invalid date
+    "2025-01-02 24:00:00",
+    "2025-01-02 08:60:00",
+    "2025-01-02 08:15:60",
+    "2025-1-2 8:05:07",  # unpadded, strptime accepts it
+    "02/01/2025 08:15:09",
+    "31/12/2024 23:00:00",
+    "2025-01-02T08:15:09",
+    "",
+    "garbage",
+]
+
+
+def test_matches_strptime_for_both_layouts():
+    for first in ("2025-03-04 05:06:07", "04/03/2025 05:06:07", "garbage"):
+        decoder = TimestampDecoder()
+        for value in [first] + SAMPLES:
+            assert decoder.key(value) == strptime_key(value), value
+
+
+def test_key_formatting():
+    key = TimestampDecoder().key("02/01/2025 08:15:09")
+    assert format_key(key) == "2025-01-02 08:15:09"
+    assert format_hour_key(key // 10_000) == "2025-01-02 08:00"
+    assert key // 1_000_000 == 20250102
+
+
+def _synthetic_log(rows):
+    start = datetime(2025, 1, 1, 6, 0, 0)
+    stamps, moment = [], start
+    for _ in range(rows):
+        moment += timedelta(seconds=random.randint(1, 4))
+        stamps.append(moment.strftime("%Y-%m-%d %H:%M:%S"))
+    return stamps
+
+
+def _legacy_aggregate(stamps):
+    # What _batch_stats/_daily_trends did per row before the decoder
+    hours = {}
+    for value in stamps:
+        stamp = None
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S"):
+            try:
+                stamp = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        if stamp is None:
+            continue
+        bucket = stamp.replace(minute=0, second=0, microsecond=0)
+        hours[bucket] = hours.get(bucket, 0) + 1
+    return len(hours)
+
+
+def _decoder_aggregate(stamps):
+    decoder = TimestampDecoder()
+    hours = {}
+    for value in stamps:
+        key = decoder.key(value)
+        if key is None:
+            continue
+        bucket = key // 10_000
+        hours[bucket] = hours.get(bucket, 0) + 1
+    return len(hours)
+
+
+def bench_timestamps(rows=1_000_000):
+    random.seed(12)
+    stamps = _synthetic_log(rows)
+    started = time.perf_counter()
+    legacy_buckets = _legacy_aggregate(stamps)
+    legacy = time.perf_counter() - started
+    started = time.perf_counter()
+    decoded_buckets = _decoder_aggregate(stamps)
+    decoded = time.perf_counter() - started
+    assert legacy_buckets == decoded_buckets
+    print(f"{rows} rows, {decoded_buckets} hour buckets")
+    print(f"strptime  {legacy:8.2f} s")
+    print(f"decoder   {decoded:8.2f} s  ({legacy / decoded:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_matches_strptime_for_both_layouts()
+    test_key_formatting()
+    bench_timestamps(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
+    sys.exit(0)
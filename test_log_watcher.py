@@ -0,0 +1,91 @@
+"""Tests for the shared batch log tail watcher."""
+
+import csv
+import queue
+import time
+
+import pytest
+
+from log_watcher import LOG_HEADER, LogTailWatcher
+
+
+def _append(path, rows, header=False):
+    with open(path, "a", newline="") as handle:
+        writer = csv.writer(handle)
+        if header:
+            writer.writerow(LOG_HEADER)
+        writer.writerows(rows)
+
+
+def _collect(events, count, timeout=3.0):
+    return [events.get(timeout=timeout) for _ in range(count)]
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_new_rows_reach_every_subscriber(tmp_path, use_inotify):
+    _append(tmp_path / "OLD.csv", [["2025-01-01 08:00:00", "OLD", "M01", "QR0", "PASS"]], header=True)
+    watcher = LogTailWatcher(tmp_path, poll_interval=0.02, rescan_interval=0.05, use_inotify=use_inotify)
+    first, second = watcher.subscribe(), watcher.subscribe()
+    try:
+        _append(tmp_path / "B1.csv", [["2025-01-02 08:00:00", "B1", "M01", "QR1", "pass"]], header=True)
+        _append(tmp_path / "B1.csv", [["2025-01-02 08:00:01", "B1", "M01", "QR2", "DUPLICATE"]])
+        for events in (first, second):
+            scans = _collect(events, 2)
+            assert [(scan["file"], scan["qr"], scan["status"]) for scan in scans] == [
+                ("B1.csv", "QR1", "PASS"),
+                ("B1.csv", "QR2", "DUPLICATE"),
+            ]
+        with pytest.raises(queue.Empty):
+            first.get(timeout=0.2)  # rows that predate the watcher are not replayed
+    finally:
+        watcher.stop()
+
+
+def test_slow_subscriber_drops_oldest_rows(tmp_path):
+    watcher = LogTailWatcher(tmp_path, poll_interval=0.02, rescan_interval=0.05, queue_size=3, use_inotify=False)
+    events = watcher.subscribe()
+    try:
+        rows = [["2025-01-02 08:00:00", "B1", "M01", f"QR{i}", "PASS"] for i in range(6)]
+        _append(tmp_path / "B1.csv", rows, header=True)
+        _append(tmp_path / "B1.csv", [["2025-01-02 08:00:09", "B1", "M01", "QR-LAST", "PASS"]])
+        deadline = time.monotonic() + 3.0
+        while not any(scan["qr"] == "QR-LAST" for scan in list(events.queue)):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert [scan["qr"] for scan in _collect(events, 3)] == ["QR4", "QR5", "QR-LAST"]
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_stop_ends_the_thread_promptly_and_can_restart(tmp_path, use_inotify):
+    watcher = LogTailWatcher(tmp_path, poll_interval=0.02, use_inotify=use_inotify)
+    watcher.subscribe()
+    thread = watcher._thread
+    started = time.monotonic()
+    watcher.stop()
+    assert time.monotonic() - started < 0.5
+    assert not thread.is_alive()
+    watcher.stop()  # idempotent
+
+    events = watcher.subscribe()
+    try:
+        _append(tmp_path / "B1.csv", [["2025-01-02 08:00:00", "B1", "M01", "QR1", "PASS"]], header=True)
+        assert [scan["qr"] for scan in _collect(events, 1)] == ["QR1"]
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for mode in (True, False):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_new_rows_reach_every_subscriber(pathlib.Path(tmp), mode)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_slow_subscriber_drops_oldest_rows(pathlib.Path(tmp))
+    for mode in (True, False):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_stop_ends_the_thread_promptly_and_can_restart(pathlib.Path(tmp), mode)
+    print("log watcher tests passed")
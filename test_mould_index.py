@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""
+Mould Range Index Test and Micro-benchmark
+
+Verifies that MouldRangeIndex returns the same mould as the original linear
+scan over mould_ranges and, when run directly, times both lookups for 1-500
+moulds.
+
+Usage:
+    python3 test_mould_index.py            # benchmark
+    python3 -m pytest test_mould_index.py  # correctness only
+"""
+
+import random
+import string
+import sys
+import timeit
+
+from mould_index import MouldRangeIndex
+
+
+def _linear_find(mould_ranges, qr_code):
+    for mould, (start, end) in mould_ranges.items():
+        if start <= qr_code <= end:
+            return mould
+    return None
+
+
+def _make_ranges(count, line="A"):
+    names = set()
+    rng = random.Random(count)
+    while len(names) < count:
+        names.add(rng.choice(string.ascii_uppercase) + "".join(rng.choices(string.ascii_uppercase + string.digits, k=2)))
+    return {name: (f"X{line}{name}2401A0001", f"X{line}{name}2401Z9999") for name in sorted(names)}
+
+
+def _sample_codes(mould_ranges, count=200):
+    rng = random.Random(7)
+    names = list(mould_ranges)
+    codes = []
+    for _ in range(count):
+        name = rng.choice(names)
+        letter = rng.choice(string.ascii_uppercase)
+        codes.append(f"XA{name}2401{letter}{rng.randint(0, 9999):04d}")
+    codes += ["XAZZZ2401A0001", "XA0002401A0001", "XAAAA2400Z9999"]
+    return codes
+
+
+def test_matches_linear_scan():
+    for count in (1, 2, 17, 500):
+        mould_ranges = _make_ranges(count)
+        index = MouldRangeIndex(mould_ranges)
+        assert not index.overlaps
+        assert len(index) == count and dict(index) == mould_ranges
+        for qr in _sample_codes(mould_ranges):
+            assert index.find(qr) == _linear_find(mould_ranges, qr), qr
+
+
+def test_overlaps_detected_and_first_match_kept():
+    mould_ranges = {
+        "VNC": ("XAVNC2401A0001", "XAVNC2401Z9999"),
+        "VNB": ("XAVNB2401A0001", "XAVNC2401B0001"),
+    }
+    index = MouldRangeIndex(mould_ranges)
+    assert index.overlaps == [("VNB", "VNC")]
+    assert index.find("XAVNC2401A0500") == "VNC"
+    assert index.find("XAVNB2401C0001") == "VNB"
+
+
+def bench_lookup():
+    print(f"{'moulds':>7} {'linear us':>10} {'index us':>10} {'speedup':>8}")
+    for count in (1, 10, 50, 100, 250, 500):
+        mould_ranges = _make_ranges(count)
+        index = MouldRangeIndex(mould_ranges)
+        codes = _sample_codes(mould_ranges)
+        loops = 20
+        linear = timeit.timeit(lambda: [_linear_find(mould_ranges, qr) for qr in codes], number=loops)
+        indexed = timeit.timeit(lambda: [index.find(qr) for qr in codes], number=loops)
+        per_linear = linear / (loops * len(codes)) * 1e6
+        per_index = indexed / (loops * len(codes)) * 1e6
+        print(f"{count:>7} {per_linear:>10.2f} {per_index:>10.2f} {per_linear / per_index:>7.1f}x")
+
+
+if __name__ == "__main__":
+    bench_lookup()
+    sys.exit(0)
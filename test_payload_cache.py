@@ -0,0 +1,43 @@
+"""Tests for the log viewer payload cache."""
+
+import json
+
+import pytest
+
+from payload_cache import PayloadCache, approximate_size, freeze, to_json
+
+
+def test_hits_misses_and_signature():
+    cache = PayloadCache(max_bytes=1 << 20)
+    assert cache.get("a", 1) is None
+    frozen = cache.put("a", 1, {"labels": ["x", "y"], "total": 2})
+    assert cache.get("a", 1) is frozen
+    assert cache.get("a", 2) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+    with pytest.raises(TypeError):
+        frozen["total"] = 3
+    assert json.loads(to_json(frozen)) == {"labels": ["x", "y"], "total": 2}
+    nested = freeze({"days": [{"date": "2025-01-02", "counts": {"pass": 3}}]})
+    assert json.loads(to_json({"trends": nested})) == {
+        "trends": {"days": [{"date": "2025-01-02", "counts": {"pass": 3}}]}
+    }
+
+
+def test_lru_eviction_respects_budget():
+    payload = {"chart": list(range(200))}
+    entry_size = approximate_size(freeze(payload))
+    cache = PayloadCache(max_bytes=entry_size * 3)
+    for key in "abc":
+        cache.put(key, 0, payload)
+    cache.get("a", 0)
+    cache.put("d", 0, payload)
+    assert cache.get("b", 0) is None
+    assert all(cache.get(key, 0) is not None for key in "acd")
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= stats["max_bytes"]
+
+
+if __name__ == "__main__":
+    test_hits_misses_and_signature()
+    test_lru_eviction_respects_budget()
+    print("payload cache tests passed")
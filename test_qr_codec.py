@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""
+QR Codec and Bitmap Duplicate Tracking Test
+
+Checks the integer encoding of cartridge QR codes, the per-mould bitsets and
+the bitmap blob that DuplicateTracker persists for instant resume.
+
+Usage:
+    python3 test_qr_codec.py
+"""
+
+import sys
+
+import pytest
+
+from duplicate_tracker import DuplicateTracker
+from logic import handle_qr_scan
+from qr_codec import BatchBitmap, decode_qr, encode_qr
+
+RANGES = {
+    "VNC": ("XAVNC2401A0001", "XAVNC2401Z9999"),
+    "VND": ("XAVND2401B0500", "XAVND2401B0999"),
+}
+
+
+def test_round_trip_and_order():
+    codes = ["XAVNC2401A0001", "XAVNC2401A9999", "XAVNC2401B0000", "0Z9Z92401Z9999"]
+    encoded = [encode_qr(code) for code in codes]
+    assert [decode_qr(code) for code in encoded] == codes
+    assert encoded[0].serial < encoded[1].serial < encoded[2].serial
+    assert encode_qr("XAVNC2401A001") is None
+    assert encode_qr("XAVNC24011A001") is None
+
+
+def test_bitmap_matches_string_ranges():
+    bitmap = BatchBitmap(RANGES)
+    assert bitmap.covers_all(RANGES)
+    assert len(bitmap.to_blob()) < 40_000
+    for qr in ("XAVNC2401A0001", "XAVNC2401M5000", "XAVNC2401Z9999", "XAVND2401B0500",
+               "XAVND2401B1000", "XAVNC2402A0001", "XAVNC2401A0000", "XAVND2401B0499"):
+        expected = handle_qr_scan(qr, "A", RANGES)[1]
+        counts = bitmap.counts()
+        if expected is None:
+            assert bitmap.mark(qr) is None and bitmap.seen(qr) is None, qr
+        else:
+            assert bitmap.seen(qr) is False and bitmap.mark(qr) is True, qr
+            assert bitmap.seen(qr) is True and bitmap.mark(qr) is False, qr
+            assert bitmap.counts()[expected] == counts[expected] + 1, qr
+
+
+def test_unstorable_mould_names_fall_back_to_strings():
+    ranges = dict(RANGES, **{"VNÉ": RANGES["VND"], "M" * 256: RANGES["VND"]})
+    bitmap = BatchBitmap(ranges)
+    assert not bitmap.covers_all(ranges)
+    assert set(bitmap.counts()) == set(RANGES)
+    snapshot = bitmap.snapshot()
+    bitmap.mark("XAVNC2401C0042")
+    restored = BatchBitmap(ranges)
+    assert restored.load_blob(snapshot.to_blob())
+    assert restored.counts() == {"VNC": 0, "VND": 0}
+
+
+def test_tracker_restores_bitmap_blob(tmp_path):
+    db_path = tmp_path / "scan_state.db"
+    tracker = DuplicateTracker(db_path)
+    bitmap = BatchBitmap(RANGES)
+    tracker.attach_bitmap("MVANC00001", bitmap)
+    tracker.record_scan("MVANC00001", "XAVNC2401C0042")
+    tracker.record_scan("MVANC00001", "XAVND2401B0600")
+    assert tracker.already_scanned("MVANC00001", "XAVNC2401C0042")
+    assert not tracker.already_scanned("MVANC00001", "XAVNC2401C0043")
+    tracker.close()
+
+    tracker = DuplicateTracker(db_path)
+    resumed = BatchBitmap(RANGES)
+    assert tracker.attach_bitmap("MVANC00001", resumed)
+    assert resumed.counts() == {"VNC": 1, "VND": 1}
+    assert tracker.already_scanned("MVANC00001", "XAVND2401B0600")
+
+    # Changed ranges invalidate the blob; bits come back from the scanned rows
+    changed = dict(RANGES, VND=("XAVND2401B0500", "XAVND2401B0700"))
+    rebuilt = BatchBitmap(changed)
+    assert not tracker.attach_bitmap("MVANC00001", rebuilt)
+    assert rebuilt.counts() == {"VNC": 1, "VND": 1}
+    tracker.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,72 @@
+"""Tests for the append-only recovery journal."""
+
+import json
+
+from recovery_journal import RecoveryJournal
+
+STATE = {
+    "batch_number": "B1",
+    "batch_line": "A",
+    "moulds": [{"name": "M01", "qr_start": "QR0001", "qr_end": "QR9999"}],
+    "counters": {"total": 0, "accepted": 0, "duplicate": 0, "rejected": 0},
+    "last_qr": "None",
+    "last_status": "READY",
+    "scanning_active": True,
+    "session_start": None,
+}
+
+
+def _scan(journal, counters, index):
+    counters["total"] += 1
+    counters["accepted"] += 1
+    assert journal.append_delta(dict(counters), last_qr=f"QR{index:04d}", last_status="PASS")
+
+
+def test_replay_and_compaction(tmp_path):
+    path = str(tmp_path / "recovery.json")
+    journal = RecoveryJournal(path, compact_every=50)
+    assert not journal.append_delta({"total": 1})
+    journal.write_snapshot(STATE)
+    counters = dict(STATE["counters"])
+    for index in range(1, 121):
+        _scan(journal, counters, index)
+
+    with open(path, "rb") as handle:
+        assert len(handle.readlines()) == 1 + 120 % 50
+    state = RecoveryJournal(path).load()
+    assert state["counters"] == counters
+    assert state["last_qr"] == "QR0120"
+    assert state["moulds"] == STATE["moulds"]
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = str(tmp_path / "recovery.json")
+    journal = RecoveryJournal(path)
+    journal.write_snapshot(STATE)
+    counters = dict(STATE["counters"])
+    for index in range(1, 4):
+        _scan(journal, counters, index)
+    with open(path, "ab") as handle:
+        handle.write(b'0000abcd {"t":"delta","counters":{"tot')
+
+    resumed = RecoveryJournal(path)
+    state = resumed.load()
+    assert state["counters"]["accepted"] == 3
+    _scan(resumed, counters, 4)
+    assert RecoveryJournal(path).load()["last_qr"] == "QR0004"
+
+
+def test_legacy_json_file_is_accepted(tmp_path):
+    path = tmp_path / "recovery.json"
+    path.write_text(json.dumps(STATE, indent=2), encoding="utf-8")
+    assert RecoveryJournal(str(path)).load() == STATE
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in (test_replay_and_compaction, test_torn_tail_is_dropped, test_legacy_json_file_is_accepted):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("recovery journal tests passed")
@@ -0,0 +1,51 @@
+"""Tests for the per-cartridge retry/final attempt context."""
+
+from scan_attempts import ScanAttempts
+
+TIMEOUT_S = 12.0
+
+
+def test_retry_and_final_share_one_context():
+    attempts = ScanAttempts(TIMEOUT_S)
+    first = attempts.begin(final_attempt=False, now=0.0)
+    assert attempts.pending_decode() is None
+    # Decode lands after the first attempt timed out
+    attempts.note_decode("AB12345678", now=11.5, source="camera")
+    second = attempts.begin(final_attempt=False, now=12.5)
+    assert second is first and second.requests == 2
+    late = attempts.pending_decode()
+    assert (late.code, late.received_at, late.source) == ("AB12345678", 11.5, "camera")
+    third = attempts.begin(final_attempt=True, now=25.0)
+    assert third is first and third.final_requested
+    # After a final attempt the next request is a new cartridge
+    assert attempts.begin(final_attempt=False, now=38.0) is not first
+    assert attempts.pending_decode() is None
+
+
+def test_outcome_survives_undelivered_answer():
+    attempts = ScanAttempts(TIMEOUT_S)
+    attempts.begin(final_attempt=False, now=0.0)
+    attempts.record_outcome("AB12345678", "PASS", "M01", now=1.0)
+    attempts.begin(final_attempt=False, now=12.5)
+    assert attempts.outcome("AB12345678") == ("PASS", "M01")
+    assert attempts.pending_decode().code == "AB12345678"
+    attempts.finish()
+    assert attempts.outcome("AB12345678") is None
+    assert attempts.note_decode("AB12345678", now=14.0, source="entry") is None
+
+
+def test_newest_decode_wins_and_stale_context_is_dropped():
+    attempts = ScanAttempts(TIMEOUT_S)
+    first = attempts.begin(final_attempt=False, now=0.0)
+    attempts.note_decode("AB12345678", now=1.0, source="camera")
+    attempts.note_decode("AB87654321", now=2.0, source="entry")
+    attempts.note_decode("AB12345678", now=3.0, source="camera")
+    assert attempts.pending_decode().received_at == 3.0
+    assert attempts.begin(final_attempt=False, now=100.0) is not first
+
+
+if __name__ == "__main__":
+    test_retry_and_final_share_one_context()
+    test_outcome_survives_undelivered_answer()
+    test_newest_decode_wins_and_stale_context_is_dropped()
+    print("scan attempt tests passed")
@@ -0,0 +1,250 @@
+"""Tests for the incremental log viewer summary index."""
+
+import csv
+import io
+import sqlite3
+from itertools import islice
+
+import pytest
+
+import scan_index
+from scan_index import LOG_HEADER, ScanSummaryIndex
+
+
+def _write(path, rows, mode="a", header=False):
+    with open(path, mode, newline="") as handle:
+        writer = csv.writer(handle)
+        if header:
+            writer.writerow(LOG_HEADER)
+        writer.writerows(rows)
+
+
+def _rows(day, hour, count, status="PASS"):
+    return [[f"{day} {hour:02d}:{i % 60:02d}:00", "B1", "M01", f"QR{hour:02d}{i:04d}", status] for i in range(count)]
+
+
+def test_incremental_refresh_matches_full_parse(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    csv_path = logs / "B1.csv"
+    _write(csv_path, _rows("2025-01-02", 8, 10), mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+    assert index.totals() == (10, 10)
+
+    _write(csv_path, _rows("2025-01-02", 9, 5, status="DUPLICATE"))
+    with open(csv_path, "a", newline="") as handle:
+        handle.write("2025-01-03 10:00:00,B1,M01,QR")  # row still being written
+    index.refresh()
+    assert index.totals() == (15, 10)
+
+    with open(csv_path, "a", newline="") as handle:
+        handle.write("X,REJECTED\r\n")
+    _write(logs / "B2.csv", [["03/01/2025 11:30:00", "B2", "M02", "QRX", "PASS"]], mode="w", header=True)
+    index.refresh()
+
+    fresh = ScanSummaryIndex(logs, tmp_path / "fresh.db")
+    fresh.refresh()
+    for idx in (index, fresh):
+        assert idx.totals() == (17, 11)
+        summary = idx.file_summary("B1.csv")
+        assert (summary["pass"], summary["duplicate"], summary["other"]) == (10, 5, 1)
+        assert summary["first_time"] == "2025-01-02 08:00:00"
+        assert summary["last_time"] == "2025-01-03 10:00:00"
+        assert [hour for hour, *_ in idx.series("B1.csv", "hour")] == [
+            "2025-01-02 08:00", "2025-01-02 09:00", "2025-01-03 10:00",
+        ]
+        assert idx.series(resolution="day") == [("2025-01-02", 10, 5, 0), ("2025-01-03", 1, 0, 1)]
+
+
+def test_rewritten_and_removed_files(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    csv_path = logs / "B1.csv"
+    _write(csv_path, _rows("2025-01-02", 8, 20), mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+
+    _write(csv_path, _rows("2025-01-05", 8, 3), mode="w", header=True)
+    index.refresh()
+    assert index.totals() == (3, 3)
+    assert index.series(resolution="day") == [("2025-01-05", 3, 0, 0)]
+
+    csv_path.unlink()
+    index.refresh()
+    assert index.totals() == (0, 0)
+    assert index.file_summary("B1.csv") is None
+
+
+def test_index_from_older_schema_is_rebuilt(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    _write(logs / "B1.csv", _rows("2025-01-02", 8, 4), mode="w", header=True)
+    conn = sqlite3.connect(tmp_path / "index.db")
+    conn.execute("CREATE TABLE log_files (name TEXT PRIMARY KEY, offset INTEGER NOT NULL)")
+    conn.execute("INSERT INTO log_files VALUES ('B1.csv', 999)")
+    conn.commit()
+    conn.close()
+
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+    assert index.totals() == (4, 4)
+
+def test_restarted_batch_is_reparsed_even_when_larger(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    csv_path = logs / "B1.csv"
+    _write(csv_path, _rows("2025-01-02", 8, 5), mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+
+    # init_log reopens the same name with mode "w" when a batch is restarted
+    _write(csv_path, _rows("2025-01-07", 9, 40, status="DUPLICATE"), mode="w", header=True)
+    index.refresh_file("B1.csv")
+    summary = index.file_summary("B1.csv")
+    assert (summary["pass"], summary["duplicate"]) == (0, 40)
+    assert index.series(resolution="day") == [("2025-01-07", 0, 40, 0)]
+
+
+def test_tail_refresh_reads_only_new_bytes(tmp_path, monkeypatch):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    csv_path = logs / "B1.csv"
+    _write(csv_path, _rows("2025-01-02", 8, 2000), mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+
+    parsed = []
+    original_add = scan_index._FileDelta.add
+    monkeypatch.setattr(
+        scan_index._FileDelta, "add", lambda self, row, *args: parsed.append(row) or original_add(self, row, *args)
+    )
+    _write(csv_path, _rows("2025-01-02", 9, 3))
+    index.refresh_file("B1.csv")
+    assert len(parsed) == 3
+    assert index.totals() == (2003, 2003)
+
+
+def test_iter_rows_seeks_from_sparse_marks(tmp_path, monkeypatch):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    csv_path = logs / "B1.csv"
+    _write(csv_path, _rows("2025-01-02", 8, 1500), mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+    _write(csv_path, [[], ["2025-01-02 10:00:00", "B1", "M02", "QRLAST", "DUPLICATE"]])
+    index.refresh_file("B1.csv")
+
+    with open(csv_path, newline="") as handle:
+        expected = [row for row in csv.reader(handle) if row][1:]
+    assert [row for _, row in index.iter_rows("B1.csv")] == expected
+    assert list(index.iter_rows("B1.csv", 1500)) == [(1500, expected[1500])]
+
+    assert [row for row, _ in _marks(index)] == [0, 512, 1024]
+    parsed = []
+    original_lines = scan_index._lines
+    monkeypatch.setattr(
+        scan_index, "_lines", lambda source, offset, *args, **kwargs: (
+            parsed.append(offset), original_lines(source, offset, *args, **kwargs)
+        )[1]
+    )
+    rows = index.iter_rows("B1.csv", 1100)
+    assert next(rows) == (1100, expected[1100])
+    assert parsed == [next(o for r, o in _marks(index) if r == 1024)]
+
+
+class _CountingFile(io.FileIO):
+    bytes_read = 0
+
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        _CountingFile.bytes_read += count or 0
+        return count
+
+
+def test_iter_rows_page_does_not_read_whole_file(tmp_path, monkeypatch):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    csv_path = logs / "B1.csv"
+    _write(csv_path, _rows("2025-01-02", 8, 20000), mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+
+    monkeypatch.setattr(_CountingFile, "bytes_read", 0)
+    monkeypatch.setattr(
+        scan_index.Path, "open", lambda self, mode="r", *args, **kwargs: io.BufferedReader(_CountingFile(self, mode))
+    )
+    page = list(islice(index.iter_rows("B1.csv", 0), 10))
+    assert [row for row, _ in page] == list(range(10))
+    assert 0 < _CountingFile.bytes_read < csv_path.stat().st_size // 10
+
+
+def _marks(index):
+    return index._conn.execute("SELECT row, offset FROM row_marks ORDER BY row").fetchall()
+
+
+def test_find_qr_across_batches(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    _write(logs / "B1.csv", [
+        ["2025-01-02 08:00:00", "B1", "M01", "1A123PQRSA0001", "PASS"],
+        ["2025-01-02 08:00:05", "B1", "M01", "1A124PQRSA0002", "PASS"],
+    ], mode="w", header=True)
+    _write(logs / "B2.csv", [
+        ["2025-02-03 09:00:00", "B2", "M01", "1B123PQRSA0003", "PASS"],
+        ["2025-02-03 09:30:00", "B2", "M01", "1A123PQRSA0001", "DUPLICATE"],
+    ], mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+
+    hits = index.find_qr(qr_code="1a123pqrsa0001")
+    assert [(hit["file"], hit["row"], hit["status"], hit["timestamp"]) for hit in hits] == [
+        ("B2.csv", 1, "DUPLICATE", "2025-02-03 09:30:00"),
+        ("B1.csv", 0, "PASS", "2025-01-02 08:00:00"),
+    ]
+    with open(logs / "B2.csv", "rb") as handle:
+        handle.seek(hits[0]["offset"])
+        assert handle.readline().startswith(b"2025-02-03 09:30:00")
+    assert {hit["qr"] for hit in index.find_qr(line="A")} == {"1A123PQRSA0001", "1A124PQRSA0002"}
+    assert {hit["qr"] for hit in index.find_qr(line="A", mould="12")} == {"1A123PQRSA0001", "1A124PQRSA0002"}
+    assert {hit["qr"] for hit in index.find_qr(mould="123")} == {"1A123PQRSA0001", "1B123PQRSA0003"}
+    assert index.find_qr() == []
+
+    (logs / "B2.csv").unlink()
+    index.refresh()
+    assert len(index.find_qr(qr_code="1A123PQRSA0001")) == 1
+
+
+def test_series_resolutions(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    _write(logs / "B1.csv", _rows("2025-01-05", 8, 3) + _rows("2025-01-06", 23, 2, status="DUPLICATE"), mode="w", header=True)
+    _write(logs / "B2.csv", [["2025-01-06 23:01:30", "B2", "M02", "QRX", "REJECTED"]], mode="w", header=True)
+    index = ScanSummaryIndex(logs, tmp_path / "index.db")
+    index.refresh()
+
+    assert index.series("B1.csv", "minute") == [
+        ("2025-01-05 08:00", 1, 0, 0), ("2025-01-05 08:01", 1, 0, 0), ("2025-01-05 08:02", 1, 0, 0),
+        ("2025-01-06 23:00", 0, 1, 0), ("2025-01-06 23:01", 0, 1, 0),
+    ]
+    assert index.series(resolution="hour") == [("2025-01-05 08:00", 3, 0, 0), ("2025-01-06 23:00", 0, 2, 1)]
+    assert index.series(resolution="day") == [("2025-01-05", 3, 0, 0), ("2025-01-06", 0, 2, 1)]
+    # 2025-01-05 is a Sunday, 2025-01-06 the following Monday
+    assert index.series(resolution="week") == [("2024-12-30", 3, 0, 0), ("2025-01-06", 0, 2, 1)]
+    assert index.series("B2.csv", "minute") == [("2025-01-06 23:01", 0, 0, 1)]
+    with pytest.raises(ValueError):
+        index.series(resolution="month")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in (
+        test_incremental_refresh_matches_full_parse,
+        test_rewritten_and_removed_files,
+        test_restarted_batch_is_reparsed_even_when_larger,
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("scan index tests passed")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""
+Timer Wheel Test
+
+Checks that TimerWheel fires callbacks in deadline order and never early,
+that cancelled timers do not fire and stop keeping the wheel ticking, that
+delays longer than one revolution of the wheel wait out their rounds, and
+that stop() ends the driver thread.
+
+Usage:
+    python3 test_timer_wheel.py
+"""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from timer_wheel import TimerWheel
+
+
+def _fire_log(wheel, delays):
+    fired = []
+    done = threading.Event()
+
+    def on_fire(label, deadline):
+        fired.append((label, time.monotonic() - deadline))
+        if len(fired) == len(delays):
+            done.set()
+
+    now = time.monotonic()
+    for label, delay in delays:
+        wheel.schedule(delay, on_fire, label, now + delay)
+    return fired, done
+
+
+def test_fires_in_deadline_order_and_never_early():
+    wheel = TimerWheel(tick=0.005)
+    try:
+        fired, done = _fire_log(wheel, [("c", 0.06), ("a", 0.0), ("b", 0.03)])
+        assert done.wait(2.0)
+        assert [label for label, _ in fired] == ["a", "b", "c"]
+        assert all(lateness >= 0 for _, lateness in fired)
+    finally:
+        wheel.stop()
+
+
+def test_cancelled_timer_does_not_fire():
+    wheel = TimerWheel(tick=0.005)
+    try:
+        fired = []
+        handle = wheel.schedule(0.02, fired.append, "cancelled")
+        wheel.cancel(handle)
+        handle.cancel()  # idempotent
+        kept, done = _fire_log(wheel, [("kept", 0.04)])
+        assert done.wait(2.0)
+        assert fired == [] and [label for label, _ in kept] == ["kept"]
+    finally:
+        wheel.stop()
+
+
+def test_cancelling_the_last_timer_stops_the_ticking():
+    wheel = TimerWheel(tick=0.005)
+    ticks = []
+    advance = wheel._advance
+    wheel._advance = lambda: ticks.append(1) or advance()
+    try:
+        handle = wheel.schedule(30.0, print, "never")
+        time.sleep(0.02)
+        assert ticks
+        handle.cancel()
+        time.sleep(0.01)  # let a tick already in flight finish
+        idle_from = len(ticks)
+        time.sleep(0.1)
+        assert len(ticks) == idle_from
+    finally:
+        wheel.stop()
+
+def test_delay_longer_than_one_revolution_waits_its_rounds():
+    wheel = TimerWheel(tick=0.005, slots=4)  # one revolution is 20 ms
+    try:
+        fired, done = _fire_log(wheel, [("late", 0.07), ("early", 0.01)])
+        assert done.wait(2.0)
+        assert [label for label, _ in fired] == ["early", "late"]
+        assert all(lateness >= 0 for _, lateness in fired)
+    finally:
+        wheel.stop()
+
+
+def test_stop_ends_the_driver_thread():
+    wheel = TimerWheel(tick=0.005, name="wheel-under-test")
+    fired = []
+    wheel.schedule(5.0, fired.append, "never")
+    wheel.stop()
+    assert not any(thread.name == "wheel-under-test" for thread in threading.enumerate())
+    assert fired == []
+
+
+def test_rejects_non_positive_geometry():
+    with pytest.raises(ValueError):
+        TimerWheel(tick=0)
+    with pytest.raises(ValueError):
+        TimerWheel(slots=0)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,146 @@
+"""Hashed timer wheel for scheduling short protocol timeouts without sleeps."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+
+class TimerHandle:
+    """Reference to a scheduled callback; cancel() is idempotent."""
+
+    __slots__ = ("deadline", "callback", "args", "rounds", "cancelled", "_wheel")
+
+    def __init__(
+        self,
+        deadline: float,
+        callback: Callable[..., Any],
+        args: tuple,
+        rounds: int,
+        wheel: Optional["TimerWheel"] = None,
+    ) -> None:
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.rounds = rounds
+        self.cancelled = False
+        self._wheel: Optional[TimerWheel] = wheel
+
+    def cancel(self) -> None:
+        wheel = self._wheel
+        if wheel is not None:
+            wheel._discard(self)
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Fire callbacks after a delay on a single daemon thread.
+
+    Timers are hashed into ``slots`` buckets of ``tick`` seconds each, so
+    scheduling and cancelling are O(1) and the driver thread only wakes once
+    per tick while timers are outstanding (and not at all when idle).
+    """
+
+    def __init__(self, tick: float = 0.01, slots: int = 256, name: str = "timer-wheel") -> None:
+        if tick <= 0 or slots <= 0:
+            raise ValueError("tick and slots must be positive")
+        self._tick = tick
+        self._slots: List[List[TimerHandle]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._name = name
+        self._thread: Optional[threading.Thread] = None
+        self._next_tick_at = 0.0
+        self._logger = logging.getLogger("timer_wheel")
+
+    @property
+    def tick(self) -> float:
+        return self._tick
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        """Run ``callback(*args)`` no earlier than ``delay`` seconds from now."""
+        with self._cond:
+            self._ensure_running()
+            now = time.monotonic()
+            if self._pending == 0:
+                # Re-anchor an idle wheel so the first tick is a full tick away
+                self._next_tick_at = now + self._tick
+            deadline = now + max(delay, 0.0)
+            # Number of ticks after the next one, rounded up so we never fire early
+            ticks = max(0, int(-(-(deadline - self._next_tick_at) // self._tick)))
+            slot_count = len(self._slots)
+            rounds, offset = divmod(ticks, slot_count)
+            handle = TimerHandle(deadline, callback, args, rounds, self)
+            self._slots[(self._cursor + offset) % slot_count].append(handle)
+            self._pending += 1
+            self._cond.notify()
+            return handle
+
+    def cancel(self, handle: Optional[TimerHandle]) -> None:
+        if handle is not None:
+            handle.cancel()
+
+    def _discard(self, handle: TimerHandle) -> None:
+        # A cancelled timer stops counting as pending straight away, so the
+        # wheel goes idle once only cancelled entries are left in its slots
+        with self._cond:
+            if handle._wheel is self:
+                handle._wheel = None
+                handle.cancelled = True
+                self._pending -= 1
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _ensure_running(self) -> None:
+        if self._running and self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and self._pending == 0:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                remaining = self._next_tick_at - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(timeout=remaining)
+                    continue
+                self._next_tick_at += self._tick
+                due = self._advance()
+            for handle in due:
+                try:
+                    handle.callback(*handle.args)
+                except Exception:  # pragma: no cover - defensive guard
+                    self._logger.exception("Timer callback %r failed", handle.callback)
+
+    def _advance(self) -> List[TimerHandle]:
+        bucket = self._slots[self._cursor]
+        due: List[TimerHandle] = []
+        keep: List[TimerHandle] = []
+        for handle in bucket:
+            if handle.cancelled:
+                continue
+            if handle.rounds > 0:
+                handle.rounds -= 1
+                keep.append(handle)
+            else:
+                handle._wheel = None
+                self._pending -= 1
+                due.append(handle)
+        self._slots[self._cursor] = keep
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        return due